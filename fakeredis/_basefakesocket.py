@@ -1,14 +1,12 @@
-import itertools
-import queue
 import time
 import weakref
-from typing import List, Any, Tuple, Optional, Callable, Union, Match, AnyStr, Generator, Dict
+from typing import List, Any, Tuple, Optional, Callable, Union, AnyStr, Generator, Dict, Set
 from xmlrpc.client import ResponseError
 
 import redis
 from redis.connection import DefaultParser
 
-from fakeredis.model import XStream, ZSet, Hash, ExpiringMembersSet
+from fakeredis.model import XStream, ZSet, Hash, ExpiringMembersSet, QuickList
 from . import _msgs as msgs
 from ._command_args_parsing import extract_args
 from ._commands import Int, Float, SUPPORTED_COMMANDS, COMMANDS_WITH_SUB, Signature, CommandItem
@@ -21,9 +19,15 @@ from ._helpers import (
     compile_pattern,
     QUEUED,
     decode_command_bytes,
+    Database,
+    ResponseQueue,
 )
 
 
+# Types of responses which do not need any conversion
+_PLAIN_RESPONSE_TYPES = frozenset({bytes, int, float, type(None)})
+
+
 def _extract_command(fields: List[bytes]) -> Tuple[Any, List[Any]]:
     """Extracts the command and command arguments from a list of `bytes` fields.
 
@@ -46,16 +50,9 @@ def _extract_command(fields: List[bytes]) -> Tuple[Any, List[Any]]:
     return cmd, cmd_arguments
 
 
-def bin_reverse(x: int, bits_count: int) -> int:
-    result = 0
-    for i in range(bits_count):
-        if (x >> i) & 1:
-            result |= 1 << (bits_count - 1 - i)
-    return result
-
-
 class BaseFakeSocket:
     _clear_watches: Callable[[], None]
+    _script_databases: Callable[[str, List[bytes]], Optional[List[Database]]]
     ACCEPTED_COMMANDS_WHILE_PUBSUB = {
         "ping",
         "subscribe",
@@ -66,6 +63,8 @@ class BaseFakeSocket:
         "sunsubscribe",
     }
     _connection_error_class = redis.ConnectionError
+    # (socket class, server type) => (number of supported commands when built, command table)
+    _command_tables: Dict[Tuple[type, str], Tuple[int, Dict[bytes, Any]]] = dict()
 
     def __init__(self, server: "FakeServer", db: int, *args: Any, **kwargs: Any) -> None:  # type: ignore # noqa: F821
         super(BaseFakeSocket, self).__init__(*args, **kwargs)
@@ -74,7 +73,8 @@ class BaseFakeSocket:
         self._server: FakeServer = server
         self._db_num = db
         self._db = server.dbs[self._db_num]
-        self.responses: Optional[queue.Queue[bytes]] = queue.Queue()
+        self._command_table = self._get_command_table(server.server_type)
+        self.responses: Optional[ResponseQueue] = ResponseQueue()
         # Prevents parser from processing commands. Not used in this module,
         # but set by aioredis module to prevent new commands being processed
         # while handling a blocking command.
@@ -86,6 +86,7 @@ class BaseFakeSocket:
         self._in_transaction: bool
         self._pubsub: int
         self._transaction_failed: bool
+        self._watches: Set[Any]
         info = kwargs.pop("client_info", dict(user="default"))
         self._client_info: Dict[str, Union[str, int]] = {k.replace("_", "-"): v for k, v in info.items()}
 
@@ -121,6 +122,15 @@ class BaseFakeSocket:
         if responses:
             responses.put(msg)
 
+    def put_responses(self, msgs: List[Any]) -> None:
+        """Put a batch of response messages into the queue of responses, at once.
+
+        :param msgs: The response messages.
+        """
+        responses = self.responses
+        if responses and msgs:
+            responses.put_many(msgs)
+
     def pause(self) -> None:
         self._paused = True
 
@@ -141,7 +151,7 @@ class BaseFakeSocket:
     def _cleanup(self, server: Any) -> None:  # noqa: F821
         """Remove all the references to `self` from `server`.
 
-        This is called with the server lock held, but it may be some time after
+        This is called with the whole server locked, but it may be some time after
         self.close.
         """
         for subs in server.subscribers.values():
@@ -150,6 +160,19 @@ class BaseFakeSocket:
             subs.discard(self)
         self._clear_watches()
 
+    def _cleanup_closed_sockets(self) -> None:
+        """Clean out old connections. This is called with the whole server locked."""
+        while True:
+            try:
+                weak_sock = self._server.closed_sockets.pop()
+            except IndexError:
+                break
+            else:
+                sock = weak_sock()
+                if sock:
+                    with self._server.state_lock:
+                        sock._cleanup(self._server)
+
     def close(self) -> None:
         # Mark ourselves for cleanup. This might be called from
         # redis.Connection.__del__, which the garbage collection could call
@@ -161,82 +184,220 @@ class BaseFakeSocket:
         self.responses = None
 
     @staticmethod
-    def _extract_line(buf: bytes) -> Tuple[bytes, bytes]:
-        pos = buf.find(b"\n") + 1
-        assert pos > 0
-        line = buf[:pos]
-        buf = buf[pos:]
-        assert line.endswith(b"\r\n")
-        return line, buf
+    def _parse_int_line(buf: bytearray, pos: int, eol: int, prefix: bytes) -> int:
+        """Parse a `<prefix><int>\\r\\n` header line stored in `buf[pos:eol + 1]`."""
+        assert buf[pos : pos + 1] == prefix
+        assert buf[eol - 1 : eol] == b"\r"
+        return int(buf[pos + 1 : eol - 1])
 
     def _parse_commands(self) -> Generator[None, Any, None]:
         """Generator that parses commands.
 
-        It is fed pieces of redis protocol data (via `send`) and calls
-        `_process_command` whenever it has a complete one.
+        It is fed pieces of redis protocol data (via `send`) and collects
+        complete commands, which are run as a batch by `_process_commands`
+        once all the data received so far is parsed.
+
+        Incoming data is appended to a single `bytearray` which is consumed by
+        advancing a read offset, so each byte is copied once into the buffer and
+        once into the field it belongs to. Consumed data is only discarded when
+        more input is needed, and searches for line endings resume where the
+        previous search stopped, so partial frames are never re-scanned.
         """
-        buf = b""
+        buf = bytearray()
+        pos = 0  # Offset of the first unconsumed byte in buf
+        batch: List[List[bytes]] = []  # Complete commands not processed yet
         while True:
-            while self._paused or b"\n" not in buf:
+            eol = buf.find(b"\n", pos)
+            while self._paused or eol < 0:
+                if batch and not self._paused:
+                    del batch[: self._process_commands(batch)]
+                    continue
+                scan = (len(buf) if eol < 0 else eol) - pos
+                del buf[:pos]
+                pos = 0
                 buf += yield
-            line, buf = self._extract_line(buf)
-            assert line[:1] == b"*"  # array
-            n_fields = int(line[1:-2])
+                eol = buf.find(b"\n", scan)
+            n_fields = self._parse_int_line(buf, pos, eol, b"*")  # array
+            pos = eol + 1
             fields = []
-            for i in range(n_fields):
-                while b"\n" not in buf:
+            for _ in range(n_fields):
+                eol = buf.find(b"\n", pos)
+                while eol < 0:
+                    if batch and not self._paused:
+                        del batch[: self._process_commands(batch)]
+                    scan = len(buf) - pos
+                    del buf[:pos]
+                    pos = 0
                     buf += yield
-                line, buf = self._extract_line(buf)
-                assert line[:1] == b"$"  # string
-                length = int(line[1:-2])
-                while len(buf) < length + 2:
+                    eol = buf.find(b"\n", scan)
+                length = self._parse_int_line(buf, pos, eol, b"$")  # string
+                pos = eol + 1
+                while len(buf) < pos + length + 2:
+                    if batch and not self._paused:
+                        del batch[: self._process_commands(batch)]
+                    del buf[:pos]
+                    pos = 0
                     buf += yield
-                fields.append(buf[:length])
-                buf = buf[length + 2 :]  # +2 to skip the CRLF
-            self._process_command(fields)
+                with memoryview(buf) as view:
+                    fields.append(bytes(view[pos : pos + length]))
+                pos += length + 2  # +2 to skip the CRLF
+            batch.append(fields)
+
+    @classmethod
+    def _get_command_table(cls, server_type: str) -> Dict[bytes, Any]:
+        """Get the table mapping raw command names to `(function, signature)` for this class and server type.
+
+        The table is built once, and holds the lowercase and uppercase variants of each command name, as
+        sent by clients. Commands with sub-commands map to a nested table keyed by the raw sub-command name,
+        where the `None` key holds the command called without a sub-command, if any.
+        """
+        size, table = cls._command_tables.get((cls, server_type), (-1, {}))
+        if size == len(SUPPORTED_COMMANDS):
+            return table
+        table = dict()
+        for cmd_name, sig in SUPPORTED_COMMANDS.items():
+            if server_type not in sig.server_types:
+                continue
+            entry = (getattr(cls, sig.func_name, None), sig)
+            has_sub = cmd_name.split(" ")[0] in COMMANDS_WITH_SUB
+            for variant in {cmd_name, cmd_name.upper()}:
+                name, _, sub_name = variant.encode().partition(b" ")
+                if has_sub:
+                    table.setdefault(name, dict())[sub_name or None] = entry
+                else:
+                    table[name] = entry
+        cls._command_tables[(cls, server_type)] = (len(SUPPORTED_COMMANDS), table)
+        return table
+
+    def _lookup_command(self, fields: List[bytes]) -> Tuple[Optional[Callable[..., Any]], Signature, List[bytes]]:
+        """Get the method, the signature and the arguments of the command in `fields`."""
+        entry = self._command_table.get(fields[0])
+        cmd_arguments = fields[1:]
+        if entry.__class__ is dict:  # Command with sub-commands
+            if len(fields) >= 2:
+                entry = entry.get(fields[1])
+                cmd_arguments = fields[2:]
+            else:
+                entry = entry.get(None)
+        if entry is None:  # Unusual case of the command name, or unsupported command
+            cmd, cmd_arguments = _extract_command(fields)
+            func, sig = self._name_to_func(cmd)
+            return func, sig, cmd_arguments
+        func, sig = entry
+        return (func.__get__(self) if func is not None else None), sig, cmd_arguments
 
     def _process_command(self, fields: List[bytes]) -> None:
-        if not fields:
-            return
-        result: Any
-        cmd, cmd_arguments = _extract_command(fields)
+        self._process_commands([fields])
+
+    def _process_commands(self, batch: List[List[bytes]]) -> int:
+        """Run a batch of commands, and deliver their responses together.
+
+        Consecutive commands against the same database run under a single acquisition of its lock, and the
+        server clock is set, and a bounded number of expired keys removed, once per acquisition. Processing stops
+        early when a blocking command pauses the socket.
+
+        Returns the number of commands processed.
+        """
+        results: List[Any] = []
+        locked: Optional[Database] = None  # Database whose lock is held
+        count = 0
         try:
-            func, sig = self._name_to_func(cmd)
-            self._server.acl.validate_command(self.current_user, self.client_info, fields)  # ACL check
-            with self._server.lock:
-                # Clean out old connections
-                while True:
-                    try:
-                        weak_sock = self._server.closed_sockets.pop()
-                    except IndexError:
-                        break
+            for fields in batch:
+                if self._paused:
+                    break
+                count += 1
+                if not fields:
+                    continue
+                result: Any
+                sig: Optional[Signature] = None
+                try:
+                    func, sig, cmd_arguments = self._lookup_command(fields)
+                    self._server.acl.validate_command(self.current_user, self.client_info, fields)  # ACL check
+                    # Closed sockets are cleaned up, and keys evicted, from every database, which needs the whole
+                    # server locked. The command itself runs afterwards, so that a blocking command does not wait
+                    # with all the locks held.
+                    maxmemory = self._server.maxmemory
+                    evict = bool(maxmemory) and sig.deny_oom and self._server.may_exceed_maxmemory(maxmemory)
+                    if self._server.closed_sockets or evict:
+                        if locked is not None:
+                            locked.lock.release()
+                            locked = None
+                        with self._server.lock_all():
+                            self._cleanup_closed_sockets()
+                            if evict:
+                                self._server.clock.time = time.time()
+                                self._server.evict()
+                    if self._transaction is not None and msgs.FLAG_TRANSACTION not in sig.flags:
+                        dbs: Optional[List[Database]] = [self._db]  # The command is only queued
                     else:
-                        sock = weak_sock()
-                        if sock:
-                            sock._cleanup(self._server)
-                now = time.time()
-                for db in self._server.dbs.values():
-                    db.time = now
-                sig.check_arity(cmd_arguments, self.version)
-                if self._transaction is not None and msgs.FLAG_TRANSACTION not in sig.flags:
-                    self._transaction.append((func, sig, cmd_arguments))
-                    result = QUEUED
-                else:
-                    result = self._run_command(func, sig, cmd_arguments, False)
-        except SimpleError as exc:
-            if self._transaction is not None:
-                # TODO: should not apply if the exception is from _run_command
-                # e.g. watch inside multi
-                self._transaction_failed = True
-            if cmd == "exec" and exc.value.startswith("ERR "):
-                exc.value = "EXECABORT Transaction discarded because of: " + exc.value[4:]
-                self._transaction = None
-                self._transaction_failed = False
-                self._clear_watches()
-            result = exc
-        result = self._decode_result(result)
-        if not isinstance(result, NoResponse):
-            self.put_response(result)
+                        dbs = self._command_databases(sig, cmd_arguments)
+                    if msgs.FLAG_SERVER_STATE in sig.flags:
+                        # Pub/sub commands send responses directly, they must come after the earlier ones
+                        self.put_responses(results)
+                        results = []
+                    if dbs is None or len(dbs) > 1:
+                        if locked is not None:
+                            locked.lock.release()
+                            locked = None
+                        with self._server.lock_all() if dbs is None else self._server.lock_databases(dbs):
+                            self._server.clock.time = time.time()
+                            self._db.expire_keys(self._db.ACTIVE_EXPIRE_CYCLE_KEYS)
+                            result = self._execute_command(func, sig, cmd_arguments)
+                    else:
+                        if locked is not self._db:
+                            if locked is not None:
+                                locked.lock.release()
+                            locked = self._db
+                            locked.lock.acquire()
+                            self._server.clock.time = time.time()
+                            locked.expire_keys(locked.ACTIVE_EXPIRE_CYCLE_KEYS)
+                        result = self._execute_command(func, sig, cmd_arguments)
+                except SimpleError as exc:
+                    if self._transaction is not None:
+                        # TODO: should not apply if the exception is from _run_command
+                        # e.g. watch inside multi
+                        self._transaction_failed = True
+                    if sig is not None and sig.name == "exec" and exc.value.startswith("ERR "):
+                        exc.value = "EXECABORT Transaction discarded because of: " + exc.value[4:]
+                        self._transaction = None
+                        self._transaction_failed = False
+                        self._clear_watches()
+                    result = exc
+                result = self._decode_result(result)
+                if not isinstance(result, NoResponse):
+                    results.append(result)
+        finally:
+            if locked is not None:
+                locked.lock.release()
+        self.put_responses(results)
+        return count
+
+    def _command_databases(self, sig: Signature, args: List[bytes]) -> Optional[List[Database]]:
+        """Databases whose lock a command needs, or None when it needs the whole server locked.
+
+        Most commands only need the database they run against. Ending a transaction also needs the databases of
+        the watched keys, and running it or a script needs the whole server when it may switch databases or run a
+        server-wide command.
+        """
+        if msgs.FLAG_SERVER_WIDE in sig.flags:
+            return None
+        if sig.name in ("exec", "discard", "unwatch"):
+            if sig.name == "exec" and self._transaction is not None:
+                for _, queued_sig, queued_args in self._transaction:
+                    if queued_sig.name == "select" or self._command_databases(queued_sig, queued_args) is None:
+                        return None
+            return [self._db] + [db for _, db in self._watches]
+        if sig.name in ("eval", "evalsha"):
+            return self._script_databases(sig.name, args)
+        return [self._db]
+
+    def _execute_command(self, func: Optional[Callable[..., Any]], sig: Signature, cmd_arguments: List[bytes]) -> Any:
+        """Run a command, or queue it when in a transaction. This is called with the needed locks held."""
+        sig.check_arity(cmd_arguments, self.version)
+        if self._transaction is not None and msgs.FLAG_TRANSACTION not in sig.flags:
+            self._transaction.append((func, sig, cmd_arguments))
+            return QUEUED
+        return self._run_command(func, sig, cmd_arguments, False)
 
     def _run_command(
         self, func: Optional[Callable[[Any], Any]], sig: Signature, args: List[Any], from_script: bool
@@ -252,8 +413,13 @@ class BaseFakeSocket:
                 result = ret[0]
             else:
                 args, command_items = ret
-                result = func(*args)  # type: ignore
-                assert valid_response_type(result)
+                if msgs.FLAG_SERVER_STATE in sig.flags:
+                    with self._server.state_lock:
+                        result = func(*args)  # type: ignore
+                else:
+                    result = func(*args)  # type: ignore
+                if self._server.validate_responses:
+                    assert valid_response_type(result), f"Invalid response to {sig.name}: {result!r}"
         except SimpleError as exc:
             result = exc
         for command_item in command_items:
@@ -264,9 +430,25 @@ class BaseFakeSocket:
         return DefaultParser(socket_read_size=65536).parse_error(error.value)  # type: ignore
 
     def _decode_result(self, result: Any) -> Any:
-        """Convert SimpleString and SimpleError, recursively"""
+        """Convert SimpleString and SimpleError, recursively.
+
+        Plain values are returned as they are, and a list is only copied when it holds values to convert.
+        """
+        if result.__class__ in _PLAIN_RESPONSE_TYPES:
+            return result
         if isinstance(result, list):
-            return [self._decode_result(r) for r in result]
+            decoded = None
+            for i, item in enumerate(result):
+                if item.__class__ in _PLAIN_RESPONSE_TYPES:
+                    continue
+                decoded_item = self._decode_result(item)
+                if decoded_item is not item:
+                    if decoded is None:
+                        decoded = list(result)
+                    decoded[i] = decoded_item
+            if decoded is None:
+                return result if result.__class__ is list else list(result)
+            return decoded
         elif isinstance(result, SimpleString):
             return result.value
         elif isinstance(result, SimpleError):
@@ -295,6 +477,8 @@ class BaseFakeSocket:
                 return None
             if self._db.condition.wait(timeout=timeout) is False:
                 return None  # Timeout expired
+            # Keys may have expired while waiting
+            self._server.clock.time = time.time()
             ret = func(False)  # Second pass => first_pass=False
             if ret is not None:
                 return ret
@@ -313,9 +497,21 @@ class BaseFakeSocket:
         func = getattr(self, sig.func_name, None)
         return func, sig
 
-    def sendall(self, data: AnyStr) -> None:
+    def sendall(self, data: Union[AnyStr, List[bytes]]) -> None:
+        """Feed data to the socket.
+
+        `data` is either redis protocol data, which is parsed into commands, or a list of `bytes` fields
+        making up a single command, or a list of such commands, which are processed directly without going
+        through the parser.
+        """
         if not self._server.connected:
             raise self._connection_error_class(msgs.CONNECTION_ERROR_MSG)
+        if isinstance(data, list):
+            if data and isinstance(data[0], list):
+                self._process_commands(data)
+            else:
+                self._process_command(data)
+            return
         if isinstance(data, str):
             data = data.encode("ascii")  # type: ignore
         self._parser.send(data)
@@ -323,8 +519,9 @@ class BaseFakeSocket:
     def _scan(self, keys, cursor, *args):
         """This is the basis of most of the ``scan`` methods.
 
-        This implementation is KNOWN to be un-performant, as it requires grabbing the full set of keys over which
-        we are investigating subsets.
+        `keys` is the collection to scan, which supports `in` and has a `scan` method giving about `count` keys from a
+        cursor and the next cursor. The cursor is the position in an index of the keys in buckets, which is kept by the
+        collection, see `ScanIndex`, so each call only looks at about `count` keys and needs no other state.
 
         The SCAN command, and the other commands in the SCAN family, are able to provide to the user a set of
         guarantees associated with full iterations.
@@ -352,33 +549,19 @@ class BaseFakeSocket:
         cursor = int(cursor)
         (pattern, _type, count), _ = extract_args(args, ("*match", "*type", "+count"))
         count = 10 if count is None else count
-        data = sorted(keys)
-        bits_len = (len(keys) - 1).bit_length()
-        cursor = bin_reverse(cursor, bits_len)
-        if cursor >= len(keys):
-            return [0, []]
-        result_cursor = cursor + count
-        result_data = []
+        result_cursor, scanned = keys.scan(cursor, count)
 
         regex = compile_pattern(pattern) if pattern is not None else None
-
-        def match_key(key: bytes) -> Union[bool, Match[bytes], None]:
-            return regex.match(key) if regex is not None else True
-
-        def match_type(key) -> bool:
-            return _type is None or casematch(BaseFakeSocket._key_value_type(self._db[key]).value, _type)
-
-        if pattern is not None or _type is not None:
-            for val in itertools.islice(data, cursor, cursor + count):
-                compare_val = val[0] if isinstance(val, tuple) else val
-                if match_key(compare_val) and match_type(compare_val):
-                    result_data.append(val)
-        else:
-            result_data = data[cursor : cursor + count]
-
-        if result_cursor >= len(data):
-            result_cursor = 0
-        return [str(bin_reverse(result_cursor, bits_len)).encode(), result_data]
+        result_data = []
+        for key in scanned:
+            if key not in keys:
+                continue
+            if regex is not None and not regex.match(key):
+                continue
+            if _type is not None and not casematch(BaseFakeSocket._key_value_type(self._db[key]).value, _type):
+                continue
+            result_data.append(key)
+        return [str(result_cursor).encode(), result_data]
 
     def _ttl(self, key: CommandItem, scale: float) -> int:
         if not key:
@@ -402,9 +585,9 @@ class BaseFakeSocket:
     def _key_value_type(key: CommandItem) -> SimpleString:
         if key.value is None:
             return SimpleString(b"none")
-        elif isinstance(key.value, bytes):
+        elif isinstance(key.value, (bytes, bytearray)):
             return SimpleString(b"string")
-        elif isinstance(key.value, list):
+        elif isinstance(key.value, QuickList):
             return SimpleString(b"list")
         elif isinstance(key.value, ExpiringMembersSet):
             return SimpleString(b"set")
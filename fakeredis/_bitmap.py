@@ -0,0 +1,91 @@
+"""Bitmap kernels working on whole string values.
+
+Bits are numbered like in redis: bit 0 is the most significant bit of the first byte. Ranges of bits are half-open,
+`[start, end)`, and must lie within the value.
+"""
+
+import functools
+import operator
+import re
+from typing import Callable, Dict, List, Sequence, Union
+
+Buffer = Union[bytes, bytearray]
+
+# Number of set bits of each byte
+POPCOUNT_TABLE: List[int] = [bin(i).count("1") for i in range(256)]
+# Position of the first (most significant) set bit of each byte, 8 for the zero byte
+FIRST_SET_TABLE: List[int] = [8 - i.bit_length() for i in range(256)]
+
+_NON_ZERO_BYTE = re.compile(b"[^\x00]")
+_NON_FULL_BYTE = re.compile(b"[^\xff]")
+
+BITOP_OPERATORS: Dict[bytes, Callable[[int, int], int]] = {
+    b"AND": operator.and_,
+    b"OR": operator.or_,
+    b"XOR": operator.xor,
+}
+
+if hasattr(int, "bit_count"):
+    popcount: Callable[[int], int] = int.bit_count
+else:  # Python < 3.10
+
+    def popcount(value: int) -> int:
+        return bin(value).count("1")
+
+
+def _head_mask(start: int) -> int:
+    """Mask of the bits of a byte from the bit `start` onwards."""
+    return 0xFF >> (start & 7)
+
+
+def _tail_mask(end: int) -> int:
+    """Mask of the bits of a byte before the bit `end`, for the byte holding the bit `end - 1`."""
+    return (0xFF << (7 - ((end - 1) & 7))) & 0xFF
+
+
+def count_bits(value: Buffer, start: int, end: int) -> int:
+    """Count the bits set in the bits range `[start, end)` of `value`."""
+    if start >= end:
+        return 0
+    first, last = start >> 3, (end - 1) >> 3
+    if first == last:
+        return POPCOUNT_TABLE[value[first] & _head_mask(start) & _tail_mask(end)]
+    count = POPCOUNT_TABLE[value[first] & _head_mask(start)] + POPCOUNT_TABLE[value[last] & _tail_mask(end)]
+    with memoryview(value) as view:
+        count += popcount(int.from_bytes(view[first + 1 : last], "big"))
+    return count
+
+
+def find_bit(value: Buffer, bit: int, start: int, end: int) -> int:
+    """Find the position of the first bit equal to `bit` in the bits range `[start, end)` of `value`, or -1.
+
+    Whole bytes are skipped using a regular expression, the first byte with a matching bit is then looked up in
+    `FIRST_SET_TABLE`.
+    """
+    if start >= end:
+        return -1
+    flip = 0 if bit else 0xFF
+    first, last = start >> 3, (end - 1) >> 3
+    if first == last:
+        found = (value[first] ^ flip) & _head_mask(start) & _tail_mask(end)
+        return (first << 3) + FIRST_SET_TABLE[found] if found else -1
+    found = (value[first] ^ flip) & _head_mask(start)
+    if found:
+        return (first << 3) + FIRST_SET_TABLE[found]
+    match = (_NON_ZERO_BYTE if bit else _NON_FULL_BYTE).search(value, first + 1, last)
+    if match is not None:
+        byte = match.start()
+        return (byte << 3) + FIRST_SET_TABLE[value[byte] ^ flip]
+    found = (value[last] ^ flip) & _tail_mask(end)
+    return (last << 3) + FIRST_SET_TABLE[found] if found else -1
+
+
+def bitop(op: Callable[[int, int], int], values: Sequence[Buffer]) -> bytes:
+    """Combine values bitwise, shorter values are padded with zero bytes to the length of the longest one."""
+    length = max(len(value) for value in values)
+    result = functools.reduce(op, (int.from_bytes(value, "big") << ((length - len(value)) << 3) for value in values))
+    return result.to_bytes(length, "big")
+
+
+def bitop_not(value: Buffer) -> bytes:
+    return (int.from_bytes(value, "big") ^ ((1 << (len(value) << 3)) - 1)).to_bytes(len(value), "big")
@@ -4,7 +4,9 @@ Unlike _helpers.py, here the methods should be used only in mixins.
 """
 
 import functools
+import itertools
 import math
+import random
 import re
 import sys
 import time
@@ -28,23 +30,70 @@ class Key:
         self.missing_return = missing_return
 
 
+# Logical clock ticking on every key access, orders the accesses for the LRU eviction policies
+_ACCESS_CLOCK = itertools.count()
+
+
 class Item:
-    """An item stored in the database"""
+    """An item stored in the database.
+
+    Besides the value and expiry time, it holds the estimated memory usage of the key and value, and the access
+    recency and frequency used by the eviction policies. The frequency is a logarithmic counter that decays with
+    time, as in redis.
+    """
+
+    __slots__ = ["value", "expireat", "size", "lru", "lfu", "lfu_time"]
 
-    __slots__ = ["value", "expireat"]
+    LFU_INIT_VAL = 5
+    LFU_MAX_VAL = 255
+    LFU_LOG_FACTOR = 10
+    # Seconds after which the frequency counter is decremented
+    LFU_DECAY_TIME = 60
 
     def __init__(self, value: Any) -> None:
         self.value = value
         self.expireat = None
+        self.size = 0
+        self.lru = next(_ACCESS_CLOCK)
+        self.lfu = Item.LFU_INIT_VAL
+        self.lfu_time: Optional[float] = None
+
+    def lfu_counter(self, now: float) -> int:
+        """Get the access frequency counter, decayed by the time elapsed since it was last updated."""
+        if self.lfu_time is None:
+            return self.lfu
+        periods = int((now - self.lfu_time) // Item.LFU_DECAY_TIME)
+        return max(self.lfu - periods, 0) if periods > 0 else self.lfu
+
+    def touch(self, now: float) -> None:
+        """Record an access to the item."""
+        self.lru = next(_ACCESS_CLOCK)
+        counter = self.lfu_counter(now)
+        if counter < Item.LFU_MAX_VAL:
+            base = max(counter - Item.LFU_INIT_VAL, 0)
+            if random.random() * (base * Item.LFU_LOG_FACTOR + 1) < 1:
+                counter += 1
+        self.lfu = counter
+        self.lfu_time = now
 
 
 class CommandItem:
     """An item referenced by a command.
 
     It wraps an Item but has extra fields to manage updates and notifications.
+
+    String values are stored either as bytes or, once a command modified them in place, as a bytearray. Unless
+    `mutable_string` is set, a bytearray value is copied to bytes so the command cannot see later modifications.
     """
 
-    def __init__(self, key: bytes, db: Database, item: Optional["CommandItem"] = None, default: Any = None) -> None:
+    def __init__(
+        self,
+        key: bytes,
+        db: Database,
+        item: Optional["CommandItem"] = None,
+        default: Any = None,
+        mutable_string: bool = False,
+    ) -> None:
         self._expireat: Optional[float]
         if item is None:
             self._value = default
@@ -52,6 +101,8 @@ class CommandItem:
         else:
             self._value = item.value
             self._expireat = item.expireat
+            if not mutable_string and type(self._value) is bytearray:
+                self._value = bytes(self._value)
         self.key = key
         self.db = db
         self._modified = False
@@ -90,19 +141,22 @@ class CommandItem:
     def writeback(self, remove_empty_val: bool = True) -> None:
         if self._modified:
             self.db.notify_watch(self.key)
-            if not isinstance(self.value, bytes) and (self.value is None or (not self.value and remove_empty_val)):
+            if not isinstance(self.value, (bytes, bytearray)) and (
+                self.value is None or (not self.value and remove_empty_val)
+            ):
                 self.db.pop(self.key, None)
                 return
             item = self.db.setdefault(self.key, Item(None))
             item.value = self.value
-            item.expireat = self.expireat
+            self.db.set_expireat(self.key, item, self.expireat)
+            self.db.update_memory_usage(self.key, item)
             return
 
         if self._expireat_modified and self.key in self.db:
-            self.db[self.key].expireat = self.expireat
+            self.db.set_expireat(self.key, self.db[self.key], self.expireat)
 
     def __bool__(self) -> bool:
-        return bool(self._value) or isinstance(self._value, bytes)
+        return bool(self._value) or isinstance(self._value, (bytes, bytearray))
 
     __nonzero__ = __bool__  # For Python 2
 
@@ -340,7 +394,45 @@ class StringTest(RedisType):
     #     return ScoreTest(val, self.exclusive)
 
 
+def _default_factory(type_: Type[Any]) -> Callable[[Dict[bytes, bytes]], Any]:
+    """Get the function creating the value of a missing key, given the server configuration.
+
+    Types with compact encodings for small values take the configuration holding their `ENCODING_LIMITS`.
+    """
+    if hasattr(type_, "ENCODING_LIMITS"):
+        return lambda config: type_(config=config)
+    return lambda config: type_()
+
+
+class _ArgsPlan:
+    """Precompiled steps to convert the arguments of a command with a given number of arguments.
+
+    - `first_pass` holds `(index, decode, missing_return)` steps in argument order: non-key arguments are
+      converted using `decode`, keys with `decode` set to None short-circuit with `missing_return` when missing.
+    - `keys` holds `(index, type_, default_factory)` steps used to read keys and check their types.
+    """
+
+    __slots__ = ["first_pass", "keys"]
+
+    def __init__(self, types: Sequence[Any], flags: Set[str]) -> None:
+        self.first_pass: List[Tuple[int, Optional[Callable[[bytes], Any]], Any]] = []
+        self.keys: List[Tuple[int, Optional[Type[Any]], Optional[Callable[[Dict[bytes, bytes]], Any]]]] = []
+        for i, type_ in enumerate(types):
+            if isinstance(type_, Key):
+                if type_.missing_return is not Key.UNSPECIFIED:
+                    self.first_pass.append((i, None, type_.missing_return))
+                default_factory = None
+                if msgs.FLAG_DO_NOT_CREATE not in flags and type_.type_ is not None and type_.type_ is not bytes:
+                    default_factory = _default_factory(type_.type_)
+                self.keys.append((i, type_.type_, default_factory))
+            elif type_ is not bytes:
+                self.first_pass.append((i, type_.decode, None))
+
+
 class Signature:
+    # Maximum number of per-arity argument plans cached for commands with repeated arguments
+    MAX_CACHED_PLANS = 32
+
     def __init__(
         self,
         name: str,
@@ -362,6 +454,20 @@ class Signature:
         self.flags = set(flags)
         self.command_args = args
         self.server_types: Set[str] = set(server_types)
+        # Number of arguments => plan, only valid arities are present
+        self._plans: Dict[int, _ArgsPlan] = {len(fixed): _ArgsPlan(fixed, self.flags)}
+        self._deny_oom: Optional[bool] = None
+        self._mutable_string = msgs.FLAG_MUTABLE_STRING in self.flags
+
+    @property
+    def deny_oom(self) -> bool:
+        """Whether the command may use more memory, such commands are refused when `maxmemory` is reached."""
+        if self._deny_oom is None:
+            from fakeredis.model import get_command_info
+
+            info = get_command_info(self.name.encode())
+            self._deny_oom = info is not None and b"denyoom" in info[2]
+        return self._deny_oom
 
     def check_arity(self, args: Sequence[Any], version: Tuple[int, ...]) -> None:
         if len(args) == len(self.fixed):
@@ -374,6 +480,19 @@ class Signature:
             msg = msgs.WRONG_ARGS_MSG7 if version >= (7,) else msgs.WRONG_ARGS_MSG6.format(self.name)
             raise SimpleError(msg)
 
+    def _get_plan(self, args: Sequence[Any], version: Tuple[int, ...]) -> _ArgsPlan:
+        plan = self._plans.get(len(args))
+        if plan is not None:
+            return plan
+        self.check_arity(args, version)
+        types = list(self.fixed)
+        for i in range(len(args) - len(types)):
+            types.append(self.repeat[i % len(self.repeat)])
+        plan = _ArgsPlan(types, self.flags)
+        if len(self._plans) < self.MAX_CACHED_PLANS:
+            self._plans[len(args)] = plan
+        return plan
+
     def apply(
         self, args: Sequence[Any], db: Database, version: Tuple[int, ...]
     ) -> Union[Tuple[Any], Tuple[List[Any], List[CommandItem]]]:
@@ -381,40 +500,34 @@ class Signature:
         - transformed args and a dict of CommandItems; or
         - a single containing a short-circuit return value
         """
-        self.check_arity(args, version)
-
-        types = list(self.fixed)
-        for i in range(len(args) - len(types)):
-            types.append(self.repeat[i % len(self.repeat)])
-
+        plan = self._get_plan(args, version)
         args_list = list(args)
         # First pass: convert/validate non-keys, and short-circuit on missing keys
-        for i, (arg, type_) in enumerate(zip(args_list, types)):
-            if isinstance(type_, Key):
-                if type_.missing_return is not Key.UNSPECIFIED and arg not in db:
-                    return (type_.missing_return,)
-            elif type_ is not bytes:
-                args_list[i] = type_.decode(
-                    args_list[i],
-                )
+        for i, decode, missing_return in plan.first_pass:
+            if decode is not None:
+                args_list[i] = decode(args_list[i])
+            elif args_list[i] not in db:
+                return (missing_return,)
 
         # Second pass: read keys and check their types
         command_items: List[CommandItem] = []
-        for i, (arg, type_) in enumerate(zip(args_list, types)):
-            if isinstance(type_, Key):
-                item = db.get(arg)
+        for i, type_, default_factory in plan.keys:
+            arg = args_list[i]
+            item = db.get(arg)
+            if item is None:
+                default = default_factory(db.config) if default_factory is not None else None
+            elif (
+                type_ is not None
+                and type(item.value) is not type_
+                and not (type_ is bytes and type(item.value) is bytearray)
+            ):
+                raise SimpleError(msgs.WRONGTYPE_MSG)
+            else:
+                if db.evicts_keys:
+                    item.touch(db.time)
                 default = None
-                if type_.type_ is not None and item is not None and type(item.value) is not type_.type_:
-                    raise SimpleError(msgs.WRONGTYPE_MSG)
-                if (
-                    msgs.FLAG_DO_NOT_CREATE not in self.flags
-                    and type_.type_ is not None
-                    and item is None
-                    and type_.type_ is not bytes
-                ):
-                    default = type_.type_()
-                args_list[i] = CommandItem(arg, db, item, default=default)
-                command_items.append(args_list[i])
+            args_list[i] = CommandItem(arg, db, item, default=default, mutable_string=self._mutable_string)
+            command_items.append(args_list[i])
 
         return args_list, command_items
 
@@ -3,7 +3,7 @@ import queue
 import sys
 import uuid
 import warnings
-from typing import Tuple, Any, List, Optional, Set
+from typing import Tuple, Any, Callable, List, Optional, Set, Iterable
 
 from ._server import FakeBaseConnectionMixin, FakeServer, VersionType
 
@@ -113,6 +113,42 @@ class FakeConnection(FakeBaseConnectionMixin, redis.Connection):
         return self.server_key
 
 
+class _FieldsPacker:
+    """Packs a command into the list of its fields, which a fake socket runs without parsing redis protocol data."""
+
+    def __init__(self, encode: Callable[[Any], Any]) -> None:
+        self.encode = encode
+
+    def pack(self, *args: Any) -> List[List[bytes]]:
+        # Like redis-py's packer, split literal arguments included in the command name, e.g., 'CONFIG GET'
+        if isinstance(args[0], str):
+            args = tuple(args[0].encode().split()) + args[1:]
+        elif b" " in args[0]:
+            args = tuple(args[0].split()) + args[1:]
+        fields = [self.encode(arg) for arg in args]
+        return [[bytes(field) if isinstance(field, memoryview) else field for field in fields]]
+
+
+class DirectFakeConnection(FakeConnection):
+    """A connection handing commands to the fake socket as lists of fields, instead of packing them into redis
+    protocol data which the socket parses back.
+
+    Responses are still delivered as they are with a `FakeConnection`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Used by `send_command` of redis-py>=5
+        self._command_packer: _FieldsPacker = _FieldsPacker(self.encoder.encode)
+
+    def pack_command(self, *args: Any) -> List[Any]:
+        return self._command_packer.pack(*args)
+
+    def pack_commands(self, commands: Iterable[Tuple[Any, ...]]) -> List[Any]:
+        # A single item holding all the commands, so they are sent to the socket, and run, as one batch
+        return [[self._command_packer.pack(*args)[0] for args in commands]]
+
+
 class FakeRedisMixin:
     def __init__(
         self,
@@ -121,6 +157,7 @@ class FakeRedisMixin:
         version: VersionType = (7,),
         server_type: str = "redis",
         lua_modules: Optional[Set[str]] = None,
+        direct_dispatch: bool = False,
         **kwargs: Any,
     ) -> None:
         # Interpret the positional and keyword arguments according to the
@@ -163,7 +200,7 @@ class FakeRedisMixin:
                 "server",
             }
             connection_kwargs = {
-                "connection_class": FakeConnection,
+                "connection_class": DirectFakeConnection if direct_dispatch else FakeConnection,
                 "version": version,
                 "server_type": server_type,
                 "lua_modules": lua_modules,
@@ -175,6 +212,7 @@ class FakeRedisMixin:
         kwds.pop("version", None)
         kwds.pop("server_type", None)
         kwds.pop("lua_modules", None)
+        kwds.pop("direct_dispatch", None)
         super().__init__(**kwds)
 
     @classmethod
@@ -6,6 +6,7 @@ from fakeredis.commands_mixins import (
     GenericCommandsMixin,
     GeoCommandsMixin,
     HashCommandsMixin,
+    HyperLogLogCommandsMixin,
     ListCommandsMixin,
     PubSubCommandsMixin,
     ScriptingCommandsMixin,
@@ -43,6 +44,7 @@ class FakeSocket(
     TransactionsCommandsMixin,
     PubSubCommandsMixin,
     SetCommandsMixin,
+    HyperLogLogCommandsMixin,
     BitmapCommandsMixin,
     SortedSetCommandsMixin,
     StreamsCommandsMixin,
@@ -1,10 +1,18 @@
+import functools
+import heapq
+import itertools
+import queue
+import random
 import re
+import sys
 import threading
 import time
 import weakref
 from collections import defaultdict
 from collections.abc import MutableMapping
-from typing import Any, Set, Callable, Dict, Optional, Iterator
+from typing import Any, Set, Callable, Dict, Optional, Iterator, Iterable, List, Tuple
+
+from sortedcontainers import SortedList
 
 
 class SimpleString:
@@ -126,18 +134,222 @@ def compile_pattern(pattern_bytes: bytes) -> re.Pattern:  # type: ignore
     return re.compile(regex, flags=re.S)
 
 
+def glob_prefix(pattern: bytes) -> bytes:
+    """Get the literal prefix of a glob pattern, which all the keys matching it start with."""
+    prefix = bytearray()
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c in b"?*[":
+            break
+        if c == ord("\\") and i + 1 < len(pattern):
+            i += 1
+            c = pattern[i]
+        prefix.append(c)
+        i += 1
+    return bytes(prefix)
+
+
+# Memory units accepted in configuration values, as in redis.conf
+_MEMORY_UNITS = {b"": 1, b"b": 1, b"k": 1000, b"kb": 1024, b"m": 1000**2, b"mb": 1024**2, b"g": 1000**3, b"gb": 1024**3}
+_MEMORY_VALUE_RE = re.compile(rb"^(\d+)([a-z]*)$")
+
+
+@functools.lru_cache(maxsize=32)
+def parse_memory(value: bytes) -> int:
+    """Parse a memory size such as `100mb`, raises ValueError if it is not valid."""
+    match = _MEMORY_VALUE_RE.match(value.lower())
+    if match is None or match.group(2) not in _MEMORY_UNITS:
+        raise ValueError(value)
+    return int(match.group(1)) * _MEMORY_UNITS[match.group(2)]
+
+
+def config_maxmemory(config: Dict[bytes, bytes]) -> int:
+    """Get the limit of the memory used from a server configuration, in bytes, or 0 for no limit."""
+    value = config.get(b"maxmemory")
+    return parse_memory(value) if value else 0
+
+
+# Approximate allocation overheads of redis, in bytes: of a key with its value object, and of an element of a
+# collection
+_KEY_OVERHEAD = 50
+_ELEMENT_OVERHEAD = 16
+MEMORY_USAGE_SAMPLES = 5
+
+
+def _element_size(element: Any) -> int:
+    if isinstance(element, (bytes, bytearray)):
+        return len(element)
+    if isinstance(element, (int, float)):
+        return 8
+    if isinstance(element, (tuple, list)):
+        return sum(_element_size(e) for e in element)
+    return sys.getsizeof(element)
+
+
+def estimate_memory_usage(key: bytes, value: Any, samples: int = MEMORY_USAGE_SAMPLES) -> int:
+    """Estimate the memory used by a key and its value, in bytes.
+
+    Like redis, only `samples` elements of a collection are measured and the size of the others is extrapolated.
+    If `samples` is 0, all the elements are measured.
+    """
+    size = _KEY_OVERHEAD + len(key)
+    if isinstance(value, (bytes, bytearray)):
+        return size + len(value)
+    try:
+        length = len(value)
+        elements = iter(value.items() if hasattr(value, "items") else value)
+    except TypeError:
+        return size + sys.getsizeof(value)
+    sampled = [_element_size(element) for element in itertools.islice(elements, samples or None)]
+    if not sampled:
+        return size
+    return size + length * _ELEMENT_OVERHEAD + sum(sampled) * length // len(sampled)
+
+
+def _reverse_bits(value: int, bits: int) -> int:
+    """Reverse the order of the lowest `bits` bits of `value`."""
+    return int(format(value, "0%db" % bits)[::-1], 2)
+
+
+class ScanIndex:
+    """Keys of a collection spread in buckets by hash, for the cursors of the SCAN family, like `dictScan` of redis.
+
+    A cursor is the index of the next bucket to visit. Buckets are visited in the order of their index with its bits
+    reversed, so that when the number of buckets doubles, the two buckets the keys of a bucket are split into come
+    right after each other, and when it halves, the merged buckets are visited once. A cursor thus remains valid while
+    keys are added or removed: a key present for a whole iteration is returned, possibly more than once if the index
+    shrinks, and a call only needs the cursor and looks at about `count` keys.
+    """
+
+    __slots__ = ["_buckets", "_len"]
+
+    MIN_BUCKETS = 4
+
+    def __init__(self, keys: Iterable[bytes]) -> None:
+        self._buckets: List[List[bytes]] = [[] for _ in range(self.MIN_BUCKETS)]
+        self._len = 0
+        for key in keys:
+            self.add(key)
+
+    def add(self, key: bytes) -> None:
+        """Add `key`, if it is not in the index yet."""
+        bucket = self._buckets[hash(key) & (len(self._buckets) - 1)]
+        if key in bucket:
+            return
+        bucket.append(key)
+        self._len += 1
+        if self._len > len(self._buckets):
+            self._resize(2 * len(self._buckets))
+
+    def discard(self, key: bytes) -> None:
+        """Remove `key`, if it is in the index."""
+        bucket = self._buckets[hash(key) & (len(self._buckets) - 1)]
+        if key not in bucket:
+            return
+        bucket.remove(key)
+        self._len -= 1
+        if len(self._buckets) > self.MIN_BUCKETS and self._len < len(self._buckets) // 8:
+            self._resize(len(self._buckets) // 2)
+
+    def _resize(self, size: int) -> None:
+        buckets: List[List[bytes]] = [[] for _ in range(size)]
+        for bucket in self._buckets:
+            for key in bucket:
+                buckets[hash(key) & (size - 1)].append(key)
+        self._buckets = buckets
+
+    def scan(self, cursor: int, count: int) -> Tuple[int, List[bytes]]:
+        """Get the keys of the buckets from `cursor` on, until there are at least `count` of them.
+
+        Returns the cursor of the next bucket to visit, which is 0 once all the buckets have been visited, and the keys.
+        """
+        buckets = self._buckets
+        mask = len(buckets) - 1
+        bits = mask.bit_length()
+        cursor &= mask
+        keys: List[bytes] = []
+        # Like redis, bound the number of empty buckets visited by a call
+        empty_visits = count * 10
+        while True:
+            bucket = buckets[cursor]
+            if bucket:
+                keys.extend(bucket)
+            else:
+                empty_visits -= 1
+            cursor = _reverse_bits((_reverse_bits(cursor, bits) + 1) & mask, bits)
+            if cursor == 0 or len(keys) >= count or empty_visits <= 0:
+                return cursor, keys
+
+
+class Clock(threading.local):
+    """Time at which the current command started, shared by all the databases of a server.
+
+    It is set once per command, and again when a blocking command wakes up, and databases
+    read it when checking for expired keys.
+    The value is per thread, so commands running concurrently on different databases
+    each see their own start time.
+    """
+
+    def __init__(self) -> None:
+        self.time = 0.0
+
+
 class Database(MutableMapping):  # type: ignore
-    def __init__(self, lock: Optional[threading.Lock], *args: Any, **kwargs: Any) -> None:
+    # Maximum number of expired keys removed by the active expire cycle run before commands
+    ACTIVE_EXPIRE_CYCLE_KEYS = 20
+
+    def __init__(
+        self,
+        lock: Optional[threading.Lock],
+        *args: Any,
+        clock: Optional[Clock] = None,
+        config: Optional[Dict[bytes, bytes]] = None,
+        **kwargs: Any,
+    ) -> None:
         self._dict: Dict[bytes, Any] = dict(*args, **kwargs)
-        self.time = 0.0
+        # Configuration of the server, read when creating values
+        self.config: Dict[bytes, bytes] = config if config is not None else {}
+        # Heap of (expireat, key) for keys with an expiry time. Entries are not removed when a key is deleted or
+        # its expiry time changes, they are skipped when popped if they no longer match the stored item.
+        self._expires: List[Tuple[float, bytes]] = []
+        self._rebuild_expires()
+        # Ordered index of the keys, built by the first lookup by prefix and then maintained
+        self._key_index: Optional[SortedList] = None
+        # Keys and their position in the list, to pick random keys. Built by the first sampling and then maintained
+        self._key_list: Optional[List[bytes]] = None
+        self._key_positions: Dict[bytes, int] = {}
+        # Keys in buckets for the SCAN command. Built by the first scan and then maintained
+        self._scan_index: Optional[ScanIndex] = None
+        # Estimated memory used by the keys and values, sum of the `size` of the items. It is only maintained while
+        # `maxmemory` is set, otherwise it is marked as stale and computed again when needed.
+        self.used_memory = 0
+        self.memory_stale = bool(self._dict)
+        self._clock = clock if clock is not None else Clock()
+        # Held while a command runs against this database
+        self.lock = lock if lock is not None else threading.Lock()
         # key to the set of connections
         self._watches: Dict[bytes, weakref.WeakSet[Any]] = defaultdict(weakref.WeakSet)
-        self.condition = threading.Condition(lock)
+        self.condition = threading.Condition(self.lock)
         self._change_callbacks: Set[Callable[[], None]] = set()
 
+    @property
+    def time(self) -> float:
+        return self._clock.time
+
+    @time.setter
+    def time(self, value: float) -> None:
+        self._clock.time = value
+
     def swap(self, other: "Database") -> None:
         self._dict, other._dict = other._dict, self._dict
-        self.time, other.time = other.time, self.time
+        self._expires, other._expires = other._expires, self._expires
+        self._key_index, other._key_index = other._key_index, self._key_index
+        self._key_list, other._key_list = other._key_list, self._key_list
+        self._key_positions, other._key_positions = other._key_positions, self._key_positions
+        self._scan_index, other._scan_index = other._scan_index, self._scan_index
+        self.used_memory, other.used_memory = other.used_memory, self.used_memory
+        self.memory_stale, other.memory_stale = other.memory_stale, self.memory_stale
 
     def notify_watch(self, key: bytes) -> None:
         for sock in self._watches.get(key, set()):
@@ -165,28 +377,171 @@ class Database(MutableMapping):  # type: ignore
         for key in self:
             self.notify_watch(key)
         self._dict.clear()
+        self._expires = []
+        self._key_index = None
+        self._key_list = None
+        self._key_positions = {}
+        self._scan_index = None
+        self.used_memory = 0
+        self.memory_stale = False
 
     def expired(self, item: Any) -> bool:
         return item.expireat is not None and item.expireat < self.time
 
+    def set_expireat(self, key: bytes, item: Any, expireat: Optional[float]) -> None:
+        """Set the expiry time of `item`, stored at `key`."""
+        if expireat is not None and expireat != item.expireat:
+            self._push_expiry(expireat, key)
+        item.expireat = expireat
+
+    def _push_expiry(self, expireat: float, key: bytes) -> None:
+        heapq.heappush(self._expires, (expireat, key))
+        # Drop outdated entries once they outnumber the keys
+        if len(self._expires) > 2 * len(self._dict) + 64:
+            self._rebuild_expires()
+
+    def _rebuild_expires(self) -> None:
+        self._expires = [(item.expireat, key) for key, item in self._dict.items() if item.expireat is not None]
+        heapq.heapify(self._expires)
+
+    def expire_keys(self, limit: Optional[int] = None) -> None:
+        """Remove expired keys, in order of expiry time.
+
+        :param limit: Maximum number of entries of the expiry index to process, or None to remove all expired keys.
+        """
+        expires = self._expires
+        now = self.time
+        while expires and expires[0][0] < now:
+            if limit is not None:
+                if limit <= 0:
+                    return
+                limit -= 1
+            expireat, key = heapq.heappop(expires)
+            item = self._dict.get(key)
+            if item is not None and item.expireat == expireat:
+                self._remove_key(key)
+
     def _remove_expired(self) -> None:
-        for key in list(self._dict):
-            item = self._dict[key]
-            if self.expired(item):
-                del self._dict[key]
+        self.expire_keys()
+
+    def _remove_key(self, key: bytes) -> None:
+        item = self._dict.pop(key)
+        self.used_memory -= item.size
+        if self._key_index is not None:
+            self._key_index.discard(key)
+        if self._scan_index is not None:
+            self._scan_index.discard(key)
+        if self._key_list is not None:
+            # Move the last key to the position of the removed one
+            position = self._key_positions.pop(key)
+            last = self._key_list.pop()
+            if last != key:
+                self._key_list[position] = last
+                self._key_positions[last] = position
+
+    @property
+    def evicts_keys(self) -> bool:
+        """Whether keys may be evicted, which needs accesses to keys to be recorded."""
+        return bool(config_maxmemory(self.config)) and (
+            self.config.get(b"maxmemory-policy", b"noeviction").lower() != b"noeviction"
+        )
+
+    def update_memory_usage(self, key: bytes, item: Any) -> None:
+        """Update the estimated memory usage of `item`, stored at `key`, after its value changed.
+
+        The estimation is skipped while `maxmemory` is not set, the memory used is then stale.
+        """
+        if not config_maxmemory(self.config):
+            self.memory_stale = True
+            return
+        size = estimate_memory_usage(key, item.value)
+        self.used_memory += size - item.size
+        item.size = size
+
+    def refresh_memory_usage(self) -> None:
+        """Estimate again the memory used by all the keys, if it is stale."""
+        if not self.memory_stale:
+            return
+        self.used_memory = 0
+        for key, item in self._dict.items():
+            item.size = estimate_memory_usage(key, item.value)
+            self.used_memory += item.size
+        self.memory_stale = False
+
+    def sample_keys(self, count: int, volatile: bool = False) -> List[Tuple[bytes, Any]]:
+        """Pick up to `count` random keys with their items, possibly with repetitions.
+
+        :param volatile: Pick only keys with an expiry time.
+        """
+        if not self._dict:
+            return []
+        if volatile:
+            result = []
+            for attempt in range(2):
+                if not self._expires:
+                    break
+                for expireat, key in random.choices(self._expires, k=count):
+                    item = self._dict.get(key)
+                    if item is not None and item.expireat == expireat:
+                        result.append((key, item))
+                if result:
+                    break
+                # Only outdated entries of the expiry index were picked, drop them and try again
+                self._rebuild_expires()
+            return result
+        if self._key_list is None:
+            self._key_list = list(self._dict)
+            self._key_positions = {key: position for position, key in enumerate(self._key_list)}
+        return [(key, self._dict[key]) for key in random.choices(self._key_list, k=count)]
+
+    def keys_with_prefix(self, prefix: bytes) -> List[bytes]:
+        """Get the keys starting with `prefix`, in order."""
+        self._remove_expired()
+        if self._key_index is None:
+            self._key_index = SortedList(self._dict)
+        result = []
+        for key in self._key_index.irange(minimum=prefix):
+            if not key.startswith(prefix):
+                break
+            result.append(key)
+        return result
+
+    def scan(self, cursor: int, count: int) -> Tuple[int, List[bytes]]:
+        """Get about `count` keys from `cursor` on, and the next cursor, see `ScanIndex`."""
+        if self._scan_index is None:
+            self._scan_index = ScanIndex(self._dict)
+        return self._scan_index.scan(cursor, count)
 
     def __getitem__(self, key: bytes) -> Any:
         item = self._dict[key]
         if self.expired(item):
-            del self._dict[key]
+            self._remove_key(key)
             raise KeyError(key)
         return item
 
     def __setitem__(self, key: bytes, value: Any) -> None:
+        previous = self._dict.get(key)
+        if previous is None:
+            if self._key_index is not None:
+                self._key_index.add(key)
+            if self._scan_index is not None:
+                self._scan_index.add(key)
+            if self._key_list is not None:
+                self._key_positions[key] = len(self._key_list)
+                self._key_list.append(key)
+        else:
+            self.used_memory -= previous.size
+            previous.size = 0
         self._dict[key] = value
+        if value.lfu_time is None:
+            value.lfu_time = self.time
+        value.size = 0
+        self.update_memory_usage(key, value)
+        if value.expireat is not None:
+            self._push_expiry(value.expireat, key)
 
     def __delitem__(self, key: bytes) -> None:
-        del self._dict[key]
+        self._remove_key(key)
 
     def __iter__(self) -> Iterator[bytes]:
         self._remove_expired()
@@ -203,6 +558,28 @@ class Database(MutableMapping):  # type: ignore
         return super(object, self) == other
 
 
+class ResponseQueue(queue.Queue):  # type: ignore
+    """Queue of the responses of a socket, which can also receive a batch of responses at once."""
+
+    def put_many(self, items: List[Any]) -> None:
+        with self.not_full:
+            self.queue.extend(items)
+            self.unfinished_tasks += len(items)
+            self.not_empty.notify(len(items))
+
+    def wait_not_empty(self, timeout: Optional[float]) -> bool:
+        """Wait, up to `timeout` seconds, until the queue holds a response, without consuming it.
+
+        Returns whether the queue holds a response.
+        """
+        with self.not_empty:
+            if not self.not_empty.wait_for(self._qsize, timeout):
+                return False
+            # The wakeup might have been meant for a consumer blocked in `get`, pass it on
+            self.not_empty.notify()
+            return True
+
+
 def valid_response_type(value: Any, nested: bool = False) -> bool:
     if isinstance(value, NoResponse) and not nested:
         return True
@@ -219,21 +596,12 @@ class FakeSelector(object):
         self.sock = sock
 
     def check_can_read(self, timeout: Optional[float]) -> bool:
-        if self.sock.responses.qsize():
+        responses: ResponseQueue = self.sock.responses
+        if responses.qsize():
             return True
         if timeout is not None and timeout <= 0:
             return False
-
-        # A sleep/poll loop is easier to mock out than messing with condition
-        # variables.
-        start = time.time()
-        while True:
-            if self.sock.responses.qsize():
-                return True
-            time.sleep(0.01)
-            now = time.time()
-            if timeout is not None and now > start + timeout:
-                return False
+        return responses.wait_not_empty(timeout)
 
     @staticmethod
     def check_is_ready_for_command(_: Any) -> bool:
@@ -0,0 +1,130 @@
+"""Longest common subsequence of two strings, as computed by the LCS command.
+
+Redis fills a table `L(i, j)` holding the LCS length of the first `i` bytes of the first string and the first `j`
+bytes of the second string, then walks it back from `L(len1, len2)` to build the LCS and its matching ranges.
+
+The table is never materialized here. The row `L(., j)` is stored as an int with a bit per byte of the first string,
+the bit `i - 1` being clear when `L(i, j) = L(i - 1, j) + 1`, and the next row is computed with a few operations on
+whole ints (the bit-parallel algorithm of Hyyrö). While going forward, only the first row of each block of about
+`sqrt(len2)` rows is kept. Walking back visits rows in decreasing order, so the rows of a block are recomputed from its
+first row when the walk reaches it.
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+from fakeredis._bitmap import popcount
+
+
+def _match_masks(s1: bytes, chars: Iterable[int]) -> Dict[int, int]:
+    """For each byte in `chars`, get the int with the bit `i` set for each position `i` of the byte in `s1`."""
+    masks = {}
+    reversed_s1 = s1[::-1]
+    for char in chars:
+        table = bytearray(b"0" * 256)
+        table[char] = ord("1")
+        masks[char] = int(reversed_s1.translate(table) or b"0", 2)
+    return masks
+
+
+class _Rows:
+    """Rows of the LCS table, computed forward and then read in decreasing order."""
+
+    def __init__(self, s1: bytes, s2: bytes, keep_rows: bool = True) -> None:
+        self._s2 = s2
+        self._full = (1 << len(s1)) - 1
+        self._masks = _match_masks(s1, set(s2))
+        self._block = max(1, int(len(s2) ** 0.5)) if keep_rows else len(s2) + 1
+        self._checkpoints: List[int] = []
+        self._start = -1
+        self._rows: List[int] = []
+        row = self._full
+        for j, char in enumerate(s2):
+            if j % self._block == 0:
+                self._checkpoints.append(row)
+            row = self._next(row, char)
+        self.last = row
+
+    def _next(self, row: int, char: int) -> int:
+        mask = self._masks.get(char)
+        if mask is None:
+            return row
+        matched = row & mask
+        return ((row + matched) | (row - matched)) & self._full
+
+    def __getitem__(self, j: int) -> int:
+        if j == len(self._s2):
+            return self.last
+        start = j - j % self._block
+        if start != self._start:
+            self._start = start
+            row = self._checkpoints[j // self._block]
+            self._rows = [row]
+            for char in self._s2[start : min(start + self._block, len(self._s2)) - 1]:
+                row = self._next(row, char)
+                self._rows.append(row)
+        return self._rows[j - start]
+
+    def length(self, i: int, j: int) -> int:
+        """Get `L(i, j)`."""
+        return i - popcount(self[j] & ((1 << i) - 1))
+
+
+def lcs_length(s1: bytes, s2: bytes) -> int:
+    return len(s1) - popcount(_Rows(s1, s2, keep_rows=False).last)
+
+
+def find_lcs(s1: bytes, s2: bytes) -> Tuple[int, bytes, List[List[Any]]]:
+    """Get the length of the LCS, the LCS and the matching ranges as `[[start1, end1], [start2, end2], length]`.
+
+    The table is walked back like redis does, so that the same LCS and ranges are found.
+    """
+    rows = _Rows(s1, s2)
+    i, j = len(s1), len(s2)
+    length = rows.length(i, j)
+    result = bytearray(length)
+    matches: List[List[Any]] = []
+    if not length:
+        return 0, b"", matches
+
+    row, previous_row = rows[j], rows[j - 1]
+    current, previous = length, rows.length(i, j - 1)  # L(i, j) and L(i, j - 1)
+    start1 = end1 = start2 = end2 = -1
+    while i > 0 and j > 0:
+        emit = False
+        if s1[i - 1] == s2[j - 1]:
+            current -= 1
+            result[current] = s1[i - 1]
+            if start1 == -1:
+                start1 = end1 = i - 1
+                start2 = end2 = j - 1
+            elif start1 == i and start2 == j:
+                start1 -= 1
+                start2 -= 1
+            else:
+                emit = True
+            if start1 == 0 or start2 == 0:
+                emit = True
+            i -= 1
+            j -= 1
+            move_row = True
+        else:
+            left = current - 1 + ((row >> (i - 1)) & 1)  # L(i - 1, j)
+            if left > previous:
+                previous -= 1 - ((previous_row >> (i - 1)) & 1)
+                i -= 1
+                current = left
+                move_row = False
+            else:
+                j -= 1
+                current = previous
+                move_row = True
+            if start1 != -1:
+                emit = True
+        if move_row and j > 0:
+            row, previous_row = previous_row, rows[j - 1]
+            previous = rows.length(i, j - 1)
+        if emit:
+            matches.append([[start1, end1], [start2, end2], end1 - start1 + 1])
+            start1 = -1
+
+    return length, bytes(result), matches
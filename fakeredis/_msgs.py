@@ -1,5 +1,7 @@
 INVALID_EXPIRE_MSG = "ERR invalid expire time in {}"
 WRONGTYPE_MSG = "WRONGTYPE Operation against a key holding the wrong kind of value"
+INVALID_HYPERLOGLOG_MSG = "WRONGTYPE Key is not a valid HyperLogLog string value."
+CORRUPTED_HYPERLOGLOG_MSG = "INVALIDOBJ Corrupted HLL object detected"
 SYNTAX_ERROR_MSG = "ERR syntax error"
 SYNTAX_ERROR_LIMIT_ONLY_WITH_MSG = (
     "ERR syntax error, LIMIT is only supported in combination with either BYSCORE or BYLEX"
@@ -127,8 +129,14 @@ NO_PERMISSION_ERROR = "NOPERM User {} has no permissions to run the '{}' command
 NO_PERMISSION_KEY_ERROR = "NOPERM No permissions to access a key"
 NO_PERMISSION_CHANNEL_ERROR = "NOPERM No permissions to access a channel"
 
+OOM_MSG = "OOM command not allowed when used memory > 'maxmemory'."
+CONFIG_SET_FAILED_MSG = "ERR CONFIG SET failed (possibly related to argument '{}') - {}"
+
 # Command flags
 FLAG_NO_SCRIPT = "s"  # Command not allowed in scripts
 FLAG_LEAVE_EMPTY_VAL = "v"
 FLAG_TRANSACTION = "t"
 FLAG_DO_NOT_CREATE = "i"
+FLAG_SERVER_WIDE = "w"  # Command accesses several databases, see `FakeServer.lock_all`
+FLAG_SERVER_STATE = "g"  # Command accesses state shared by the databases, see `FakeServer.state_lock`
+FLAG_MUTABLE_STRING = "m"  # Command gets string values as stored, possibly a bytearray it may modify in place
@@ -1,9 +1,12 @@
+import heapq
 import logging
+import random
 import threading
 import time
 import weakref
 from collections import defaultdict
-from typing import Dict, Tuple, Any, List, Optional, Union
+from contextlib import contextmanager
+from typing import Dict, FrozenSet, Tuple, Any, List, Optional, Union, Iterator, Iterable
 
 try:
     from typing import Literal
@@ -11,11 +14,15 @@ except ImportError:
     from typing_extensions import Literal
 
 
+from fakeredis import _msgs as msgs
 from fakeredis.model import AccessControlList
-from fakeredis._helpers import Database, FakeSelector
+from fakeredis._helpers import Clock, Database, FakeSelector, SimpleError, config_maxmemory
 
 LOGGER = logging.getLogger("fakeredis")
 
+# Number of databases that can be selected with SELECT, MOVE, SWAPDB...
+NUM_DATABASES = 16
+
 VersionType = Union[Tuple[int, ...], int, str]
 
 ServerType = Literal["redis", "dragonfly", "valkey"]
@@ -40,24 +47,57 @@ def _version_to_str(v: VersionType) -> str:
 
 class FakeServer:
     _servers_map: Dict[str, "FakeServer"] = dict()
+    EVICTION_POLICIES = (
+        b"noeviction",
+        b"allkeys-lru",
+        b"allkeys-lfu",
+        b"allkeys-random",
+        b"volatile-lru",
+        b"volatile-lfu",
+        b"volatile-random",
+        b"volatile-ttl",
+    )
+    # Number of best eviction candidates kept from one sampling to the next
+    EVICTION_POOL_SIZE = 16
 
     def __init__(
         self,
         version: VersionType = (7,),
         server_type: ServerType = "redis",
         config: Dict[bytes, bytes] = None,
+        validate_responses: bool = False,
     ) -> None:
         """Initialize a new FakeServer instance.
         :param version: The version of the server (e.g. 6, 7.4, "7.4.1", can also be a tuple)
         :param server_type: The type of server (redis, dragonfly, valkey)
         :param config: A dictionary of configuration options.
+        :param validate_responses: Check the type of every command response, useful when developing commands.
 
         Configuration options:
         - `requirepass`: The password required to authenticate to the server.
         - `aclfile`: The path to the ACL file.
+        - `maxmemory`: Limit of the estimated memory used by keys, e.g. `100mb`. 0 (the default) for no limit.
+        - `maxmemory-policy`: How keys are evicted when `maxmemory` is reached, `noeviction` by default.
+        - `maxmemory-samples`: Number of keys sampled by each eviction, 5 by default.
+        - `hash-max-listpack-entries`, `hash-max-listpack-value`, `zset-max-listpack-entries`,
+          `zset-max-listpack-value`, `set-max-intset-entries`: Limits of the compact encodings of small values, with
+          the same defaults as redis.
         """
+        # Commands normally lock only the database they run against. Commands touching several databases take
+        # this lock and then the lock of every database, see `lock_all`.
         self.lock = threading.Lock()
-        self.dbs: Dict[int, Database] = defaultdict(lambda: Database(self.lock))
+        # Protects the state shared by the databases: pub/sub subscriptions, ACL, configuration and scripts. It is
+        # taken after the database locks, and no other lock is taken while holding it.
+        self.state_lock = threading.Lock()
+        # Time of the command being processed, set once per command and read by all databases
+        self.clock = Clock()
+        self.config: Dict[bytes, bytes] = config or dict()
+        self.dbs: Dict[int, Database] = defaultdict(
+            lambda: Database(threading.Lock(), clock=self.clock, config=self.config)
+        )
+        # Databases are created upfront, so that a server-wide command never creates one it has not locked
+        for index in range(NUM_DATABASES):
+            self.dbs[index]
         # Maps channel/pattern to a weak set of sockets
         self.subscribers: Dict[bytes, weakref.WeakSet[Any]] = defaultdict(weakref.WeakSet)
         self.psubscribers: Dict[bytes, weakref.WeakSet[Any]] = defaultdict(weakref.WeakSet)
@@ -70,8 +110,112 @@ class FakeServer:
         if server_type not in ("redis", "dragonfly", "valkey"):
             raise ValueError(f"Unsupported server type: {server_type}")
         self.server_type: str = server_type
-        self.config: Dict[bytes, bytes] = config or dict()
+        self.validate_responses = validate_responses
         self.acl: AccessControlList = AccessControlList()
+        self.evicted_keys = 0
+        # Best candidates for eviction: (db index, key) => (score, item), see `evict`
+        self._eviction_pool: Dict[Tuple[int, bytes], Tuple[Tuple[float, ...], Any]] = {}
+        # Scripts of all the connections, maps SHA1 to the script source
+        self.script_cache: Dict[bytes, bytes] = dict()
+        # Idle Lua runtimes of the scripting commands, by set of Lua modules loaded in them
+        self.lua_runtimes: Dict[FrozenSet[str], List[Any]] = defaultdict(list)
+
+    @contextmanager
+    def lock_all(self) -> Iterator[None]:
+        """Hold the server lock and the lock of every database, in index order."""
+        with self.lock:
+            dbs = [self.dbs[index] for index in sorted(self.dbs)]
+            for db in dbs:
+                db.lock.acquire()
+            try:
+                yield
+            finally:
+                for db in reversed(dbs):
+                    db.lock.release()
+
+    @contextmanager
+    def lock_databases(self, dbs: Iterable[Database]) -> Iterator[None]:
+        """Hold the lock of each database in `dbs`, in index order like `lock_all`."""
+        needed = {id(db) for db in dbs}
+        locked = [db for _, db in sorted(self.dbs.items()) if id(db) in needed]
+        for db in locked:
+            db.lock.acquire()
+        try:
+            yield
+        finally:
+            for db in reversed(locked):
+                db.lock.release()
+
+    @property
+    def maxmemory(self) -> int:
+        """Limit of the memory used, in bytes, or 0 for no limit."""
+        return config_maxmemory(self.config)
+
+    def used_memory(self) -> int:
+        """Estimated memory used by the keys of all databases, in bytes, called with all the databases locked."""
+        for db in self.dbs.values():
+            db.refresh_memory_usage()
+        return sum(db.used_memory for db in self.dbs.values())
+
+    def may_exceed_maxmemory(self, maxmemory: int) -> bool:
+        """Whether the memory used may exceed `maxmemory`, checked without locking the databases.
+
+        The memory used by a database is not known when it changed while `maxmemory` was not set, it may then exceed
+        `maxmemory` until `used_memory` estimates it again.
+        """
+        return any(db.memory_stale for db in self.dbs.values()) or (
+            sum(db.used_memory for db in self.dbs.values()) > maxmemory
+        )
+
+    def evict(self) -> None:
+        """Evict keys, following `maxmemory-policy`, until the memory used is within `maxmemory`.
+
+        Like redis, keys are sampled in every database and the best candidates are kept in a pool, from which the
+        key to evict is taken. This is called with all the databases locked, and raises an OOM error when no more
+        keys can be evicted.
+        """
+        maxmemory = self.maxmemory
+        policy = self.config.get(b"maxmemory-policy", b"noeviction").lower()
+        samples = int(self.config.get(b"maxmemory-samples", b"5"))
+        volatile = policy.startswith(b"volatile-")
+        now = self.clock.time
+
+        def score(item: Any) -> Tuple[float, ...]:
+            """Score of a key for eviction, the highest is evicted first"""
+            if policy.endswith(b"-random"):
+                return ()
+            if policy.endswith(b"-lfu"):
+                return -item.lfu_counter(now), -item.lru
+            if policy == b"volatile-ttl":
+                return (-item.expireat,)
+            return (-item.lru,)
+
+        pool = self._eviction_pool
+        while self.used_memory() > maxmemory:
+            if policy == b"noeviction":
+                raise SimpleError(msgs.OOM_MSG)
+            for index, db in self.dbs.items():
+                for key, item in db.sample_keys(samples, volatile):
+                    pool[(index, key)] = (score(item), item)
+            if not pool:
+                raise SimpleError(msgs.OOM_MSG)
+            if policy.endswith(b"-random"):
+                candidates = [random.choice(list(pool.items()))]
+                pool.clear()
+            else:
+                candidates = heapq.nlargest(self.EVICTION_POOL_SIZE, pool.items(), key=lambda entry: entry[1][0])
+                pool.clear()
+                pool.update(candidates[1:])
+            (index, key), (key_score, item) = candidates[0]
+            db = self.dbs[index]
+            if db.get(key) is not item:
+                continue  # The key was changed or deleted since it was sampled
+            if score(item) != key_score:
+                pool[(index, key)] = (score(item), item)  # The key was accessed since it was sampled
+                continue
+            db.notify_watch(key)
+            del db[key]
+            self.evicted_keys += 1
 
     @staticmethod
     def get_server(key: str, version: VersionType, server_type: ServerType) -> "FakeServer":
@@ -24,12 +24,39 @@ from . import _msgs as msgs
 from . import _server
 
 
+class AsyncResponseQueue(asyncio.Queue):  # type: ignore
+    """Queue of the responses of a socket, which can be waited on without consuming a response."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._not_empty = asyncio.Event()
+
+    def _put(self, item: Any) -> None:
+        super()._put(item)
+        self._not_empty.set()
+
+    def _get(self) -> Any:
+        item = super()._get()
+        if self.empty():
+            self._not_empty.clear()
+        return item
+
+    async def wait_not_empty(self, timeout: Optional[float]) -> bool:
+        """Wait, up to `timeout` seconds, until the queue holds a response. Returns whether it does."""
+        try:
+            async with async_timeout(timeout):
+                await self._not_empty.wait()
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
 class AsyncFakeSocket(_fakesocket.FakeSocket):
     _connection_error_class = redis_async.ConnectionError
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
-        self.responses: asyncio.Queue = asyncio.Queue()  # type:ignore
+        self.responses: AsyncResponseQueue = AsyncResponseQueue()  # type:ignore
 
     def _decode_error(self, error: SimpleError) -> ResponseError:
         parser = DefaultParser(1)
@@ -40,6 +67,12 @@ class AsyncFakeSocket(_fakesocket.FakeSocket):
             return
         self.responses.put_nowait(msg)
 
+    def put_responses(self, msgs: List[Any]) -> None:
+        if not self.responses:
+            return
+        for msg in msgs:
+            self.responses.put_nowait(msg)
+
     async def _async_blocking(
         self,
         timeout: Optional[Union[float, int]],
@@ -54,8 +87,8 @@ class AsyncFakeSocket(_fakesocket.FakeSocket):
                     await event.wait()
                     event.clear()
                     # This is a coroutine outside the normal control flow that
-                    # locks the server, so we have to take our own lock.
-                    with self._server.lock:
+                    # locks the database, so we have to take its lock ourselves.
+                    with self._db.lock:
                         ret = func(False)
                         if ret is not None:
                             result = self._decode_result(ret)
@@ -63,7 +96,7 @@ class AsyncFakeSocket(_fakesocket.FakeSocket):
         except asyncio.TimeoutError:
             pass
         finally:
-            with self._server.lock:
+            with self._db.lock:
                 self._db.remove_change_callback(callback)
             self.put_response(result)
             self.resume()
@@ -136,18 +169,7 @@ class FakeConnection(FakeBaseConnectionMixin, redis_async.Connection):
             await self.connect()
         if timeout == 0:
             return self._sock is not None and not self._sock.responses.empty()
-        # asyncio.Queue doesn't have a way to wait for the queue to be
-        # non-empty without consuming an item, so kludge it with a sleep/poll
-        # loop.
-        loop = asyncio.get_event_loop()
-        start = loop.time()
-        while True:
-            if self._sock and not self._sock.responses.empty():
-                return True
-            await asyncio.sleep(0.01)
-            now = loop.time()
-            if timeout is not None and now > start + timeout:
-                return False
+        return self._sock is not None and await self._sock.responses.wait_not_empty(timeout)
 
     def _decode(self, response: Any) -> Any:
         if isinstance(response, list):
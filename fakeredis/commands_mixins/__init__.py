@@ -6,6 +6,7 @@ from .connection_mixin import ConnectionCommandsMixin
 from .generic_mixin import GenericCommandsMixin
 from .geo_mixin import GeoCommandsMixin
 from .hash_mixin import HashCommandsMixin
+from .hyperloglog_mixin import HyperLogLogCommandsMixin
 from .list_mixin import ListCommandsMixin
 from .pubsub_mixin import PubSubCommandsMixin
 from .server_mixin import ServerCommandsMixin
@@ -30,6 +31,7 @@ __all__ = [
     "GenericCommandsMixin",
     "GeoCommandsMixin",
     "HashCommandsMixin",
+    "HyperLogLogCommandsMixin",
     "ListCommandsMixin",
     "PubSubCommandsMixin",
     "ScriptingCommandsMixin",
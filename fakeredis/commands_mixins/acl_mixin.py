@@ -3,10 +3,12 @@ from typing import Any, Tuple, List, Callable, Dict, Optional, Union
 
 from fakeredis import _msgs as msgs
 from fakeredis._commands import command, Int
-from fakeredis._helpers import SimpleError, OK, casematch, SimpleString
-from fakeredis.model import AccessControlList
+from fakeredis._helpers import SimpleError, OK, casematch, SimpleString, parse_memory
+from fakeredis.model import AccessControlList, ExpiringMembersSet, Hash, ZSet
 from fakeredis.model import get_categories, get_commands_by_category
 
+_ENCODING_LIMITS = set(ZSet.ENCODING_LIMITS + Hash.ENCODING_LIMITS + ExpiringMembersSet.ENCODING_LIMITS)
+
 
 class AclCommandsMixin:
     _get_command_info: Callable[[bytes], List[Any]]
@@ -77,15 +79,45 @@ class AclCommandsMixin:
             elif prefix == ord("&"):
                 user_acl.add_channel_pattern(arg[1:])
 
-    @command(name="CONFIG SET", fixed=(bytes, bytes), repeat=(bytes, bytes))
+    @command(name="CONFIG SET", fixed=(bytes, bytes), repeat=(bytes, bytes), flags=msgs.FLAG_SERVER_STATE)
     def config_set(self, *args: bytes):
         if len(args) % 2 != 0:
             raise SimpleError(msgs.WRONG_ARGS_MSG6.format("CONFIG SET"))
-        for i in range(0, len(args), 2):
-            self._server_config[args[i]] = args[i + 1]
+        params = [(args[i].lower(), args[i + 1]) for i in range(0, len(args), 2)]
+        for name, value in params:
+            self._check_config_value(name, value)
+        for name, value in params:
+            self._server_config[name] = value
         return OK
 
-    @command(name="AUTH", fixed=(), repeat=(bytes,))
+    def _check_config_value(self, name: bytes, value: bytes) -> None:
+        if name == b"maxmemory":
+            try:
+                parse_memory(value)
+            except ValueError:
+                raise SimpleError(msgs.CONFIG_SET_FAILED_MSG.format("maxmemory", "argument must be a memory value"))
+        elif name == b"maxmemory-policy":
+            if value.lower() not in self._server.EVICTION_POLICIES:
+                policies = ", ".join(policy.decode() for policy in self._server.EVICTION_POLICIES)
+                raise SimpleError(
+                    msgs.CONFIG_SET_FAILED_MSG.format(
+                        "maxmemory-policy", f"argument(s) must be one of the following: {policies}"
+                    )
+                )
+        elif name in _ENCODING_LIMITS:
+            if not value.isdigit():
+                raise SimpleError(
+                    msgs.CONFIG_SET_FAILED_MSG.format(name.decode(), "argument couldn't be parsed into an integer")
+                )
+        elif name == b"maxmemory-samples":
+            if not value.isdigit() or not 1 <= int(value) <= 64:
+                raise SimpleError(
+                    msgs.CONFIG_SET_FAILED_MSG.format(
+                        "maxmemory-samples", "argument must be between 1 and 64 inclusive"
+                    )
+                )
+
+    @command(name="AUTH", fixed=(), repeat=(bytes,), flags=msgs.FLAG_SERVER_STATE)
     def auth(self, *args: bytes) -> bytes:
         if not 1 <= len(args) <= 2:
             raise SimpleError(msgs.WRONG_ARGS_MSG6.format("AUTH"))
@@ -101,7 +133,7 @@ class AclCommandsMixin:
         self._acl.add_log_record(b"auth", b"auth", b"AUTH", username, self.client_info)
         raise SimpleError(msgs.AUTH_FAILURE)
 
-    @command(name="ACL CAT", fixed=(), repeat=(bytes,))
+    @command(name="ACL CAT", fixed=(), repeat=(bytes,), flags=msgs.FLAG_SERVER_STATE)
     def acl_cat(self, *category: bytes) -> List[bytes]:
         if len(category) == 0:
             res = get_categories()
@@ -110,42 +142,42 @@ class AclCommandsMixin:
             res = [cmd.replace(b" ", b"|") for cmd in res]
         return res
 
-    @command(name="ACL GENPASS", fixed=(), repeat=(bytes,))
+    @command(name="ACL GENPASS", fixed=(), repeat=(bytes,), flags=msgs.FLAG_SERVER_STATE)
     def acl_genpass(self, *args: bytes) -> bytes:
         bits = Int.decode(args[0]) if len(args) > 0 else 256
         bits = bits + bits % 4  # Round to 4
         nbytes: int = bits // 8
         return secrets.token_hex(nbytes).encode()
 
-    @command(name="ACL SETUSER", fixed=(bytes,), repeat=(bytes,))
+    @command(name="ACL SETUSER", fixed=(bytes,), repeat=(bytes,), flags=msgs.FLAG_SERVER_STATE)
     def acl_setuser(self, username: bytes, *args: bytes) -> bytes:
         self._set_user_acl(username, *args)
         return OK
 
-    @command(name="ACL LIST", fixed=(), repeat=())
+    @command(name="ACL LIST", fixed=(), repeat=(), flags=msgs.FLAG_SERVER_STATE)
     def acl_list(self) -> List[bytes]:
         return self._acl.as_rules()
 
-    @command(name="ACL DELUSER", fixed=(bytes,), repeat=())
+    @command(name="ACL DELUSER", fixed=(bytes,), repeat=(), flags=msgs.FLAG_SERVER_STATE)
     def acl_deluser(self, username: bytes) -> bytes:
         self._acl.del_user(username)
         return OK
 
-    @command(name="ACL GETUSER", fixed=(bytes,), repeat=())
+    @command(name="ACL GETUSER", fixed=(bytes,), repeat=(), flags=msgs.FLAG_SERVER_STATE)
     def acl_getuser(self, username: bytes) -> List[bytes]:
         res = self._acl.get_user_acl(username).as_array()
         return res
 
-    @command(name="ACL USERS", fixed=(), repeat=())
+    @command(name="ACL USERS", fixed=(), repeat=(), flags=msgs.FLAG_SERVER_STATE)
     def acl_users(self) -> List[bytes]:
         res = self._acl.get_users()
         return res
 
-    @command(name="ACL WHOAMI", fixed=(), repeat=())
+    @command(name="ACL WHOAMI", fixed=(), repeat=(), flags=msgs.FLAG_SERVER_STATE)
     def acl_whoami(self) -> bytes:
         return self._client_info.get("user", "").encode()
 
-    @command(name="ACL SAVE", fixed=(), repeat=())
+    @command(name="ACL SAVE", fixed=(), repeat=(), flags=msgs.FLAG_SERVER_STATE)
     def acl_save(self) -> SimpleString:
         if b"aclfile" not in self._server_config:
             raise SimpleError(msgs.MISSING_ACLFILE_CONFIG)
@@ -154,7 +186,7 @@ class AclCommandsMixin:
             f.write(b"\n".join(self._acl.as_rules()))
         return OK
 
-    @command(name="ACL LOAD", fixed=(), repeat=())
+    @command(name="ACL LOAD", fixed=(), repeat=(), flags=msgs.FLAG_SERVER_STATE)
     def acl_load(self) -> SimpleString:
         if b"aclfile" not in self._server_config:
             raise SimpleError(msgs.MISSING_ACLFILE_CONFIG)
@@ -179,7 +211,7 @@ class AclCommandsMixin:
                 self._set_user_acl(components[0], *components[1:])
         return OK
 
-    @command(name="ACL LOG", fixed=(), repeat=(bytes,))
+    @command(name="ACL LOG", fixed=(), repeat=(bytes,), flags=msgs.FLAG_SERVER_STATE)
     def acl_log(self, *args: bytes) -> Union[SimpleString, List[List[bytes]]]:
         if len(args) == 1 and casematch(args[0], b"RESET"):
             self._acl.reset_log()
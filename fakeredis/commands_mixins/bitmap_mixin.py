@@ -1,3 +1,4 @@
+import functools
 import re
 from typing import Tuple, Any, Callable, List, Optional
 
@@ -12,6 +13,7 @@ from fakeredis._commands import (
     fix_range,
     CommandItem,
 )
+from fakeredis._bitmap import BITOP_OPERATORS, bitop, bitop_not, count_bits, find_bit
 from fakeredis._helpers import SimpleError, casematch
 
 
@@ -37,11 +39,7 @@ class BitmapCommandsMixin:
         super().__init__(*args, **kwargs)
         self.version: Tuple[int]
 
-    @staticmethod
-    def _bytes_as_bin_string(value: bytes) -> str:
-        return "".join([bin(i).lstrip("0b").rjust(8, "0") for i in value])
-
-    @command((Key(bytes), Int), (bytes,), flags=msgs.FLAG_DO_NOT_CREATE)
+    @command((Key(bytes), Int), (bytes,), flags=msgs.FLAG_DO_NOT_CREATE + msgs.FLAG_MUTABLE_STRING)
     def bitpos(self, key: CommandItem, bit: int, *args: bytes) -> int:
         if bit != 0 and bit != 1:
             raise SimpleError(msgs.BIT_ARG_MUST_BE_ZERO_OR_ONE)
@@ -60,31 +58,34 @@ class BitmapCommandsMixin:
             return -1 if bit == 1 else 0
 
         start = 0 if len(args) == 0 else Int.decode(args[0])
-        source_value = self._bytes_as_bin_string(key.value) if bit_mode else key.value
-        end = len(source_value) if len(args) <= 1 else Int.decode(args[1])
-        length = len(source_value)
+        length = len(key.value) * 8 if bit_mode else len(key.value)
+        end = length if len(args) <= 1 else Int.decode(args[1])
         start, end = fix_range(start, end, length)
         if start == end == -1:
             return -1
-        source_value = source_value[start:end] if bit_mode else self._bytes_as_bin_string(source_value[start:end])
+        if not bit_mode:
+            start, end = start * 8, end * 8
 
-        result = source_value.find(str(bit))
-        if result != -1:
-            result += start if bit_mode else (start * 8)
-        elif bit == 0 and len(args) <= 1:
+        result = find_bit(key.value, bit, start, end)
+        if result == -1 and bit == 0 and len(args) <= 1:
             # Redis treats the value as padded with zero bytes to an infinity
             # if the user is looking for the first clear bit and no end is set.
             result = len(key.value) * 8
         return result
 
-    @command(name="BITCOUNT", fixed=(Key(bytes),), repeat=(bytes,), flags=msgs.FLAG_DO_NOT_CREATE)
+    @command(
+        name="BITCOUNT",
+        fixed=(Key(bytes),),
+        repeat=(bytes,),
+        flags=msgs.FLAG_DO_NOT_CREATE + msgs.FLAG_MUTABLE_STRING,
+    )
     def bitcount(self, key: CommandItem, *args: bytes) -> int:
         # Redis checks the argument count before decoding integers. That's why
         # we can't declare them as Int.
         if len(args) == 0:
             if key.value is None:
                 return 0
-            return bin(int.from_bytes(key.value, "little")).count("1")
+            return count_bits(key.value, 0, len(key.value) * 8)
 
         if not 2 <= len(args) <= 3:
             raise SimpleError(msgs.SYNTAX_ERROR_MSG)
@@ -106,16 +107,12 @@ class BitmapCommandsMixin:
         if key.value is None:
             return 0
         if bit_mode:
-            value = self._bytes_as_bin_string(key.value if key.value else b"")
-            start, end = fix_range_string(start, end, len(value))
-            res: int = value.count("1", start, end)
-            return res
+            start, end = fix_range_string(start, end, len(key.value) * 8)
+            return count_bits(key.value, start, end)
         start, end = fix_range_string(start, end, len(key.value))
-        value = key.value[start:end]
-
-        return bin(int.from_bytes(value, "little")).count("1")
+        return count_bits(key.value, start * 8, end * 8)
 
-    @command(fixed=(Key(bytes), BitOffset))
+    @command(fixed=(Key(bytes), BitOffset), flags=msgs.FLAG_MUTABLE_STRING)
     def getbit(self, key: CommandItem, offset: int) -> int:
         value = key.get(b"")
         byte = offset // 8
@@ -127,59 +124,45 @@ class BitmapCommandsMixin:
             return 0
         return 1 if (1 << actual_bitoffset) & actual_val else 0
 
-    @command((Key(bytes), BitOffset, BitValue))
+    @command((Key(bytes), BitOffset, BitValue), flags=msgs.FLAG_MUTABLE_STRING)
     def setbit(self, key: CommandItem, offset: int, value: int) -> int:
-        val = key.value if key.value is not None else b"\x00"
+        val = key.get(b"")
         byte = offset // 8
         remaining = offset % 8
         actual_bitoffset = 7 - remaining
-        if len(val) - 1 < byte:
-            # We need to expand val so that we can set the appropriate
-            # bit.
-            needed = byte - (len(val) - 1)
-            val += b"\x00" * needed
-        old_byte = val[byte]
+        old_byte = val[byte] if byte < len(val) else 0
         if value == 1:
             new_byte = old_byte | (1 << actual_bitoffset)
         else:
             new_byte = old_byte & ~(1 << actual_bitoffset)
         old_value = value if old_byte == new_byte else 1 - value
-        reconstructed = bytearray(val)
-        reconstructed[byte] = new_byte
-        if bytes(reconstructed) != key.value or (self.version == (6,) and old_byte != new_byte):
-            key.update(bytes(reconstructed))
+        if not key or byte >= len(val) or old_byte != new_byte:
+            # The value is modified in place, it is converted to a bytearray on the first modification.
+            buffer = val if type(val) is bytearray else bytearray(val)
+            if byte >= len(buffer):
+                # We need to expand the value so that we can set the appropriate bit.
+                buffer += bytes(byte + 1 - len(buffer))
+            buffer[byte] = new_byte
+            key.update(buffer)
         return old_value
 
-    @staticmethod
-    def _bitop(op: Callable[[Any, Any], Any], *keys: CommandItem) -> Any:
-        value = keys[0].value
-        ans = keys[0].value
-        i = 1
-        while i < len(keys):
-            value = keys[i].value if keys[i].value is not None else b""
-            ans = bytes(op(a, b) for a, b in zip(ans, value))
-            i += 1
-        return ans
-
-    @command((bytes, Key()), (Key(bytes),))
+    @command((bytes, Key()), (Key(bytes),), flags=msgs.FLAG_MUTABLE_STRING)
     def bitop(self, op_name: bytes, dst: CommandItem, *keys: CommandItem) -> int:
         if len(keys) == 0:
             raise SimpleError(msgs.WRONG_ARGS_MSG6.format("bitop"))
-        if casematch(op_name, b"and"):
-            res = self._bitop(lambda a, b: a & b, *keys)
-        elif casematch(op_name, b"or"):
-            res = self._bitop(lambda a, b: a | b, *keys)
-        elif casematch(op_name, b"xor"):
-            res = self._bitop(lambda a, b: a ^ b, *keys)
+        values = [key.get(b"") for key in keys]
+        op = BITOP_OPERATORS.get(op_name.upper())
+        if op is not None:
+            res = bitop(op, values)
         elif casematch(op_name, b"not"):
             if len(keys) != 1:
                 raise SimpleError(msgs.BITOP_NOT_ONE_KEY_ONLY)
-            val = keys[0].value
-            res = bytes([((1 << 8) - 1 - val[i]) for i in range(len(val))])
+            res = bitop_not(values[0])
         else:
             raise SimpleError(msgs.WRONG_ARGS_MSG6.format("bitop"))
-        dst.value = res
-        return len(dst.value)
+        # An empty result deletes the destination
+        dst.value = res if res else None
+        return len(res)
 
     def _bitfield_get(self, key: CommandItem, encoding: BitfieldEncoding, offset: int) -> int:
         ans = 0
@@ -230,10 +213,12 @@ class BitmapCommandsMixin:
             self.setbit(key, offset + i, bit)
         return new_value if value is None else ans
 
-    @command(fixed=(Key(bytes),), repeat=(bytes,))
+    @command(fixed=(Key(bytes),), repeat=(bytes,), flags=msgs.FLAG_MUTABLE_STRING)
     def bitfield(self, key: CommandItem, *args: bytes) -> List[Optional[int]]:
+        # All operations are parsed before any is executed: the value is modified in place, so a syntax error
+        # must not leave the operations before it applied.
         overflow = b"WRAP"
-        results: List[Optional[int]] = []
+        operations: List[Callable[[], Optional[int]]] = []
         i = 0
         while i < len(args):
             if casematch(args[i], b"overflow") and i + 1 < len(args):
@@ -242,31 +227,40 @@ class BitmapCommandsMixin:
                     raise SimpleError(msgs.INVALID_OVERFLOW_TYPE)
                 i += 2
             elif casematch(args[i], b"get") and i + 2 < len(args):
-                encoding = BitfieldEncoding(args[i + 1])
-                offset = BitOffset.decode(args[i + 2])
-                results.append(self._bitfield_get(key, encoding, offset))
+                operations.append(
+                    functools.partial(
+                        self._bitfield_get,
+                        key=key,
+                        encoding=BitfieldEncoding(args[i + 1]),
+                        offset=BitOffset.decode(args[i + 2]),
+                    )
+                )
                 i += 3
             elif casematch(args[i], b"set") and i + 3 < len(args):
-                old_value = self._bitfield_set(
-                    key=key,
-                    encoding=BitfieldEncoding(args[i + 1]),
-                    offset=BitOffset.decode(args[i + 2]),
-                    value=Int.decode(args[i + 3]),
-                    overflow=overflow,
+                operations.append(
+                    functools.partial(
+                        self._bitfield_set,
+                        key=key,
+                        encoding=BitfieldEncoding(args[i + 1]),
+                        offset=BitOffset.decode(args[i + 2]),
+                        value=Int.decode(args[i + 3]),
+                        overflow=overflow,
+                    )
                 )
-                results.append(old_value)
                 i += 4
             elif casematch(args[i], b"incrby") and i + 3 < len(args):
-                old_value = self._bitfield_set(
-                    key=key,
-                    encoding=BitfieldEncoding(args[i + 1]),
-                    offset=BitOffset.decode(args[i + 2]),
-                    incr=Int.decode(args[i + 3]),
-                    overflow=overflow,
+                operations.append(
+                    functools.partial(
+                        self._bitfield_set,
+                        key=key,
+                        encoding=BitfieldEncoding(args[i + 1]),
+                        offset=BitOffset.decode(args[i + 2]),
+                        incr=Int.decode(args[i + 3]),
+                        overflow=overflow,
+                    )
                 )
-                results.append(old_value)
                 i += 4
             else:
                 raise SimpleError(msgs.SYNTAX_ERROR_MSG)
 
-        return results
+        return [operation() for operation in operations]
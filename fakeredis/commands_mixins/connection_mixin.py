@@ -65,7 +65,7 @@ class ConnectionCommandsMixin:
     def client_info_cmd(self) -> bytes:
         return self.client_info
 
-    @command(name="HELLO", fixed=(), repeat=(bytes,))
+    @command(name="HELLO", fixed=(), repeat=(bytes,), flags=msgs.FLAG_SERVER_STATE)
     def hello(self, *args: bytes) -> List[bytes]:
         self._client_info["resp"] = 2 if len(args) == 0 else Int.decode(args[0])
         i = 1
@@ -15,8 +15,16 @@ from fakeredis._commands import (
     SortFloat,
     delete_keys,
 )
-from fakeredis._helpers import compile_pattern, SimpleError, OK, casematch, Database, SimpleString
-from fakeredis.model import ZSet, Hash, ExpiringMembersSet
+from fakeredis._helpers import compile_pattern, glob_prefix, SimpleError, OK, casematch, Database, SimpleString
+from fakeredis.model import ZSet, Hash, ExpiringMembersSet, QuickList, XStream
+
+
+def _is_int(value: bytes) -> bool:
+    try:
+        Int.decode(value)
+    except SimpleError:
+        return False
+    return True
 
 
 class GenericCommandsMixin:
@@ -124,9 +132,11 @@ class GenericCommandsMixin:
             return list(self._db)
         else:
             regex = compile_pattern(pattern)
-            return [key for key in self._db if regex.match(key)]
+            prefix = glob_prefix(pattern)
+            candidates = self._db.keys_with_prefix(prefix) if prefix else self._db
+            return [key for key in candidates if regex.match(key)]
 
-    @command(name="MOVE", fixed=(Key(), DbIndex))
+    @command(name="MOVE", fixed=(Key(), DbIndex), flags=msgs.FLAG_SERVER_WIDE)
     def move(self, key: CommandItem, db: int) -> int:
         if db == self._db_num:
             raise SimpleError(msgs.SRC_DST_SAME_MSG)
@@ -219,11 +229,11 @@ class GenericCommandsMixin:
 
     @command(name="SCAN", fixed=(Int,), repeat=(bytes, bytes))
     def scan(self, cursor, *args):
-        return self._scan(list(self._db), cursor, *args)
+        return self._scan(self._db, cursor, *args)
 
     @command(name="SORT", fixed=(Key(),), repeat=(bytes,))
     def sort(self, key, *args):
-        if key.value is not None and not isinstance(key.value, (ExpiringMembersSet, list, ZSet)):
+        if key.value is not None and not isinstance(key.value, (ExpiringMembersSet, QuickList, ZSet)):
             raise SimpleError(msgs.WRONGTYPE_MSG)
         (
             asc,
@@ -284,7 +294,7 @@ class GenericCommandsMixin:
 
             sort_func = sort_key if alpha else sort_key_score
             items.sort(key=sort_func, reverse=desc)
-        elif isinstance(key.value, (list, ZSet)):
+        elif isinstance(key.value, (QuickList, ZSet)):
             items.reverse()
 
         out = []
@@ -296,7 +306,7 @@ class GenericCommandsMixin:
                 out.append(v)
         if store is not None:
             item = CommandItem(store, self._db, item=self._db.get(store))
-            item.value = out
+            item.value = QuickList(out)
             item.writeback()
             return len(out)
         else:
@@ -304,7 +314,7 @@ class GenericCommandsMixin:
 
     @command(name="SORT_RO", fixed=(Key(),), repeat=(bytes,))
     def sort_ro(self, key: CommandItem, *args: bytes) -> List[bytes]:
-        if key.value is not None and not isinstance(key.value, (set, list, ZSet)):
+        if key.value is not None and not isinstance(key.value, (set, QuickList, ZSet)):
             raise SimpleError(msgs.WRONGTYPE_MSG)
         (
             asc,
@@ -364,7 +374,7 @@ class GenericCommandsMixin:
 
             sort_func = sort_key if alpha else sort_key_score
             items.sort(key=sort_func, reverse=desc)
-        elif isinstance(key.value, (list, ZSet)):
+        elif isinstance(key.value, (QuickList, ZSet)):
             items.reverse()
 
         out: List[bytes] = []
@@ -374,6 +384,26 @@ class GenericCommandsMixin:
                 out.append(v)
         return out
 
+    @command(name="OBJECT ENCODING", fixed=(Key(),), flags=msgs.FLAG_MUTABLE_STRING)
+    def object_encoding(self, key: CommandItem) -> Optional[bytes]:
+        value = key.value
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray)):
+            # Values modified in place are stored as bytearray, like the raw strings redis modifies in place
+            if isinstance(value, bytes) and _is_int(value):
+                return b"int"
+            return b"embstr" if isinstance(value, bytes) and len(value) <= 44 else b"raw"
+        if isinstance(value, (ZSet, Hash, ExpiringMembersSet)):
+            if value.encoding == b"listpack" and self.version < (7,):
+                return b"ziplist"
+            return value.encoding
+        if isinstance(value, QuickList):
+            return value.encoding if self.version >= (7, 2) else b"quicklist"
+        if isinstance(value, XStream):
+            return b"stream"
+        return b"raw"
+
     @command(name="TTL", fixed=(Key(),))
     def ttl(self, key: CommandItem) -> int:
         return self._ttl(key, 1.0)
@@ -1,13 +1,14 @@
 import sys
 from collections import namedtuple
-from typing import List, Any, Callable, Optional, Union
+from typing import List, Any, Callable, Iterator, Optional, Tuple, Union
 
 from fakeredis import _msgs as msgs
 from fakeredis._command_args_parsing import extract_args
 from fakeredis._commands import command, Key, Float, CommandItem
 from fakeredis._helpers import SimpleError, Database
 from fakeredis.model import ZSet
-from fakeredis.geo import distance, geo_encode, geo_decode
+from fakeredis.geo import distance, geo_encode, geo_decode, hash_ranges_by_radius, hash_ranges_by_box
+from fakeredis.geo.geohash_helper import HashRange
 
 
 UNIT_TO_M = {"km": 0.001, "mi": 0.000621371, "ft": 3.28084, "m": 1}
@@ -48,6 +49,43 @@ def _parse_results(items: List[GeoResult], withcoord: bool, withdist: bool) -> L
     return res
 
 
+def _find_within(
+    zset: ZSet,
+    ranges: List[HashRange],
+    within: Callable[[float, float], Optional[float]],
+    count: int,
+    count_any: bool,
+    desc: bool,
+) -> List[GeoResult]:
+    """Find items of the given score ranges that are within an area
+    :param zset: list of items to check
+    :param ranges: ranges of geohashes `[start, end)` covering the area
+    :param within: distance from the center of a point (lat,long) within the area, None for a point outside of it
+    :param count: number of results to give
+    :param count_any: should we return any results that match? (vs. sorted)
+    :param desc: should results be sorted descending order?
+    :returns: List of GeoResults
+    """
+    results = list()
+    for _hash, name in _irange_hashes(zset, ranges):
+        p_lat, p_long, _, _ = geo_decode(_hash)
+        dist = within(p_lat, p_long)
+        if dist is not None:
+            results.append(GeoResult(name, p_long, p_lat, _hash, dist))
+            if count_any and len(results) >= count:
+                break
+    results = sorted(results, key=lambda x: x.distance, reverse=desc)
+    if count:
+        results = results[:count]
+    return results
+
+
+def _irange_hashes(zset: ZSet, ranges: List[HashRange]) -> Iterator[Tuple[str, bytes]]:
+    for start, end in ranges:
+        # No member is before b"", so the end of the range is excluded
+        yield from zset.irange_score((start, b""), (end, b"") if end is not None else None, inclusive=(True, False))
+
+
 def _find_near(
     zset: ZSet,
     lat: float,
@@ -69,18 +107,49 @@ def _find_near(
     :param desc: should results be sorted descending order?
     :returns: List of GeoResults
     """
-    results = list()
-    for name, _hash in zset.items():
-        p_lat, p_long, _, _ = geo_decode(_hash)
+
+    def within(p_lat: float, p_long: float) -> Optional[float]:
         dist = distance((p_lat, p_long), (lat, long)) * conv
-        if dist < radius:
-            results.append(GeoResult(name, p_long, p_lat, _hash, dist))
-            if count_any and len(results) >= count:
-                break
-    results = sorted(results, key=lambda x: x.distance, reverse=desc)
-    if count:
-        results = results[:count]
-    return results
+        return dist if dist < radius else None
+
+    ranges = hash_ranges_by_radius(lat, long, radius / conv)
+    return _find_within(zset, ranges, within, count, count_any, desc)
+
+
+def _find_in_box(
+    zset: ZSet,
+    lat: float,
+    long: float,
+    width: float,
+    height: float,
+    conv: float,
+    count: int,
+    count_any: bool,
+    desc: bool,
+) -> List[GeoResult]:
+    """Find items within the width x height box centered on (lat,long)
+    :param zset: list of items to check
+    :param lat: latitude
+    :param long: longitude
+    :param width: width of the box in whatever units
+    :param height: height of the box in whatever units
+    :param conv: conversion of width and height to meters
+    :param count: number of results to give
+    :param count_any: should we return any results that match? (vs. sorted)
+    :param desc: should results be sorted descending order?
+    :returns: List of GeoResults
+    """
+
+    def within(p_lat: float, p_long: float) -> Optional[float]:
+        # Like redis, the latitude distance is checked first as it is the cheapest
+        if distance((p_lat, long), (lat, long)) * conv > height / 2:
+            return None
+        if distance((p_lat, p_long), (p_lat, long)) * conv > width / 2:
+            return None
+        return distance((p_lat, p_long), (lat, long)) * conv
+
+    ranges = hash_ranges_by_box(lat, long, width / conv, height / conv)
+    return _find_within(zset, ranges, within, count, count_any, desc)
 
 
 class GeoCommandsMixin:
@@ -92,7 +161,7 @@ class GeoCommandsMixin:
 
     def _store_geo_results(self, item_name: bytes, geo_results: List[GeoResult], scoredist: bool) -> int:
         db_item = CommandItem(item_name, self._db, item=self._db.get(item_name), default=ZSet())
-        db_item.value = ZSet()
+        db_item.value = ZSet(config=self._db.config)
         for item in geo_results:
             val = item.distance if scoredist else item.hash
             db_item.value.add(item.name, val)
@@ -168,7 +237,8 @@ class GeoCommandsMixin:
         key: CommandItem,
         long: float,
         lat: float,
-        radius: float,
+        radius: Optional[float],
+        box: Optional[Tuple[float, float]],
         conv: float,
         withcoord: bool,
         withdist: bool,
@@ -180,7 +250,10 @@ class GeoCommandsMixin:
         storedist: Optional[bytes],
     ) -> Union[List[Any], int]:
         zset = key.value
-        geo_results = _find_near(zset, lat, long, radius, conv, count, count_any, desc)
+        if box is not None:
+            geo_results = _find_in_box(zset, lat, long, box[0], box[1], conv, count, count_any, desc)
+        else:
+            geo_results = _find_near(zset, lat, long, radius, conv, count, count_any, desc)  # type: ignore
 
         if store:
             self._store_geo_results(store, geo_results, scoredist=False)
@@ -191,36 +264,32 @@ class GeoCommandsMixin:
         ret = _parse_results(geo_results, withcoord, withdist)
         return ret
 
-    @command(name="GEORADIUS_RO", fixed=(Key(ZSet), Float, Float, Float), repeat=(bytes,))
-    def georadius_ro(self, key: CommandItem, long: float, lat: float, radius: float, *args: bytes) -> List[Any]:
-        (withcoord, withdist, withhash, count, count_any, desc), left_args = extract_args(
-            args,
-            ("withcoord", "withdist", "withhash", "+count", "any", "desc"),
-            error_on_unexpected=False,
-            left_from_first_unexpected=False,
-        )
-        count = count or sys.maxsize
-        conv: float = translate_meters_to_unit(args[0]) if len(args) >= 1 else 1.0
-        res: List[Any] = self._search(  # type: ignore
-            key, long, lat, radius, conv, withcoord, withdist, withhash, count, count_any, desc, None, None
-        )
-        return res
-
-    @command(name="GEORADIUS", fixed=(Key(ZSet), Float, Float, Float), repeat=(bytes,))
-    def georadius(self, key: CommandItem, long: float, lat: float, radius: float, *args: bytes) -> List[Any]:
+    def _georadius(
+        self,
+        key: CommandItem,
+        long: float,
+        lat: float,
+        radius: Optional[float],
+        box: Optional[Tuple[float, float]],
+        args: Tuple[bytes, ...],
+        readonly: bool,
+    ) -> Union[List[Any], int]:
         (withcoord, withdist, withhash, count, count_any, desc, store, storedist), left_args = extract_args(
             args,
             ("withcoord", "withdist", "withhash", "+count", "any", "desc", "*store", "*storedist"),
             error_on_unexpected=False,
             left_from_first_unexpected=False,
         )
+        if readonly:
+            store = storedist = None
         count = count or sys.maxsize
-        conv = translate_meters_to_unit(args[0]) if len(args) >= 1 else 1
-        res: List[Any] = self._search(  # type: ignore
+        conv: float = translate_meters_to_unit(args[0]) if len(args) >= 1 else 1.0
+        return self._search(
             key,
             long,
             lat,
             radius,
+            box,
             conv,
             withcoord,
             withdist,
@@ -231,6 +300,15 @@ class GeoCommandsMixin:
             store,
             storedist,
         )
+
+    @command(name="GEORADIUS_RO", fixed=(Key(ZSet), Float, Float, Float), repeat=(bytes,))
+    def georadius_ro(self, key: CommandItem, long: float, lat: float, radius: float, *args: bytes) -> List[Any]:
+        res: List[Any] = self._georadius(key, long, lat, radius, None, args, readonly=True)  # type: ignore
+        return res
+
+    @command(name="GEORADIUS", fixed=(Key(ZSet), Float, Float, Float), repeat=(bytes,))
+    def georadius(self, key: CommandItem, long: float, lat: float, radius: float, *args: bytes) -> List[Any]:
+        res: List[Any] = self._georadius(key, long, lat, radius, None, args, readonly=False)  # type: ignore
         return res
 
     @command(name="GEORADIUSBYMEMBER", fixed=(Key(ZSet), bytes, Float), repeat=(bytes,))
@@ -245,11 +323,10 @@ class GeoCommandsMixin:
         lat, long, _, _ = geo_decode(member_score)
         return self.georadius_ro(key, long, lat, radius, *args)
 
-    @command(name="GEOSEARCH", fixed=(Key(ZSet),), repeat=(bytes,))
-    def geosearch(self, key: CommandItem, *args: bytes) -> List[Any]:
-        (frommember, (long, lat), radius), left_args = extract_args(
+    def _geosearch(self, key: CommandItem, args: Tuple[bytes, ...], store_args: Tuple[bytes, ...]) -> Any:
+        (frommember, (long, lat), radius, (width, height)), left_args = extract_args(
             args,
-            ("*frommember", "..fromlonlat", ".byradius"),
+            ("*frommember", "..fromlonlat", ".byradius", "..bybox"),
             error_on_unexpected=False,
             left_from_first_unexpected=False,
         )
@@ -257,10 +334,17 @@ class GeoCommandsMixin:
             raise SimpleError(msgs.SYNTAX_ERROR_MSG)
         if frommember is not None and long is not None:
             raise SimpleError(msgs.SYNTAX_ERROR_MSG)
+        if (radius is None) == (width is None):
+            raise SimpleError(msgs.SYNTAX_ERROR_MSG)
         if frommember:
-            return self.georadiusbymember_ro(key, frommember, radius, *left_args)
-        else:
-            return self.georadius_ro(key, long, lat, radius, *left_args)  # type: ignore
+            lat, long, _, _ = geo_decode(key.value.get(frommember))
+        box = (width, height) if width is not None else None
+        return self._georadius(key, long, lat, radius, box, tuple(left_args) + store_args, readonly=not store_args)
+
+    @command(name="GEOSEARCH", fixed=(Key(ZSet),), repeat=(bytes,))
+    def geosearch(self, key: CommandItem, *args: bytes) -> List[Any]:
+        res: List[Any] = self._geosearch(key, args, ())
+        return res
 
     @command(
         name="GEOSEARCHSTORE",
@@ -271,19 +355,12 @@ class GeoCommandsMixin:
         repeat=(bytes,),
     )
     def geosearchstore(self, dst: bytes, src: CommandItem, *args: bytes) -> List[Any]:
-        (frommember, (long, lat), radius, storedist), left_args = extract_args(
+        (storedist,), left_args = extract_args(
             args,
-            ("*frommember", "..fromlonlat", ".byradius", "storedist"),
+            ("storedist",),
             error_on_unexpected=False,
             left_from_first_unexpected=False,
         )
-        if frommember is None and long is None:
-            raise SimpleError(msgs.SYNTAX_ERROR_MSG)
-        if frommember is not None and long is not None:
-            raise SimpleError(msgs.SYNTAX_ERROR_MSG)
-        additional = [b"storedist", dst] if storedist else [b"store", dst]
-
-        if frommember:
-            return self.georadiusbymember(src, frommember, radius, *left_args, *additional)
-        else:
-            return self.georadius(src, long, lat, radius, *left_args, *additional)  # type: ignore
+        additional = (b"storedist", dst) if storedist else (b"store", dst)
+        res: List[Any] = self._geosearch(src, tuple(left_args), additional)
+        return res
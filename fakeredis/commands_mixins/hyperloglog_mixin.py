@@ -0,0 +1,55 @@
+from typing import Any
+
+from fakeredis import _msgs as msgs
+from fakeredis._commands import command, Key, CommandItem
+from fakeredis._helpers import OK, SimpleString
+from fakeredis.model import HyperLogLog
+
+
+class HyperLogLogCommandsMixin:
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super(HyperLogLogCommandsMixin, self).__init__(*args, **kwargs)
+        self._server: Any
+
+    @property
+    def _hll_sparse_max_bytes(self) -> int:
+        return int(self._server.config.get(b"hll-sparse-max-bytes", HyperLogLog.SPARSE_MAX_BYTES))
+
+    @command((Key(bytes),), (bytes,), flags=msgs.FLAG_MUTABLE_STRING)
+    def pfadd(self, key: CommandItem, *elements: bytes) -> int:
+        if key.value is None:
+            hll = HyperLogLog.create()
+            hll.add(elements, self._hll_sparse_max_bytes)
+        else:
+            hll = HyperLogLog.from_value(key.value)
+            if not hll.add(elements, self._hll_sparse_max_bytes):
+                return 0
+        key.update(hll.data)
+        # 1 if at least 1 HyperLogLog internal register was altered. 0 otherwise.
+        return 1
+
+    @command((Key(bytes),), (Key(bytes),), flags=msgs.FLAG_MUTABLE_STRING)
+    def pfcount(self, *keys: CommandItem) -> int:
+        """Return the approximated cardinality of the set observed by the HyperLogLog at key(s)."""
+        hlls = [HyperLogLog.from_value(key.value) for key in keys if key.value is not None]
+        if len(keys) > 1:
+            return HyperLogLog.estimate(HyperLogLog.union(hlls))
+        if not hlls:
+            return 0
+        count = hlls[0].cached_count()
+        if count is None:
+            # Like redis, the cached cardinality is saved even though the command is read-only.
+            count = hlls[0].count()
+            keys[0].update(hlls[0].data)
+        return count
+
+    @command((Key(bytes),), (Key(bytes),), flags=msgs.FLAG_MUTABLE_STRING)
+    def pfmerge(self, dest: CommandItem, *sources: CommandItem) -> SimpleString:
+        """Merge N different HyperLogLogs into a single one."""
+        # The destination is merged with the sources when it exists.
+        hlls = [HyperLogLog.from_value(key.value) for key in (dest,) + sources if key.value is not None]
+        registers = HyperLogLog.union(hlls)
+        result = hlls[0] if dest.value is not None else HyperLogLog.create()
+        result.set_registers(registers, any(hll.is_dense for hll in hlls), self._hll_sparse_max_bytes)
+        dest.update(result.data)
+        return OK
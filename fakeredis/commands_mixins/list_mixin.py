@@ -1,16 +1,18 @@
 import functools
-from typing import Callable, List, Optional, Union, Any
+import itertools
+from typing import Callable, Iterator, List, Optional, Tuple, Union, Any
 
 from fakeredis import _msgs as msgs
 from fakeredis._command_args_parsing import extract_args
 from fakeredis._commands import Key, command, Int, CommandItem, Timeout, fix_range
 from fakeredis._helpers import OK, SimpleError, SimpleString, casematch, Database
+from fakeredis.model import QuickList
 
 
 def _list_pop_count(get_slice, key, count):
     if not key:
         return None
-    elif type(key.value) is not list:
+    elif type(key.value) is not QuickList:
         raise SimpleError(msgs.WRONGTYPE_MSG)
     slc = get_slice(count)
     ret = key.value[slc]
@@ -48,8 +50,8 @@ class ListCommandsMixin:
 
     def _bpop_pass(self, keys, op, first_pass):
         for key in keys:
-            item = CommandItem(key, self._db, item=self._db.get(key), default=[])
-            if not isinstance(item.value, list):
+            item = CommandItem(key, self._db, item=self._db.get(key), default=QuickList())
+            if not isinstance(item.value, QuickList):
                 if first_pass:
                     raise SimpleError(msgs.WRONGTYPE_MSG)
                 else:
@@ -68,26 +70,26 @@ class ListCommandsMixin:
 
     @command((bytes, bytes), (bytes,), flags=msgs.FLAG_NO_SCRIPT)
     def blpop(self, *args):
-        return self._bpop(args, lambda lst: lst.pop(0))
+        return self._bpop(args, lambda lst: lst.popleft())
 
     @command((bytes, bytes), (bytes,), flags=msgs.FLAG_NO_SCRIPT)
     def brpop(self, *args):
         return self._bpop(args, lambda lst: lst.pop())
 
     def _brpoplpush_pass(self, source, destination, first_pass):
-        src = CommandItem(source, self._db, item=self._db.get(source), default=[])
-        if not isinstance(src.value, list):
+        src = CommandItem(source, self._db, item=self._db.get(source), default=QuickList())
+        if not isinstance(src.value, QuickList):
             if first_pass:
                 raise SimpleError(msgs.WRONGTYPE_MSG)
             else:
                 return None
         if not src.value:
             return None  # Empty list
-        dst = CommandItem(destination, self._db, item=self._db.get(destination), default=[])
-        if not isinstance(dst.value, list):
+        dst = CommandItem(destination, self._db, item=self._db.get(destination), default=QuickList())
+        if not isinstance(dst.value, QuickList):
             raise SimpleError(msgs.WRONGTYPE_MSG)
         el = src.value.pop()
-        dst.value.insert(0, el)
+        dst.value.appendleft(el)
         src.updated()
         src.writeback()
         if destination != source:
@@ -100,14 +102,14 @@ class ListCommandsMixin:
     def brpoplpush(self, source, destination, timeout):
         return self._blocking(timeout, functools.partial(self._brpoplpush_pass, source, destination))
 
-    @command((Key(list, None), Int))
+    @command((Key(QuickList, None), Int))
     def lindex(self, key, index):
         try:
             return key.value[index]
         except IndexError:
             return None
 
-    @command((Key(list), bytes, bytes, bytes))
+    @command((Key(QuickList), bytes, bytes, bytes))
     def linsert(self, key, where, pivot, value):
         if not casematch(where, b"before") and not casematch(where, b"after"):
             raise SimpleError(msgs.SYNTAX_ERROR_MSG)
@@ -124,7 +126,7 @@ class ListCommandsMixin:
             key.updated()
             return len(key.value)
 
-    @command((Key(list),))
+    @command((Key(QuickList),))
     def llen(self, key):
         return len(key.value)
 
@@ -138,11 +140,11 @@ class ListCommandsMixin:
         self.lpush(second_list, el) if casematch(dst, b"LEFT") else self.rpush(second_list, el)
         return el
 
-    @command((Key(list, None), Key(list), SimpleString, SimpleString))
+    @command((Key(QuickList, None), Key(QuickList), SimpleString, SimpleString))
     def lmove(self, first_list, second_list, src, dst):
         return self._lmove(first_list, second_list, src, dst, False)
 
-    @command((Key(list, None), Key(list), SimpleString, SimpleString, Timeout))
+    @command((Key(QuickList, None), Key(QuickList), SimpleString, SimpleString, Timeout))
     def blmove(self, first_list, second_list, src, dst, timeout):
         return self._blocking(timeout, functools.partial(self._lmove, first_list, second_list, src, dst))
 
@@ -157,7 +159,7 @@ class ListCommandsMixin:
             op = lambda count: slice(None, -count - 1, -1)  # noqa:E731
 
         for key in keys:
-            item = CommandItem(key, self._db, item=self._db.get(key), default=[])
+            item = CommandItem(key, self._db, item=self._db.get(key), default=QuickList())
             res = _list_pop_count(op, item, count)
             if res:
                 return [key, res]
@@ -200,25 +202,24 @@ class ListCommandsMixin:
             functools.partial(self._lmpop, args[:-1], count, casematch(args[-1], b"left")),
         )
 
-    @command((Key(list), bytes), (bytes,))
+    @command((Key(QuickList), bytes), (bytes,))
     def lpush(self, key, *values):
-        for value in values:
-            key.value.insert(0, value)
+        key.value.extendleft(values)
         key.updated()
         return len(key.value)
 
-    @command((Key(list), bytes), (bytes,))
+    @command((Key(QuickList), bytes), (bytes,))
     def lpushx(self, key, *values):
         if not key:
             return 0
         return self.lpush(key, *values)
 
-    @command((Key(list), Int, Int))
+    @command((Key(QuickList), Int, Int))
     def lrange(self, key, start, stop):
         start, stop = fix_range(start, stop, len(key.value))
         return key.value[start:stop]
 
-    @command((Key(list), Int, bytes))
+    @command((Key(QuickList), Int, bytes))
     def lrem(self, key, count, value):
         a_list = key.value
         found = []
@@ -239,7 +240,7 @@ class ListCommandsMixin:
             key.updated()
         return len(indices_to_remove)
 
-    @command((Key(list), bytes, bytes))
+    @command((Key(QuickList), bytes, bytes))
     def lset(self, key, index, value):
         if not key:
             raise SimpleError(msgs.NO_KEY_MSG)
@@ -251,37 +252,40 @@ class ListCommandsMixin:
             raise SimpleError(msgs.INDEX_ERROR_MSG)
         return OK
 
-    @command((Key(list), Int, Int))
+    @command((Key(QuickList), Int, Int))
     def ltrim(self, key, start, stop):
         if key:
             if stop == -1:
                 stop = None
             else:
                 stop += 1
-            new_value = key.value[start:stop]
+            length = len(key.value)
+            start, stop, _ = slice(start, stop).indices(length)
+            # Remove the tail first, so that the head is removed using the same indices
+            del key.value[max(start, stop) :]
+            del key.value[:start]
             # TODO: check if this should actually be conditional
-            if len(new_value) != len(key.value):
-                key.update(new_value)
+            if len(key.value) != length:
+                key.updated()
         return OK
 
     @command(fixed=(Key(),), repeat=(bytes,))
     def rpop(self, key, *args):
         return _list_pop(lambda count: slice(None, -count - 1, -1), key, *args)
 
-    @command((Key(list, None), Key(list)))
+    @command((Key(QuickList, None), Key(QuickList)))
     def rpoplpush(self, src, dst):
         el = self.rpop(src)
         self.lpush(dst, el)
         return el
 
-    @command((Key(list), bytes), (bytes,))
+    @command((Key(QuickList), bytes), (bytes,))
     def rpush(self, key, *values):
-        for value in values:
-            key.value.append(value)
+        key.value.extend(values)
         key.updated()
         return len(key.value)
 
-    @command((Key(list), bytes), (bytes,))
+    @command((Key(QuickList), bytes), (bytes,))
     def rpushx(self, key, *values):
         if not key:
             return 0
@@ -289,7 +293,7 @@ class ListCommandsMixin:
 
     @command(
         fixed=(
-            Key(list),
+            Key(QuickList),
             bytes,
         ),
         repeat=(bytes,),
@@ -306,20 +310,24 @@ class ListCommandsMixin:
         if rank == 0:
             raise SimpleError(msgs.LPOS_RANK_CAN_NOT_BE_ZERO)
         rank = rank or 1
-        ind, direction = (0, 1) if rank > 0 else (len(key.value) - 1, -1)
+        length = len(key.value)
+        indexed: Iterator[Tuple[int, bytes]]
+        if rank > 0:
+            indexed = enumerate(key.value)
+        else:
+            indexed = zip(range(length - 1, -1, -1), reversed(key.value))
         rank = abs(rank)
-        parse_count = len(key.value) if count == 0 else (count or 1)
-        maxlen = maxlen or len(key.value)
+        parse_count = length if count == 0 else (count or 1)
+        maxlen = maxlen or length
         res: List[int] = []
-        comparisons = 0
-        while 0 <= ind <= len(key.value) - 1 and len(res) < parse_count and comparisons < maxlen:
-            comparisons += 1
-            if key.value[ind] == elem:
+        for ind, value in itertools.islice(indexed, maxlen):
+            if len(res) >= parse_count:
+                break
+            if value == elem:
                 if rank > 1:
                     rank -= 1
                 else:
                     res.append(ind)
-            ind += direction
         if len(res) == 0 and count is None:
             return None
         if len(res) == 1 and count is None:
@@ -45,31 +45,31 @@ class PubSubCommandsMixin:
         tuples_list = [(ch, len(subscribers.get(ch, []))) for ch in channels]
         return [item for sublist in tuples_list for item in sublist]
 
-    @command((bytes,), (bytes,), flags=msgs.FLAG_NO_SCRIPT)
+    @command((bytes,), (bytes,), flags=[msgs.FLAG_NO_SCRIPT, msgs.FLAG_SERVER_STATE])
     def psubscribe(self, *patterns: bytes) -> NoResponse:
         return self._subscribe(patterns, self._server.psubscribers, b"psubscribe")
 
-    @command((bytes,), (bytes,), flags=msgs.FLAG_NO_SCRIPT)
+    @command((bytes,), (bytes,), flags=[msgs.FLAG_NO_SCRIPT, msgs.FLAG_SERVER_STATE])
     def subscribe(self, *channels: bytes) -> NoResponse:
         return self._subscribe(channels, self._server.subscribers, b"subscribe")
 
-    @command((bytes,), (bytes,), flags=msgs.FLAG_NO_SCRIPT)
+    @command((bytes,), (bytes,), flags=[msgs.FLAG_NO_SCRIPT, msgs.FLAG_SERVER_STATE])
     def ssubscribe(self, *channels: bytes) -> NoResponse:
         return self._subscribe(channels, self._server.ssubscribers, b"ssubscribe")
 
-    @command((), (bytes,), flags=msgs.FLAG_NO_SCRIPT)
+    @command((), (bytes,), flags=[msgs.FLAG_NO_SCRIPT, msgs.FLAG_SERVER_STATE])
     def punsubscribe(self, *patterns: bytes) -> NoResponse:
         return self._unsubscribe(patterns, self._server.psubscribers, b"punsubscribe")
 
-    @command((), (bytes,), flags=msgs.FLAG_NO_SCRIPT)
+    @command((), (bytes,), flags=[msgs.FLAG_NO_SCRIPT, msgs.FLAG_SERVER_STATE])
     def unsubscribe(self, *channels: bytes) -> NoResponse:
         return self._unsubscribe(channels, self._server.subscribers, b"unsubscribe")
 
-    @command(fixed=(), repeat=(bytes,), flags=msgs.FLAG_NO_SCRIPT)
+    @command(fixed=(), repeat=(bytes,), flags=[msgs.FLAG_NO_SCRIPT, msgs.FLAG_SERVER_STATE])
     def sunsubscribe(self, *channels: bytes) -> NoResponse:
         return self._unsubscribe(channels, self._server.ssubscribers, b"sunsubscribe")
 
-    @command((bytes, bytes))
+    @command((bytes, bytes), flags=msgs.FLAG_SERVER_STATE)
     def publish(self, channel: bytes, message: bytes) -> int:
         receivers = 0
         msg = [b"message", channel, message]
@@ -86,7 +86,7 @@ class PubSubCommandsMixin:
                     receivers += 1
         return receivers
 
-    @command((bytes, bytes))
+    @command((bytes, bytes), flags=msgs.FLAG_SERVER_STATE)
     def spublish(self, channel: bytes, message: bytes) -> int:
         receivers = 0
         msg = [b"smessage", channel, message]
@@ -103,7 +103,7 @@ class PubSubCommandsMixin:
                     receivers += 1
         return receivers
 
-    @command(name="PUBSUB NUMPAT", fixed=(), repeat=())
+    @command(name="PUBSUB NUMPAT", fixed=(), repeat=(), flags=msgs.FLAG_SERVER_STATE)
     def pubsub_numpat(self, *_: Any) -> int:
         return len(self._server.psubscribers)
 
@@ -114,19 +114,19 @@ class PubSubCommandsMixin:
             channels = [ch for ch in channels if regex.match(ch)]
         return channels
 
-    @command(name="PUBSUB CHANNELS", fixed=(), repeat=(bytes,))
+    @command(name="PUBSUB CHANNELS", fixed=(), repeat=(bytes,), flags=msgs.FLAG_SERVER_STATE)
     def pubsub_channels(self, *args: bytes) -> List[bytes]:
         return self._channels(self._server.subscribers, *args)
 
-    @command(name="PUBSUB SHARDCHANNELS", fixed=(), repeat=(bytes,))
+    @command(name="PUBSUB SHARDCHANNELS", fixed=(), repeat=(bytes,), flags=msgs.FLAG_SERVER_STATE)
     def pubsub_shardchannels(self, *args: bytes) -> List[bytes]:
         return self._channels(self._server.ssubscribers, *args)
 
-    @command(name="PUBSUB NUMSUB", fixed=(), repeat=(bytes,))
+    @command(name="PUBSUB NUMSUB", fixed=(), repeat=(bytes,), flags=msgs.FLAG_SERVER_STATE)
     def pubsub_numsub(self, *args: bytes) -> List[Any]:
         return self._numsub(self._server.subscribers, *args)
 
-    @command(name="PUBSUB SHARDNUMSUB", fixed=(), repeat=(bytes,))
+    @command(name="PUBSUB SHARDNUMSUB", fixed=(), repeat=(bytes,), flags=msgs.FLAG_SERVER_STATE)
     def pubsub_shardnumsub(self, *args: bytes) -> List[Any]:
         return self._numsub(self._server.ssubscribers, *args)
 
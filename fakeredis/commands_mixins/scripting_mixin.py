@@ -4,13 +4,15 @@ import importlib
 import itertools
 import logging
 import os
+import re
 from typing import Callable, AnyStr, Set, Any, Tuple, List, Dict, Optional
 
 import lupa
 
 from fakeredis import _msgs as msgs
-from fakeredis._commands import command, Int, Signature
+from fakeredis._commands import command, Int, Signature, SUPPORTED_COMMANDS
 from fakeredis._helpers import (
+    Database,
     SimpleError,
     SimpleString,
     null_terminate,
@@ -42,6 +44,11 @@ REDIS_LOG_LEVELS_TO_LOGGING = {
     3: logging.WARNING,
 }
 
+# Results of commands passed to Lua as they are
+_PLAIN_LUA_TYPES = frozenset((bytes, int))
+# Calls of redis commands from a script, with the name of the command when it is a string literal
+_REDIS_CALL_RE = re.compile(rb"""redis\s*\.\s*p?call\b(?:\s*\(\s*(['"])([\w.]+)\1)?""")
+
 
 def _ensure_str(s: AnyStr, encoding: str, replaceerr: str) -> str:
     if isinstance(s, bytes):
@@ -51,15 +58,15 @@ def _ensure_str(s: AnyStr, encoding: str, replaceerr: str) -> str:
     return res
 
 
-def _check_for_lua_globals(lua_runtime: LUA_MODULE.LuaRuntime, expected_globals: Set[Any]) -> None:
-    unexpected_globals = set(lua_runtime.globals().keys()) - expected_globals
-    if len(unexpected_globals) > 0:
-        unexpected = [_ensure_str(var, "utf-8", "replace") for var in unexpected_globals]
+def _check_for_lua_globals(created_globals: Any) -> None:
+    """Raise an error if a script created global variables, `created_globals` being the Lua list of their names."""
+    if created_globals[1] is not None:
+        unexpected = dict.fromkeys(_ensure_str(var, "utf-8", "replace") for var in created_globals.values())
         raise SimpleError(msgs.GLOBAL_VARIABLE_MSG.format(", ".join(unexpected)))
 
 
-def _lua_redis_log(lua_runtime: LUA_MODULE.LuaRuntime, expected_globals: Set[Any], lvl: int, *args: Any) -> None:
-    _check_for_lua_globals(lua_runtime, expected_globals)
+def _lua_redis_log(created_globals: Any, lvl: int, *args: Any) -> None:
+    _check_for_lua_globals(created_globals)
     if len(args) < 1:
         raise SimpleError(msgs.REQUIRES_MORE_ARGS_MSG.format("redis.log()", "two"))
     if lvl not in REDIS_LOG_LEVELS_TO_LOGGING.keys():
@@ -68,6 +75,152 @@ def _lua_redis_log(lua_runtime: LUA_MODULE.LuaRuntime, expected_globals: Set[Any
     LOGGER.log(REDIS_LOG_LEVELS_TO_LOGGING[lvl], msg)
 
 
+@functools.lru_cache(maxsize=128)
+def _script_locks_all(script: bytes) -> bool:
+    """Whether a script may switch databases or run a server-wide command, and so needs the whole server locked.
+
+    Only the commands called with a literal name can be checked, any other call is assumed to need it.
+    """
+    for match in _REDIS_CALL_RE.finditer(script):
+        if match.group(2) is None:
+            return True
+        name = match.group(2).decode().lower()
+        if name == "select":
+            return True
+        for cmd_name, sig in SUPPORTED_COMMANDS.items():
+            if msgs.FLAG_SERVER_WIDE in sig.flags and cmd_name.split(" ")[0] == name:
+                return True
+    return False
+
+
+def _check_numkeys(numkeys: int, keys_and_args: Tuple[bytes, ...]) -> None:
+    if numkeys > len(keys_and_args):
+        raise SimpleError(msgs.TOO_MANY_KEYS_MSG)
+    if numkeys < 0:
+        raise SimpleError(msgs.NEGATIVE_KEYS_MSG)
+
+
+class _LuaRuntime:
+    """A Lua interpreter with the `redis` library, reused by all the scripts run with the same Lua modules on a server.
+
+    Scripts are compiled once per interpreter, and the global variables and the `redis` library are restored after
+    each script, so that a script does not see the variables of another. Like in redis 6, changes to the other
+    libraries (e.g. `string`) are kept.
+
+    The global variables created by a script are recorded by a metatable of `_G`, so that `redis.call` checks them
+    without going through all the globals.
+    """
+
+    def __init__(self, modules: Set[str]) -> None:
+        self.runtime: LUA_MODULE.LuaRuntime = LUA_MODULE.LuaRuntime(encoding=None, unpack_returned_tuples=True)
+        # Socket running a script, which the `redis.call` of the script runs commands on
+        self.socket: Optional["ScriptingCommandsMixin"] = None
+        self.functions: Dict[bytes, Any] = dict()  # Maps SHA1 to the compiled script
+        # Maps the command names used by `redis.call` to their signatures
+        self.signatures: Dict[bytes, Signature] = dict()
+        modules_import_str = "\n".join([f"{module} = require('{module}')" for module in modules])
+        setup = self.runtime.eval(
+            f"""
+            function(redis_call, redis_pcall, redis_log, redis_log_levels, created_globals)
+                redis = {{}}
+                redis.call = redis_call
+                redis.pcall = redis_pcall
+                redis.log = redis_log
+                for level, pylevel in python.iterex(redis_log_levels.items()) do
+                    redis[level] = pylevel
+                end
+                redis.error_reply = function(msg) return {{err=msg}} end
+                redis.status_reply = function(msg) return {{ok=msg}} end
+                KEYS = {{}}
+                ARGV = {{}}
+                {modules_import_str}
+
+                local saved_globals, saved_redis = {{}}, {{}}
+                for name, value in pairs(_G) do
+                    saved_globals[name] = value
+                end
+                for name, value in pairs(redis) do
+                    saved_redis[name] = value
+                end
+                local globals_metatable = {{
+                    __newindex = function(globals, name, value)
+                        created_globals[#created_globals + 1] = name
+                        rawset(globals, name, value)
+                    end
+                }}
+                setmetatable(_G, globals_metatable)
+                local function set_arguments(keys, argv)
+                    KEYS = keys
+                    ARGV = argv
+                end
+                -- Restores the global variables and the redis library, returning the names of the globals created
+                local function reset()
+                    local created = {{}}
+                    for name in pairs(_G) do
+                        if saved_globals[name] == nil then
+                            created[#created + 1] = name
+                            rawset(_G, name, nil)
+                        end
+                    end
+                    for name, value in pairs(saved_globals) do
+                        rawset(_G, name, value)
+                    end
+                    for name in pairs(redis) do
+                        if saved_redis[name] == nil then
+                            rawset(redis, name, nil)
+                        end
+                    end
+                    for name, value in pairs(saved_redis) do
+                        rawset(redis, name, value)
+                    end
+                    for index = #created_globals, 1, -1 do
+                        created_globals[index] = nil
+                    end
+                    setmetatable(_G, globals_metatable)
+                    return created
+                end
+                return set_arguments, reset
+            end
+            """
+        )
+        self.created_globals = self.runtime.table_from([])
+        self._set_arguments, self._reset = setup(
+            self._redis_call,
+            self._redis_pcall,
+            functools.partial(_lua_redis_log, self.created_globals),
+            LUA_MODULE.as_attrgetter(REDIS_LOG_LEVELS),
+            self.created_globals,
+        )
+
+    def _redis_call(self, op: bytes, *args: Any) -> Any:
+        return self.socket._lua_redis_call(self, op, *args)  # type: ignore
+
+    def _redis_pcall(self, op: bytes, *args: Any) -> Any:
+        return self.socket._lua_redis_pcall(self, op, *args)  # type: ignore
+
+    def compile(self, sha1: bytes, script: bytes) -> Any:
+        """Get the Lua function running `script`, compiling it the first time."""
+        function = self.functions.get(sha1)
+        if function is None:
+            function = self.functions[sha1] = self.runtime.compile(script)
+        return function
+
+    def run(
+        self, socket: "ScriptingCommandsMixin", function: Any, keys: Tuple[bytes, ...], argv: Tuple[bytes, ...]
+    ) -> Any:
+        """Run a compiled script, with its `redis.call` running commands on `socket`."""
+        self.socket = socket
+        try:
+            self._set_arguments(self.runtime.table_from(keys), self.runtime.table_from(argv))
+            result = function()
+        finally:
+            self.socket = None
+            created_globals = self._reset()
+        # Globals created with rawset are not in `self.created_globals`
+        _check_for_lua_globals(created_globals)
+        return result
+
+
 class ScriptingCommandsMixin:
     _name_to_func: Callable[
         [
@@ -76,9 +229,10 @@ class ScriptingCommandsMixin:
         Tuple[Optional[Callable[..., Any]], Signature],
     ]
     _run_command: Callable[[Callable[..., Any], Signature, List[Any], bool], Any]
+    _server: Any
+    _db: Database
 
     def __init__(self, *args: Any, **kwargs: Any):
-        self.script_cache: Dict[bytes, bytes] = dict()  # Maps SHA1 to the script source
         self.server_type: str
         self.version: Tuple[int]
         self.load_lua_modules = set()
@@ -111,7 +265,10 @@ class ScriptingCommandsMixin:
         elif result is None:
             return False
         elif isinstance(result, list):
-            converted = [self._convert_redis_result(lua_runtime, item) for item in result]
+            converted = [
+                item if item.__class__ in _PLAIN_LUA_TYPES else self._convert_redis_result(lua_runtime, item)
+                for item in result
+            ]
             return lua_runtime.table_from(converted)
         elif isinstance(result, SimpleError):
             if result.value.startswith("ERR wrong number of arguments"):
@@ -149,65 +306,48 @@ class ScriptingCommandsMixin:
             return 1 if result else None
         return result
 
-    def _lua_redis_call(
-        self, lua_runtime: LUA_MODULE.LuaRuntime, expected_globals: Set[Any], op: bytes, *args: Any
-    ) -> Any:
+    def _lua_redis_call(self, lua: _LuaRuntime, op: bytes, *args: Any) -> Any:
         # Check if we've set any global variables before making any change.
-        _check_for_lua_globals(lua_runtime, expected_globals)
-        func, sig = self._name_to_func(decode_command_bytes(op))
-        new_args = [self._convert_redis_arg(lua_runtime, arg) for arg in args]
+        _check_for_lua_globals(lua.created_globals)
+        sig = lua.signatures.get(op)
+        if sig is None:
+            func, sig = self._name_to_func(decode_command_bytes(op))
+            lua.signatures[op] = sig
+        else:
+            func = getattr(self, sig.func_name, None)
+        new_args = [arg if type(arg) is bytes else self._convert_redis_arg(lua.runtime, arg) for arg in args]
         result = self._run_command(func, sig, new_args, True)
-        return self._convert_redis_result(lua_runtime, result)
+        if result.__class__ in _PLAIN_LUA_TYPES:
+            return result
+        return self._convert_redis_result(lua.runtime, result)
 
-    def _lua_redis_pcall(
-        self, lua_runtime: LUA_MODULE.LuaRuntime, expected_globals: Set[Any], op: bytes, *args: Any
-    ) -> Any:
+    def _lua_redis_pcall(self, lua: _LuaRuntime, op: bytes, *args: Any) -> Any:
         try:
-            return self._lua_redis_call(lua_runtime, expected_globals, op, *args)
+            return self._lua_redis_call(lua, op, *args)
         except Exception as ex:
-            return lua_runtime.table_from({b"err": str(ex)})
+            return lua.runtime.table_from({b"err": str(ex)})
+
+    def _script_databases(self, name: str, args: List[bytes]) -> Optional[List[Database]]:
+        """Databases whose lock EVAL or EVALSHA with `args` needs, or None for the whole server."""
+        if not args:
+            return [self._db]
+        script = args[0] if name == "eval" else self._server.script_cache.get(args[0], b"")
+        return None if _script_locks_all(script) else [self._db]
 
     @command((bytes, Int), (bytes,), flags=msgs.FLAG_NO_SCRIPT)
     def eval(self, script: bytes, numkeys: int, *keys_and_args: bytes) -> Any:
-        if numkeys > len(keys_and_args):
-            raise SimpleError(msgs.TOO_MANY_KEYS_MSG)
-        if numkeys < 0:
-            raise SimpleError(msgs.NEGATIVE_KEYS_MSG)
+        _check_numkeys(numkeys, keys_and_args)
         sha1 = hashlib.sha1(script).hexdigest().encode()
-        self.script_cache[sha1] = script
-        lua_runtime: LUA_MODULE.LuaRuntime = LUA_MODULE.LuaRuntime(encoding=None, unpack_returned_tuples=True)
-        modules_import_str = "\n".join([f"{module} = require('{module}')" for module in self.load_lua_modules])
-        set_globals = lua_runtime.eval(
-            f"""
-            function(keys, argv, redis_call, redis_pcall, redis_log, redis_log_levels)
-                redis = {{}}
-                redis.call = redis_call
-                redis.pcall = redis_pcall
-                redis.log = redis_log
-                for level, pylevel in python.iterex(redis_log_levels.items()) do
-                    redis[level] = pylevel
-                end
-                redis.error_reply = function(msg) return {{err=msg}} end
-                redis.status_reply = function(msg) return {{ok=msg}} end
-                KEYS = keys
-                ARGV = argv
-                {modules_import_str}
-            end
-            """
-        )
-        expected_globals: Set[Any] = set()
-        set_globals(
-            lua_runtime.table_from(keys_and_args[:numkeys]),
-            lua_runtime.table_from(keys_and_args[numkeys:]),
-            functools.partial(self._lua_redis_call, lua_runtime, expected_globals),
-            functools.partial(self._lua_redis_pcall, lua_runtime, expected_globals),
-            functools.partial(_lua_redis_log, lua_runtime, expected_globals),
-            LUA_MODULE.as_attrgetter(REDIS_LOG_LEVELS),
-        )
-        expected_globals.update(lua_runtime.globals().keys())
+        self._server.script_cache[sha1] = script
+        return self._eval(sha1, script, numkeys, keys_and_args)
 
+    def _eval(self, sha1: bytes, script: bytes, numkeys: int, keys_and_args: Tuple[bytes, ...]) -> Any:
+        # A runtime is taken out of the pool of the server while it runs a script
+        pool = self._server.lua_runtimes[frozenset(self.load_lua_modules)]
+        lua_runtime = pool.pop() if pool else _LuaRuntime(self.load_lua_modules)
         try:
-            result = lua_runtime.execute(script)
+            function = lua_runtime.compile(sha1, script)
+            result = lua_runtime.run(self, function, keys_and_args[:numkeys], keys_and_args[numkeys:])
         except SimpleError as ex:
             if ex.value == msgs.LUA_COMMAND_ARG_MSG:
                 if self.version < (7,):
@@ -220,40 +360,45 @@ class ScriptingCommandsMixin:
                 raise SimpleError(msgs.SCRIPT_ERROR_MSG.format(sha1.decode(), ex))
             raise SimpleError(ex.value)
         except LUA_MODULE.LuaError as ex:
-            raise SimpleError(msgs.SCRIPT_ERROR_MSG.format(sha1.decode(), ex))
-
-        _check_for_lua_globals(lua_runtime, expected_globals)
+            # Compilation errors have the message as bytes, the runtime having no encoding
+            message = _ensure_str(ex.args[0], "utf-8", "replace") if ex.args else str(ex)
+            raise SimpleError(msgs.SCRIPT_ERROR_MSG.format(sha1.decode(), message))
+        finally:
+            pool.append(lua_runtime)
 
         return self._convert_lua_result(result, nested=False)
 
     @command(name="EVALSHA", fixed=(bytes, Int), repeat=(bytes,), flags=msgs.FLAG_NO_SCRIPT)
-    def evalsha(self, sha1: bytes, numkeys: Int, *keys_and_args: bytes) -> Any:
+    def evalsha(self, sha1: bytes, numkeys: int, *keys_and_args: bytes) -> Any:
         try:
-            script = self.script_cache[sha1]
+            script = self._server.script_cache[sha1]
         except KeyError:
             raise SimpleError(msgs.NO_MATCHING_SCRIPT_MSG)
-        return self.eval(script, numkeys, *keys_and_args)
+        _check_numkeys(numkeys, keys_and_args)
+        return self._eval(sha1, script, numkeys, keys_and_args)
 
-    @command(name="SCRIPT LOAD", fixed=(bytes,), repeat=(bytes,), flags=msgs.FLAG_NO_SCRIPT)
+    @command(name="SCRIPT LOAD", fixed=(bytes,), repeat=(bytes,), flags=[msgs.FLAG_NO_SCRIPT, msgs.FLAG_SERVER_STATE])
     def script_load(self, *args: bytes) -> bytes:
         if len(args) != 1:
             raise SimpleError(msgs.BAD_SUBCOMMAND_MSG.format("SCRIPT"))
         script = args[0]
         sha1 = hashlib.sha1(script).hexdigest().encode()
-        self.script_cache[sha1] = script
+        self._server.script_cache[sha1] = script
         return sha1
 
-    @command(name="SCRIPT EXISTS", fixed=(), repeat=(bytes,), flags=msgs.FLAG_NO_SCRIPT)
+    @command(name="SCRIPT EXISTS", fixed=(), repeat=(bytes,), flags=[msgs.FLAG_NO_SCRIPT, msgs.FLAG_SERVER_STATE])
     def script_exists(self, *args: bytes) -> List[int]:
         if self.version >= (7,) and len(args) == 0:
             raise SimpleError(msgs.WRONG_ARGS_MSG7)
-        return [int(sha1 in self.script_cache) for sha1 in args]
+        return [int(sha1 in self._server.script_cache) for sha1 in args]
 
-    @command(name="SCRIPT FLUSH", fixed=(), repeat=(bytes,), flags=msgs.FLAG_NO_SCRIPT)
+    @command(name="SCRIPT FLUSH", fixed=(), repeat=(bytes,), flags=[msgs.FLAG_NO_SCRIPT, msgs.FLAG_SERVER_STATE])
     def script_flush(self, *args: bytes) -> SimpleString:
         if len(args) > 1 or (len(args) == 1 and null_terminate(args[0]) not in {b"sync", b"async"}):
             raise SimpleError(msgs.BAD_SUBCOMMAND_MSG.format("SCRIPT"))
-        self.script_cache = {}
+        self._server.script_cache.clear()
+        # Like redis, which creates a new Lua interpreter, drop the runtimes and the scripts compiled in them
+        self._server.lua_runtimes.clear()
         return OK
 
     @command((), flags=msgs.FLAG_NO_SCRIPT)
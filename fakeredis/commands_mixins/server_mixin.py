@@ -1,9 +1,18 @@
 import time
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Callable, Dict
 
 from fakeredis import _msgs as msgs
-from fakeredis._commands import command, DbIndex
-from fakeredis._helpers import OK, SimpleError, casematch, BGSAVE_STARTED, Database, SimpleString
+from fakeredis._commands import command, DbIndex, Key, CommandItem, Int
+from fakeredis._helpers import (
+    OK,
+    SimpleError,
+    casematch,
+    BGSAVE_STARTED,
+    Database,
+    SimpleString,
+    estimate_memory_usage,
+    MEMORY_USAGE_SAMPLES,
+)
 from fakeredis.model import get_command_info, get_all_commands_info
 
 
@@ -19,6 +28,31 @@ class ServerCommandsMixin:
     def _get_command_info(cmd: bytes) -> Optional[List[Any]]:
         return get_command_info(cmd)
 
+    @staticmethod
+    def _bytes_to_human(n: int) -> str:
+        if n < 1024:
+            return f"{n}B"
+        value = float(n)
+        for unit in "KMGTP":
+            value /= 1024
+            if value < 1024 or unit == "P":
+                break
+        return f"{value:.2f}{unit}"
+
+    def _info_memory(self) -> Dict[str, Any]:
+        used_memory = self._server.used_memory()
+        maxmemory = self._server.maxmemory
+        return {
+            "used_memory": used_memory,
+            "used_memory_human": self._bytes_to_human(used_memory),
+            "maxmemory": maxmemory,
+            "maxmemory_human": self._bytes_to_human(maxmemory),
+            "maxmemory_policy": self._server.config.get(b"maxmemory-policy", b"noeviction").decode().lower(),
+        }
+
+    def _info_stats(self) -> Dict[str, Any]:
+        return {"evicted_keys": self._server.evicted_keys}
+
     @command((), (bytes,), flags=msgs.FLAG_NO_SCRIPT)
     def bgsave(self, *args: bytes) -> SimpleString:
         if len(args) > 1 or (len(args) == 1 and not casematch(args[0], b"schedule")):
@@ -37,7 +71,7 @@ class ServerCommandsMixin:
         self._db.clear()
         return OK
 
-    @command((), (bytes,))
+    @command((), (bytes,), flags=msgs.FLAG_SERVER_WIDE)
     def flushall(self, *args: bytes) -> SimpleString:
         if len(args) > 0 and (len(args) != 1 or not casematch(args[0], b"async")):
             raise SimpleError(msgs.SYNTAX_ERROR_MSG)
@@ -62,7 +96,7 @@ class ServerCommandsMixin:
         now_us %= 1_000_000
         return [str(now_s).encode(), str(now_us).encode()]
 
-    @command((DbIndex, DbIndex))
+    @command((DbIndex, DbIndex), flags=msgs.FLAG_SERVER_WIDE)
     def swapdb(self, index1: int, index2: int) -> SimpleString:
         if index1 != index2:
             db1 = self._server.dbs[index1]
@@ -83,3 +117,35 @@ class ServerCommandsMixin:
     def command_(self) -> List[Any]:
         res = [self._get_command_info(cmd) for cmd in get_all_commands_info()]
         return res
+
+    @command(name="MEMORY USAGE", fixed=(Key(),), repeat=(bytes,))
+    def memory_usage(self, key: CommandItem, *args: bytes) -> Optional[int]:
+        samples = MEMORY_USAGE_SAMPLES
+        if len(args) == 2 and casematch(args[0], b"samples"):
+            samples = Int.decode(args[1])
+            if samples < 0:
+                raise SimpleError(msgs.SYNTAX_ERROR_MSG)
+        elif args:
+            raise SimpleError(msgs.SYNTAX_ERROR_MSG)
+        if not key:
+            return None
+        return estimate_memory_usage(key.key, key.value, samples)
+
+    @command((), (bytes,), flags=msgs.FLAG_SERVER_WIDE)
+    def info(self, *sections: bytes) -> bytes:
+        all_sections: Dict[bytes, Callable[[], Dict[str, Any]]] = {
+            b"memory": self._info_memory,
+            b"stats": self._info_stats,
+        }
+        names = [section.lower() for section in sections]
+        if not names or any(name in (b"all", b"everything", b"default") for name in names):
+            names = list(all_sections)
+        lines: List[str] = []
+        for name in names:
+            if name not in all_sections:
+                continue
+            if lines:
+                lines.append("")
+            lines.append(f"# {name.decode().capitalize()}")
+            lines.extend(f"{field}:{value}" for field, value in all_sections[name]().items())
+        return "\r\n".join(lines).encode() + (b"\r\n" if lines else b"")
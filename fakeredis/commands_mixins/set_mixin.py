@@ -3,7 +3,7 @@ from typing import Callable, Tuple, Any, Optional, List, Union
 
 from fakeredis import _msgs as msgs
 from fakeredis._commands import command, Key, Int, CommandItem
-from fakeredis._helpers import OK, SimpleError, casematch, Database, SimpleString
+from fakeredis._helpers import SimpleError, casematch, Database
 from fakeredis.model import ExpiringMembersSet
 
 
@@ -171,26 +171,3 @@ class SetCommandsMixin:
     @command((Key(), Key(ExpiringMembersSet)), (Key(ExpiringMembersSet),))
     def sunionstore(self, dst: CommandItem, *keys: CommandItem) -> Any:
         return _setop(lambda a, b: a | b, False, dst, *keys)
-
-    # Hyperloglog commands
-    # These are not quite the same as the real redis ones, which are
-    # approximate and store the results in a string. Instead, it is implemented
-    # on top of sets.
-
-    @command((Key(ExpiringMembersSet),), (bytes,))
-    def pfadd(self, key: CommandItem, *elements: bytes) -> int:
-        result = self.sadd(key, *elements)
-        # Per the documentation:
-        # - 1 if at least 1 HyperLogLog internal register was altered. 0 otherwise.
-        return 1 if result > 0 else 0
-
-    @command((Key(ExpiringMembersSet),), (Key(ExpiringMembersSet),))
-    def pfcount(self, *keys: CommandItem) -> int:
-        """Return the approximated cardinality of the set observed by the HyperLogLog at key(s)."""
-        return len(self.sunion(*keys))
-
-    @command((Key(ExpiringMembersSet), Key(ExpiringMembersSet)), (Key(ExpiringMembersSet),))
-    def pfmerge(self, dest: CommandItem, *sources: CommandItem) -> SimpleString:
-        """Merge N different HyperLogLogs into a single one."""
-        self.sunionstore(dest, *sources)
-        return OK
@@ -293,7 +293,7 @@ class SortedSetCommandsMixin:
     @command((Key(ZSet), Key(ZSet), bytes, bytes), (bytes,))
     def zrangestore(self, dest: CommandItem, src, start, stop, *args):
         results_list = self._zrange_args(src, start, stop, *args)
-        res = ZSet()
+        res = ZSet(config=self._db.config)
         for item in results_list:
             res.add(item, src.value.get(item))
         dest.update(res)
@@ -384,11 +384,11 @@ class SortedSetCommandsMixin:
 
     @command((Key(ZSet), Int), (bytes, bytes))
     def zscan(self, key: CommandItem, cursor: int, *args: bytes) -> List[Union[int, List[bytes]]]:
-        new_cursor, ans = self._scan(key.value.items(), cursor, *args)
+        new_cursor, ans = self._scan(key.value, cursor, *args)
         flat = []
-        for key, score in ans:
-            flat.append(key)
-            flat.append(self._encodefloat(score, False))
+        for member in ans:
+            flat.append(member)
+            flat.append(self._encodefloat(key.value[member], False))
         return [new_cursor, flat]
 
     @command((Key(ZSet), bytes))
@@ -474,7 +474,7 @@ class SortedSetCommandsMixin:
                     score = 0.0
                 out[member] = score
 
-        out_zset = ZSet()
+        out_zset = ZSet(config=self._db.config)
         for member, score in out.items():
             out_zset[member] = score
 
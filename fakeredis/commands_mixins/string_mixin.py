@@ -14,60 +14,7 @@ from fakeredis._commands import (
     CommandItem,
 )
 from fakeredis._helpers import OK, SimpleError, casematch, Database, SimpleString
-
-
-def _lcs(s1: bytes, s2: bytes) -> Tuple[int, bytes, List[List[object]]]:
-    l1 = len(s1)
-    l2 = len(s2)
-
-    # Opt array to store the optimal solution value till ith and jth position for 2 strings
-    opt: List[List[int]] = [[0] * (l2 + 1) for _ in range(0, l1 + 1)]
-
-    # Pi array to store the direction when calculating the actual sequence
-    pi: List[List[int]] = [[0] * (l2 + 1) for _ in range(0, l1 + 1)]
-
-    # Algorithm to calculate the length of the longest common subsequence
-    for r in range(1, l1 + 1):
-        for c in range(1, l2 + 1):
-            if s1[r - 1] == s2[c - 1]:
-                opt[r][c] = opt[r - 1][c - 1] + 1
-                pi[r][c] = 0
-            elif opt[r][c - 1] >= opt[r - 1][c]:
-                opt[r][c] = opt[r][c - 1]
-                pi[r][c] = 1
-            else:
-                opt[r][c] = opt[r - 1][c]
-                pi[r][c] = 2
-    # Length of the longest common subsequence is saved at opt[n][m]
-
-    # Algorithm to calculate the longest common subsequence using the Pi array
-    # Also calculate the list of matches
-    r, c = l1, l2
-    result = ""
-    matches = list()
-    s1ind, s2ind, curr_length = None, None, 0
-
-    while r > 0 and c > 0:
-        if pi[r][c] == 0:
-            result = chr(s1[r - 1]) + result
-            r -= 1
-            c -= 1
-            curr_length += 1
-        elif pi[r][c] == 2:
-            r -= 1
-        else:
-            c -= 1
-
-        if pi[r][c] == 0 and curr_length == 1:
-            s1ind = r
-            s2ind = c
-        elif pi[r][c] > 0 and curr_length > 0:
-            matches.append([[r, s1ind], [c, s2ind], curr_length])
-            s1ind, s2ind, curr_length = None, None, 0
-    if curr_length:
-        matches.append([[s1ind, r], [s2ind, c], curr_length])
-
-    return opt[l1][l2], result.encode(), matches
+from fakeredis._lcs import find_lcs, lcs_length
 
 
 class StringCommandsMixin:
@@ -89,13 +36,20 @@ class StringCommandsMixin:
         key.update(self._encodeint(c))
         return c
 
-    @command((Key(bytes), bytes))
+    @staticmethod
+    def _string_buffer(key: CommandItem) -> bytearray:
+        """Get the value of a string key as a bytearray that can be modified in place."""
+        value = key.get(b"")
+        return value if type(value) is bytearray else bytearray(value)
+
+    @command((Key(bytes), bytes), flags=msgs.FLAG_MUTABLE_STRING)
     def append(self, key: CommandItem, value: bytes) -> int:
-        old = key.get(b"")
-        if len(old) + len(value) > MAX_STRING_SIZE:
+        if len(key.get(b"")) + len(value) > MAX_STRING_SIZE:
             raise SimpleError(msgs.STRING_OVERFLOW_MSG)
-        key.update(key.get(b"") + value)
-        return len(key.value)
+        buffer = self._string_buffer(key)
+        buffer += value
+        key.update(buffer)
+        return len(buffer)
 
     @command((Key(bytes),))
     def decr(self, key: CommandItem) -> int:
@@ -116,11 +70,11 @@ class StringCommandsMixin:
         delete_keys(key)
         return res
 
-    @command(name=["GETRANGE", "SUBSTR"], fixed=(Key(bytes), Int, Int))
+    @command(name=["GETRANGE", "SUBSTR"], fixed=(Key(bytes), Int, Int), flags=msgs.FLAG_MUTABLE_STRING)
     def getrange(self, key: CommandItem, start: int, end: int) -> bytes:
         value: bytes = key.get(b"")
         start, end = fix_range_string(start, end, len(value))
-        return value[start:end]
+        return bytes(value[start:end])
 
     @command(fixed=(Key(bytes), bytes))
     def getset(self, key: CommandItem, value: bytes) -> bytes:
@@ -231,7 +185,7 @@ class StringCommandsMixin:
         key.value = value
         return 1
 
-    @command((Key(bytes), Int, bytes))
+    @command((Key(bytes), Int, bytes), flags=msgs.FLAG_MUTABLE_STRING)
     def setrange(self, key: CommandItem, offset: int, value: bytes) -> int:
         if offset < 0:
             raise SimpleError(msgs.INVALID_OFFSET_MSG)
@@ -239,14 +193,14 @@ class StringCommandsMixin:
             return len(key.get(b""))
         elif offset + len(value) > MAX_STRING_SIZE:
             raise SimpleError(msgs.STRING_OVERFLOW_MSG)
-        out = key.get(b"")
-        if len(out) < offset:
-            out += b"\x00" * (offset - len(out))
-        out = out[0:offset] + value + out[offset + len(value) :]
-        key.update(out)
-        return len(out)
-
-    @command((Key(bytes),))
+        buffer = self._string_buffer(key)
+        if len(buffer) < offset:
+            buffer += b"\x00" * (offset - len(buffer))
+        buffer[offset : offset + len(value)] = value
+        key.update(buffer)
+        return len(buffer)
+
+    @command((Key(bytes),), flags=msgs.FLAG_MUTABLE_STRING)
     def strlen(self, key: CommandItem) -> int:
         return len(key.get(b""))
 
@@ -295,11 +249,11 @@ class StringCommandsMixin:
         )
         if arg_idx and arg_len:
             raise SimpleError(msgs.LCS_CANT_HAVE_BOTH_LEN_AND_IDX)
-        lcs_len, lcs_val, matches = _lcs(s1, s2)
-        if not arg_idx and not arg_len:
-            return lcs_val
         if arg_len:
-            return lcs_len
+            return lcs_length(s1, s2)
+        lcs_len, lcs_val, matches = find_lcs(s1, s2)
+        if not arg_idx:
+            return lcs_val
         arg_minmatchlen = arg_minmatchlen if arg_minmatchlen else 0
         results = list(filter(lambda x: x[2] >= arg_minmatchlen, matches))
         if not arg_withmatchlen:
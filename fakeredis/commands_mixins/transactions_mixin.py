@@ -75,7 +75,7 @@ class TransactionsCommandsMixin:
         self._transaction_failed = False
         return OK
 
-    @command((), flags=msgs.FLAG_NO_SCRIPT)
+    @command((), flags=[msgs.FLAG_NO_SCRIPT])
     def unwatch(self) -> SimpleString:
         self._clear_watches()
         return OK
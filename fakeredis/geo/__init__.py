@@ -1,8 +1,11 @@
 from .geohash import geo_encode, geo_decode
+from .geohash_helper import hash_ranges_by_radius, hash_ranges_by_box
 from .haversine import distance
 
 __all__ = [
     "geo_encode",
     "geo_decode",
+    "hash_ranges_by_radius",
+    "hash_ranges_by_box",
     "distance",
 ]
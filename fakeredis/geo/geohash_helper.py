@@ -0,0 +1,105 @@
+"""Geohash cells covering a search area, like redis' `geohashCalculateAreasByShapeWGS84`.
+
+Members of a geo set are scored with their 10 characters geohash: 25 bits of longitude interleaved with 25 bits of
+latitude, the longitude bit first. The members within a cell of `step` bits per coordinate therefore have scores in a
+contiguous range. The cells used for a search cover the bounding box of its area, at the largest step where a cell is at
+least as large as half the box, so these are at most the cell of the center and its 8 neighbours.
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+from .geohash import base32
+from .haversine import EARTH_RADIUS
+
+HASH_LENGTH = 10
+STEP_MAX = HASH_LENGTH * 5 // 2
+# Margin in degrees added to the bounding boxes, so that rounding errors do not drop members on their edges
+_MARGIN = 1e-9
+
+HashRange = Tuple[str, Optional[str]]
+
+
+def _hash_string(value: int) -> str:
+    return "".join(base32[(value >> shift) & 31] for shift in range(HASH_LENGTH * 5 - 5, -1, -5))
+
+
+def _interleave(lon_index: int, lat_index: int, step: int) -> int:
+    result = 0
+    for bit in range(step - 1, -1, -1):
+        result = (result << 2) | (((lon_index >> bit) & 1) << 1) | ((lat_index >> bit) & 1)
+    return result
+
+
+def _radius_deltas(lat: float, radius: float) -> Tuple[float, float]:
+    """Half the height and half the width, in degrees, of the bounding box of the points within `radius` meters."""
+    angle = radius / EARTH_RADIUS
+    lat_delta = math.degrees(angle)
+    if abs(lat) + lat_delta >= 90:
+        # The area contains a pole
+        return lat_delta, 180.0
+    return lat_delta, math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+
+
+def _box_deltas(lat: float, width: float, height: float) -> Tuple[float, float]:
+    """Half the height and half the width, in degrees, of the bounding box of a `width` by `height` meters box.
+
+    The box is the area checked by redis: the points at most `height / 2` meters north or south of the center, and at
+    most `width / 2` meters east or west of it along their parallel.
+    """
+    lat_delta = math.degrees(height / 2 / EARTH_RADIUS)
+    angle = width / 4 / EARTH_RADIUS
+    top = abs(lat) + lat_delta
+    if top >= 90 or angle >= math.pi / 2:
+        return lat_delta, 180.0
+    ratio = math.sin(angle) / math.cos(math.radians(top))
+    if ratio >= 1:
+        return lat_delta, 180.0
+    return lat_delta, math.degrees(2 * math.asin(ratio))
+
+
+def _hash_ranges(lat: float, long: float, lat_delta: float, lon_delta: float) -> List[HashRange]:
+    """Get the ranges `[start, end)` of the scores of the cells covering a bounding box, sorted.
+
+    `end` is None for a range going to the last cell.
+    """
+    lat_delta, lon_delta = lat_delta + _MARGIN, lon_delta + _MARGIN
+    step = STEP_MAX
+    while step > 0 and (360.0 / (1 << step) < lon_delta or 180.0 / (1 << step) < lat_delta):
+        step -= 1
+    cells = 1 << step
+    lat_low = max(0, math.floor((lat - lat_delta + 90) / 180 * cells))
+    lat_high = min(cells - 1, math.floor((lat + lat_delta + 90) / 180 * cells))
+    lon_low = math.floor((long - lon_delta + 180) / 360 * cells)
+    lon_high = math.floor((long + lon_delta + 180) / 360 * cells)
+    if lon_high - lon_low + 1 >= cells:
+        lon_indexes = set(range(cells))
+    else:
+        # Cells past the antimeridian wrap around
+        lon_indexes = {index % cells for index in range(lon_low, lon_high + 1)}
+
+    shift = 2 * (STEP_MAX - step)
+    cell_hashes = sorted(
+        _interleave(lon_index, lat_index, step)
+        for lon_index in lon_indexes
+        for lat_index in range(lat_low, lat_high + 1)
+    )
+    ranges: List[List[int]] = []
+    for cell_hash in cell_hashes:
+        if ranges and ranges[-1][1] == cell_hash << shift:
+            ranges[-1][1] = (cell_hash + 1) << shift
+        else:
+            ranges.append([cell_hash << shift, (cell_hash + 1) << shift])
+    end_of_hashes = 1 << (2 * STEP_MAX)
+    return [(_hash_string(start), _hash_string(end) if end < end_of_hashes else None) for start, end in ranges]
+
+
+def hash_ranges_by_radius(lat: float, long: float, radius: float) -> List[HashRange]:
+    """Get the ranges of scores of the members which may be within `radius` meters of `(lat, long)`."""
+    return _hash_ranges(lat, long, *_radius_deltas(lat, radius))
+
+
+def hash_ranges_by_box(lat: float, long: float, width: float, height: float) -> List[HashRange]:
+    """Get the ranges of scores of the members which may be within the `width` by `height` meters box centered on
+    `(lat, long)`."""
+    return _hash_ranges(lat, long, *_box_deltas(lat, width, height))
@@ -1,11 +1,11 @@
 import math
 from typing import Tuple
 
+EARTH_RADIUS = 6372797.560856  # Earth's quatratic mean radius for WGS-84
+
 
 def distance(origin: Tuple[float, float], destination: Tuple[float, float]) -> float:
     """Calculate the Haversine distance in meters."""
-    radius = 6372797.560856  # Earth's quatratic mean radius for WGS-84
-
     lat1, lon1, lat2, lon2 = map(math.radians, [origin[0], origin[1], destination[0], destination[1]])
 
     dlon = lon2 - lon1
@@ -13,4 +13,4 @@ def distance(origin: Tuple[float, float], destination: Tuple[float, float]) -> f
     a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
     c = 2 * math.asin(math.sqrt(a))
 
-    return c * radius
+    return c * EARTH_RADIUS
@@ -1,5 +1,7 @@
 from ._expiring_members_set import ExpiringMembersSet
 from ._hash import Hash
+from ._hyperloglog import HyperLogLog
+from ._quicklist import QuickList
 from ._stream import XStream, StreamEntryKey, StreamGroup, StreamRangeTest
 from ._timeseries_model import TimeSeries, TimeSeriesRule, AGGREGATORS
 from ._topk import HeavyKeeper
@@ -24,6 +26,8 @@ __all__ = [
     "AGGREGATORS",
     "HeavyKeeper",
     "Hash",
+    "HyperLogLog",
+    "QuickList",
     "ExpiringMembersSet",
     "get_all_commands_info",
     "get_command_info",
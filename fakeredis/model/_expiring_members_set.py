@@ -1,8 +1,10 @@
+import heapq
 import sys
-from typing import Iterable, Optional, Any, Dict, Union, Set
+from typing import Iterable, Optional, Any, Dict, Union, Set, List, Tuple
 
 from fakeredis import _msgs as msgs
-from fakeredis._helpers import current_time
+from fakeredis._helpers import ScanIndex, current_time
+from ._listpack import ConfigDict, IntSet, as_int64, config_limit
 
 if sys.version_info >= (3, 11):
     from typing import Self
@@ -11,79 +13,195 @@ else:
 
 
 class ExpiringMembersSet:
+    """A set whose members can have an expiration time.
+
+    Sets of integers are stored as an `IntSet`, like the intset encoding of redis. They are converted to a dict mapping
+    members to their expiration time once they have more than `set-max-intset-entries` members, a member which is not
+    an integer, or a member with an expiration time.
+    """
+
+    __slots__ = ["_values", "_deadlines", "_scan_index", "_max_intset_entries", "__weakref__"]
+
     DECODE_ERROR = msgs.INVALID_HASH_MSG
     redis_type = b"set"
-
-    def __init__(self, values: Dict[bytes, Optional[int]] = None, *args: Any, **kwargs: Any) -> None:
-        super().__init__(*args, **kwargs)
-        self._values: Dict[bytes, Optional[int]] = values or dict()
+    ENCODING_LIMITS = (b"set-max-intset-entries",)
+    MAX_INTSET_ENTRIES = 512
+
+    def __init__(self, values: Dict[bytes, Optional[int]] = None, config: ConfigDict = None) -> None:
+        self._max_intset_entries = config_limit(config, b"set-max-intset-entries", self.MAX_INTSET_ENTRIES)
+        # Maps members to their expiration time, or None for members without one
+        self._values: Any = self._encode(values or dict())
+        # Members in buckets for SSCAN, built by the first scan of the hashtable encoding and then maintained
+        self._scan_index: Optional[ScanIndex] = None
+        # Heap of (when_ms, member) for members with an expiration time. Entries which no longer match
+        # _values are skipped when popped.
+        self._deadlines: List[Tuple[int, bytes]] = []
+        self._rebuild_deadlines()
+
+    @property
+    def encoding(self) -> bytes:
+        return b"intset" if isinstance(self._values, IntSet) else b"hashtable"
+
+    def _encode(self, values: Dict[bytes, Optional[int]]) -> Any:
+        """Get `values` as an `IntSet` if it can hold them."""
+        numbers = self._intset_numbers(values.items())
+        return IntSet(numbers) if numbers is not None else values
+
+    def _intset_numbers(self, items: Iterable[Tuple[bytes, Optional[int]]]) -> Optional[List[int]]:
+        """Get the integers of members without expiration time, or None if they cannot all be held by an `IntSet`."""
+        numbers: List[int] = []
+        for member, when_ms in items:
+            number = as_int64(member) if when_ms is None else None
+            if number is None or len(numbers) == self._max_intset_entries:
+                return None
+            numbers.append(number)
+        return numbers
+
+    def _convert(self) -> None:
+        if isinstance(self._values, IntSet):
+            self._values = dict(self._values.items())
+
+    def _derived(self, values: Dict[bytes, Optional[int]]) -> Self:
+        """Get a set of `values`, with the same encoding limits."""
+        result = ExpiringMembersSet()
+        result._max_intset_entries = self._max_intset_entries
+        result._values = result._encode(values)
+        result._rebuild_deadlines()
+        return result
+
+    def _rebuild_deadlines(self) -> None:
+        if isinstance(self._values, IntSet):
+            self._deadlines = []
+            return
+        self._deadlines = [(when, k) for k, when in self._values.items() if when is not None]
+        heapq.heapify(self._deadlines)
+
+    def _push_deadline(self, when_ms: int, key: bytes) -> None:
+        heapq.heappush(self._deadlines, (when_ms, key))
+        # Drop outdated entries once they outnumber the members
+        if len(self._deadlines) > 2 * len(self._values) + 64:
+            self._rebuild_deadlines()
 
     def _expire_members(self) -> None:
-        removed = []
+        deadlines = self._deadlines
+        if not deadlines:
+            return
         now = current_time()
-        for k in self._values:
-            if self._values[k] is not None and self._values[k] < now:
-                self._values.pop(k, None)
-                removed.append(k)
+        while deadlines and deadlines[0][0] < now:
+            when_ms, k = heapq.heappop(deadlines)
+            if self._values.get(k, None) == when_ms:
+                del self._values[k]
+                if self._scan_index is not None:
+                    self._scan_index.discard(k)
 
     def set_member_expireat(self, key: bytes, when_ms: int) -> int:
         now = current_time()
         if when_ms <= now:
-            self._values.pop(key, None)
+            self.discard(key)
             return 2
-        self._values[key] = when_ms
+        if self._values.get(key, None) != when_ms:
+            self._convert()
+            self._values[key] = when_ms
+            if self._scan_index is not None:
+                self._scan_index.add(key)
+            self._push_deadline(when_ms, key)
         return 1
 
     def clear_key_expireat(self, key: bytes) -> bool:
+        if self._scan_index is not None:
+            self._scan_index.discard(key)
         return self._values.pop(key, None) is not None
 
     def get_key_expireat(self, key: bytes) -> Optional[int]:
         self._expire_members()
-        return self._values.get(key, None)
+        when_ms: Optional[int] = self._values.get(key, None)
+        return when_ms
 
     def __contains__(self, key: bytes) -> bool:
         self._expire_members()
-        return self._values.__contains__(key)
+        return key in self._values
 
     def __delitem__(self, key: bytes) -> None:
-        self._values.pop(key, None)
+        self.discard(key)
 
     def __len__(self) -> int:
+        self._expire_members()
         return len(self._values)
 
     def __iter__(self) -> Iterable[bytes]:
-        return iter({k for k in self._values if self._values[k] is None or self._values[k] >= current_time()})
+        self._expire_members()
+        return iter(set(self._values))
 
     def __get__(self, instance, owner=None) -> Set[bytes]:
         self._expire_members()
         return set(self._values.keys())
 
     def __sub__(self, other: Self) -> Self:
-        return ExpiringMembersSet({k: v for k, v in self._values.items() if k not in other._values})
+        return self._derived({k: v for k, v in self._values.items() if k not in other._values})
 
     def __and__(self, other: Self) -> Self:
-        return ExpiringMembersSet({k: v for k, v in self._values.items() if k in other._values})
+        return self._derived({k: v for k, v in self._values.items() if k in other._values})
 
     def __or__(self, other: Self) -> Self:
-        return ExpiringMembersSet({k: v for k, v in self._values.items()}).update(other)
+        return self._derived(dict(self._values.items())).update(other)
 
     def update(self, other: Union[Self, Iterable[bytes]]) -> Self:
         self._expire_members()
         if isinstance(other, ExpiringMembersSet):
-            self._values.update(other._values)
-            return self
-        for value in other:
-            self._values[value] = None
+            items = other._values.items()
+        else:
+            items = [(value, None) for value in other]
+        if isinstance(self._values, IntSet):
+            numbers = self._intset_numbers(items)
+            if numbers is not None:
+                for number in numbers:
+                    self._values.add(number)
+                if len(self._values) <= self._max_intset_entries:
+                    return self
+            self._convert()
+        for k, when_ms in items:
+            self._values[k] = when_ms
+            if when_ms is not None:
+                self._push_deadline(when_ms, k)
+            if self._scan_index is not None:
+                self._scan_index.add(k)
         return self
 
     def discard(self, key: bytes) -> None:
         self._values.pop(key, None)
+        if self._scan_index is not None:
+            self._scan_index.discard(key)
 
     def remove(self, key: bytes) -> None:
         self._values.pop(key)
+        if self._scan_index is not None:
+            self._scan_index.discard(key)
 
     def add(self, key: bytes) -> None:
+        if isinstance(self._values, IntSet):
+            number = as_int64(key)
+            if number is not None and (len(self._values) < self._max_intset_entries or key in self._values):
+                self._values.add(number)
+                return
+            self._convert()
         self._values[key] = None
+        if self._scan_index is not None:
+            self._scan_index.add(key)
+
+    def scan(self, cursor: int, count: int) -> Tuple[int, List[bytes]]:
+        """Get about `count` members from `cursor` on, and the next cursor, see `ScanIndex`.
+
+        Like redis, all the members are returned at once with the intset encoding.
+        """
+        self._expire_members()
+        if isinstance(self._values, IntSet):
+            return 0, list(self._values)
+        if self._scan_index is None:
+            self._scan_index = ScanIndex(self._values)
+        return self._scan_index.scan(cursor, count)
 
     def copy(self) -> Self:
-        return ExpiringMembersSet(self._values.copy())
+        result = self._derived({})
+        result._values = self._values.copy()
+        result._rebuild_deadlines()
+        return result
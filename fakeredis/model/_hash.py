@@ -1,43 +1,100 @@
-from typing import Iterable, Tuple, Optional, Any, Dict
+import heapq
+from typing import Iterable, Tuple, Optional, Any, Dict, List, Union
 
 from fakeredis import _msgs as msgs
-from fakeredis._helpers import current_time
+from fakeredis._helpers import ScanIndex, current_time
+from ._listpack import ConfigDict, ListPackDict, config_limit
 
 
 class Hash:
+    """A hash.
+
+    Small hashes are stored as a `ListPackDict`, like the listpack encoding of redis. They are converted to a dict once
+    they have more than `hash-max-listpack-entries` fields, or a field or value longer than `hash-max-listpack-value`.
+    """
+
+    __slots__ = [
+        "_expirations",
+        "_deadlines",
+        "_values",
+        "_scan_index",
+        "_max_listpack_entries",
+        "_max_listpack_value",
+        "__weakref__",
+    ]
+
     DECODE_ERROR = msgs.INVALID_HASH_MSG
     redis_type = b"hash"
-
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
-        super().__init__(*args, **kwargs)
-        self._expirations: Dict[bytes, int] = dict()
-        self._values: Dict[bytes, Any] = dict()
+    ENCODING_LIMITS = (b"hash-max-listpack-entries", b"hash-max-listpack-value")
+    MAX_LISTPACK_ENTRIES = 128
+    MAX_LISTPACK_VALUE = 64
+
+    def __init__(self, config: ConfigDict = None) -> None:
+        # Expiration times of the volatile fields, allocated when a field first gets one
+        self._expirations: Optional[Dict[bytes, int]] = None
+        # Heap of (when_ms, field) for the fields in _expirations, allocated with it. Entries which no longer match
+        # _expirations are skipped when popped.
+        self._deadlines: Optional[List[Tuple[int, bytes]]] = None
+        self._values: Union[ListPackDict, Dict[bytes, Any]] = ListPackDict()
+        # Fields in buckets for HSCAN, built by the first scan of the hashtable encoding and then maintained
+        self._scan_index: Optional[ScanIndex] = None
+        self._max_listpack_entries = config_limit(config, b"hash-max-listpack-entries", self.MAX_LISTPACK_ENTRIES)
+        self._max_listpack_value = config_limit(config, b"hash-max-listpack-value", self.MAX_LISTPACK_VALUE)
+
+    @property
+    def encoding(self) -> bytes:
+        return b"listpack" if isinstance(self._values, ListPackDict) else b"hashtable"
+
+    def _maybe_convert(self, values: Dict[bytes, Any]) -> None:
+        """Convert to a dict if the listpack encoding cannot hold the fields once `values` are set."""
+        if not isinstance(self._values, ListPackDict):
+            return
+        max_value = self._max_listpack_value
+        new_fields = sum(1 for key in values if key not in self._values)
+        if len(self._values) + new_fields > self._max_listpack_entries or any(
+            len(key) > max_value or len(value) > max_value for key, value in values.items()
+        ):
+            self._values = dict(self._values.items())
 
     def _expire_keys(self) -> None:
-        removed = []
+        deadlines, expirations = self._deadlines, self._expirations
+        if not deadlines or expirations is None:
+            return
         now = current_time()
-        for k in self._expirations:
-            if self._expirations[k] < now:
+        while deadlines and deadlines[0][0] < now:
+            when_ms, k = heapq.heappop(deadlines)
+            if expirations.get(k) == when_ms:
                 self._values.pop(k, None)
-                removed.append(k)
-        for k in removed:
-            self._expirations.pop(k, None)
+                del expirations[k]
+                if self._scan_index is not None:
+                    self._scan_index.discard(k)
 
     def set_key_expireat(self, key: bytes, when_ms: int) -> int:
         now = current_time()
         if when_ms <= now:
             self._values.pop(key, None)
-            self._expirations.pop(key, None)
+            self.clear_key_expireat(key)
+            if self._scan_index is not None:
+                self._scan_index.discard(key)
             return 2
-        self._expirations[key] = when_ms
+        if self._expirations is None or self._deadlines is None:
+            self._expirations, self._deadlines = {}, []
+        expirations, deadlines = self._expirations, self._deadlines
+        if expirations.get(key) != when_ms:
+            expirations[key] = when_ms
+            heapq.heappush(deadlines, (when_ms, key))
+            # Drop outdated entries once they outnumber the volatile fields
+            if len(deadlines) > 2 * len(expirations) + 64:
+                self._deadlines = [(when, k) for k, when in expirations.items()]
+                heapq.heapify(self._deadlines)
         return 1
 
     def clear_key_expireat(self, key: bytes) -> bool:
-        return self._expirations.pop(key, None) is not None
+        return self._expirations is not None and self._expirations.pop(key, None) is not None
 
     def get_key_expireat(self, key: bytes) -> Optional[int]:
         self._expire_keys()
-        return self._expirations.get(key, None)
+        return self._expirations.get(key, None) if self._expirations is not None else None
 
     def __getitem__(self, key: bytes) -> Any:
         self._expire_keys()
@@ -48,12 +105,17 @@ class Hash:
         return self._values.__contains__(key)
 
     def __setitem__(self, key: bytes, value: Any) -> None:
-        self._expirations.pop(key, None)
+        self.clear_key_expireat(key)
+        self._maybe_convert({key: value})
         self._values[key] = value
+        if self._scan_index is not None:
+            self._scan_index.add(key)
 
     def __delitem__(self, key: bytes) -> None:
         self._values.pop(key, None)
-        self._expirations.pop(key, None)
+        self.clear_key_expireat(key)
+        if self._scan_index is not None:
+            self._scan_index.discard(key)
 
     def __len__(self) -> int:
         return len(self._values)
@@ -78,7 +140,11 @@ class Hash:
 
     def update(self, values: Dict[bytes, Any]) -> None:
         self._expire_keys()
+        self._maybe_convert(values)
         self._values.update(values)
+        if self._scan_index is not None:
+            for key in values:
+                self._scan_index.add(key)
 
     def getall(self) -> Dict[bytes, Any]:
         self._expire_keys()
@@ -86,4 +152,18 @@ class Hash:
 
     def pop(self, key: bytes, d: Any = None) -> Any:
         self._expire_keys()
+        if self._scan_index is not None:
+            self._scan_index.discard(key)
         return self._values.pop(key, d)
+
+    def scan(self, cursor: int, count: int) -> Tuple[int, List[bytes]]:
+        """Get about `count` fields from `cursor` on, and the next cursor, see `ScanIndex`.
+
+        Like redis, all the fields are returned at once with the listpack encoding.
+        """
+        self._expire_keys()
+        if isinstance(self._values, ListPackDict):
+            return 0, list(self._values)
+        if self._scan_index is None:
+            self._scan_index = ScanIndex(self._values)
+        return self._scan_index.scan(cursor, count)
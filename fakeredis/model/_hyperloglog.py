@@ -0,0 +1,344 @@
+import math
+import re
+import struct
+from typing import Iterable, Optional, Sequence, Tuple, Union
+
+from fakeredis import _msgs as msgs
+from fakeredis._helpers import SimpleError
+
+_MASK64 = (1 << 64) - 1
+
+
+def _murmurhash64a(key: bytes, seed: int = 0xADC83B19) -> int:
+    """MurmurHash64A, the hash function used by the HyperLogLog of redis."""
+    m = 0xC6A4A7935BD1E995
+    h = (seed ^ (len(key) * m)) & _MASK64
+    blocks = len(key) // 8
+    for k in struct.unpack_from(f"<{blocks}Q", key):
+        k = (k * m) & _MASK64
+        k ^= k >> 47
+        k = (k * m) & _MASK64
+        h ^= k
+        h = (h * m) & _MASK64
+    tail = key[blocks * 8 :]
+    if tail:
+        h ^= int.from_bytes(tail, "little")
+        h = (h * m) & _MASK64
+    h ^= h >> 47
+    h = (h * m) & _MASK64
+    h ^= h >> 47
+    return h
+
+
+def _tau(x: float) -> float:
+    if x == 0.0 or x == 1.0:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        previous = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if previous == z:
+            return z / 3
+
+
+def _sigma(x: float) -> float:
+    if x == 1.0:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous = z
+        z += x * y
+        y += y
+        if previous == z:
+            return z
+
+
+class HyperLogLog:
+    """A HyperLogLog with 16384 registers of 6 bits, stored in a string value with the same layout as in redis.
+
+    The value starts with a 16 bytes header: the magic `HYLL`, the encoding, 3 unused bytes and the cached cardinality
+    as a 64 bits little endian integer, whose most significant bit is set when the cache is not valid. The registers
+    follow, either dense (6 bits per register, least significant bits first) or sparse (run-length encoded with the
+    ZERO, XZERO and VAL opcodes). Values are modified in place, so they must be bytearrays.
+
+    Registers are exchanged between HyperLogLogs as bytes holding one register per byte.
+    """
+
+    __slots__ = ["data"]
+
+    P = 14
+    Q = 64 - P
+    REGISTERS = 1 << P
+    MAGIC = b"HYLL"
+    HEADER_SIZE = 16
+    DENSE = 0
+    SPARSE = 1
+    DENSE_SIZE = HEADER_SIZE + REGISTERS * 6 // 8
+    SPARSE_VAL_MAX_VALUE = 32
+    SPARSE_VAL_MAX_LEN = 4
+    SPARSE_ZERO_MAX_LEN = 64
+    SPARSE_XZERO_MAX_LEN = 16384
+    ALPHA_INF = 0.721347520444481703680
+    SPARSE_MAX_BYTES = 3000  # Default of the `hll-sparse-max-bytes` config
+
+    # Masks used to convert between dense registers and one register per byte, 4 registers (3 bytes) at a time
+    _LANES = int.from_bytes(b"\x3f\x00\x00\x00" * (REGISTERS // 4), "little")
+    _HIGH_BITS = int.from_bytes(b"\x80" * REGISTERS, "little")
+    _RUNS = re.compile(b"(.)\\1*", re.DOTALL)
+
+    def __init__(self, data: bytearray) -> None:
+        self.data = data
+
+    @classmethod
+    def create(cls) -> "HyperLogLog":
+        """Create an empty sparse HyperLogLog, with a valid cached cardinality of 0."""
+        data = bytearray(cls.MAGIC + bytes([cls.SPARSE]) + bytes(11))
+        for run in range(cls.REGISTERS, 0, -cls.SPARSE_XZERO_MAX_LEN):
+            data += cls._xzero(min(run, cls.SPARSE_XZERO_MAX_LEN))
+        return cls(data)
+
+    @classmethod
+    def from_value(cls, value: Union[bytes, bytearray]) -> "HyperLogLog":
+        """Wrap a string value, which is copied unless it is a bytearray. Raise an error if it is not a HyperLogLog."""
+        if (
+            len(value) < cls.HEADER_SIZE
+            or value[:4] != cls.MAGIC
+            or value[4] > cls.SPARSE
+            or (value[4] == cls.DENSE and len(value) != cls.DENSE_SIZE)
+        ):
+            raise SimpleError(msgs.INVALID_HYPERLOGLOG_MSG)
+        return cls(value if type(value) is bytearray else bytearray(value))
+
+    @property
+    def is_dense(self) -> bool:
+        return self.data[4] == self.DENSE
+
+    @staticmethod
+    def _zero(run: int) -> bytes:
+        return bytes([run - 1])
+
+    @staticmethod
+    def _xzero(run: int) -> bytes:
+        return bytes([0x40 | (run - 1) >> 8, (run - 1) & 0xFF])
+
+    @staticmethod
+    def _val(value: int, run: int) -> int:
+        return 0x80 | (value - 1) << 2 | (run - 1)
+
+    @classmethod
+    def _zeros(cls, run: int) -> bytes:
+        return cls._xzero(run) if run > cls.SPARSE_ZERO_MAX_LEN else cls._zero(run)
+
+    def _opcodes(self) -> Iterable[Tuple[int, int, int, int]]:
+        """Iterate over the sparse opcodes as (position, length of the opcode, value, number of registers)."""
+        data = self.data
+        p = self.HEADER_SIZE
+        while p < len(data):
+            opcode = data[p]
+            if opcode & 0x80:
+                yield p, 1, ((opcode >> 2) & 0x1F) + 1, (opcode & 0x3) + 1
+                p += 1
+            elif opcode & 0x40:
+                if p + 1 >= len(data):
+                    raise SimpleError(msgs.CORRUPTED_HYPERLOGLOG_MSG)
+                yield p, 2, 0, ((opcode & 0x3F) << 8 | data[p + 1]) + 1
+                p += 2
+            else:
+                yield p, 1, 0, opcode + 1
+                p += 1
+
+    @staticmethod
+    def pattern(element: bytes) -> Tuple[int, int]:
+        """Get the index of the register of an element, and the length of the run of zeros (plus one) in its hash."""
+        hash_ = _murmurhash64a(element)
+        index = hash_ & (HyperLogLog.REGISTERS - 1)
+        hash_ = (hash_ >> HyperLogLog.P) | (1 << HyperLogLog.Q)
+        return index, (hash_ & -hash_).bit_length()
+
+    def registers(self) -> bytes:
+        if self.is_dense:
+            dense = self.data[self.HEADER_SIZE :]
+            groups = bytearray(self.REGISTERS)
+            for i in range(3):
+                groups[i::4] = dense[i::3]
+            packed = int.from_bytes(groups, "little")
+            spread = 0
+            for i in range(4):
+                spread |= ((packed >> (6 * i)) & self._LANES) << (8 * i)
+            return spread.to_bytes(self.REGISTERS, "little")
+        registers = bytearray()
+        for _, _, value, run in self._opcodes():
+            registers += bytes([value]) * run
+        if len(registers) != self.REGISTERS:
+            raise SimpleError(msgs.CORRUPTED_HYPERLOGLOG_MSG)
+        return bytes(registers)
+
+    @classmethod
+    def _dense_from_registers(cls, registers: bytes) -> bytearray:
+        spread = int.from_bytes(registers, "little")
+        packed = 0
+        for i in range(4):
+            packed |= ((spread >> (8 * i)) & cls._LANES) << (6 * i)
+        groups = packed.to_bytes(cls.REGISTERS, "little")
+        dense = bytearray(cls.DENSE_SIZE - cls.HEADER_SIZE)
+        for i in range(3):
+            dense[i::3] = groups[i::4]
+        return dense
+
+    @classmethod
+    def _sparse_from_registers(cls, registers: bytes) -> Optional[bytearray]:
+        """Encode registers as sparse, or return None if a register is too large for the sparse encoding."""
+        sparse = bytearray()
+        for match in cls._RUNS.finditer(registers):
+            value, run = registers[match.start()], match.end() - match.start()
+            if value == 0:
+                while run:
+                    length = min(run, cls.SPARSE_XZERO_MAX_LEN)
+                    sparse += cls._zeros(length)
+                    run -= length
+            elif value > cls.SPARSE_VAL_MAX_VALUE:
+                return None
+            else:
+                while run:
+                    length = min(run, cls.SPARSE_VAL_MAX_LEN)
+                    sparse.append(cls._val(value, length))
+                    run -= length
+        return sparse
+
+    @classmethod
+    def union(cls, hlls: Sequence["HyperLogLog"]) -> bytes:
+        """Get the maximum of the registers of several HyperLogLogs, computed 8 bits lanes at a time."""
+        if not hlls:
+            return bytes(cls.REGISTERS)
+        result = int.from_bytes(hlls[0].registers(), "little")
+        for hll in hlls[1:]:
+            other = int.from_bytes(hll.registers(), "little")
+            greater = (((result | cls._HIGH_BITS) - other) & cls._HIGH_BITS) >> 7  # 1 in lanes where result >= other
+            result = other ^ ((result ^ other) & (greater * 0xFF))
+        return result.to_bytes(cls.REGISTERS, "little")
+
+    @classmethod
+    def estimate(cls, registers: bytes) -> int:
+        """Estimate the cardinality from the registers, as in redis (Otmar Ertl, arXiv:1702.01284)."""
+        m = cls.REGISTERS
+        histogram = [registers.count(value) for value in range(cls.Q + 2)]
+        z = m * _tau((m - histogram[cls.Q + 1]) / m)
+        for j in range(cls.Q, 0, -1):
+            z += histogram[j]
+            z *= 0.5
+        z += m * _sigma(histogram[0] / m)
+        return int(math.floor(cls.ALPHA_INF * m * m / z + 0.5))
+
+    def cached_count(self) -> Optional[int]:
+        if self.data[15] & 0x80:
+            return None
+        return int.from_bytes(self.data[8:16], "little")
+
+    def count(self) -> int:
+        """Get the cardinality, using and updating the cache."""
+        count = self.cached_count()
+        if count is None:
+            count = self.estimate(self.registers())
+            self.data[8:16] = count.to_bytes(8, "little")
+        return count
+
+    def _invalidate_cache(self) -> None:
+        self.data[15] |= 0x80
+
+    def _to_dense(self) -> None:
+        self.data[self.HEADER_SIZE :] = self._dense_from_registers(self.registers())
+        self.data[4] = self.DENSE
+
+    def set_registers(self, registers: bytes, dense: bool, sparse_max_bytes: int = SPARSE_MAX_BYTES) -> None:
+        """Replace all the registers, using the sparse encoding if `dense` is false and they fit in it."""
+        sparse = None if dense else self._sparse_from_registers(registers)
+        if sparse is not None and self.HEADER_SIZE + len(sparse) <= sparse_max_bytes:
+            self.data[self.HEADER_SIZE :] = sparse
+            self.data[4] = self.SPARSE
+        else:
+            self.data[self.HEADER_SIZE :] = self._dense_from_registers(registers)
+            self.data[4] = self.DENSE
+        self._invalidate_cache()
+
+    def add(self, elements: Iterable[bytes], sparse_max_bytes: int = SPARSE_MAX_BYTES) -> bool:
+        """Add elements, return whether a register was changed."""
+        changed = False
+        for element in elements:
+            index, count = self.pattern(element)
+            if self.is_dense:
+                changed |= self._dense_set(index, count)
+            else:
+                changed |= self._sparse_set(index, count, sparse_max_bytes)
+        if changed:
+            self._invalidate_cache()
+        return changed
+
+    def _dense_set(self, index: int, count: int) -> bool:
+        data = self.data
+        position = index * 6
+        byte, shift = self.HEADER_SIZE + (position >> 3), position & 7
+        # The register overlaps the next byte when it does not start in the first 3 bits
+        old = data[byte] >> shift
+        if shift > 2:
+            old |= data[byte + 1] << (8 - shift)
+        if count <= old & 0x3F:
+            return False
+        data[byte] = (data[byte] & ~(0x3F << shift) & 0xFF) | ((count << shift) & 0xFF)
+        if shift > 2:
+            data[byte + 1] = (data[byte + 1] & ~(0x3F >> (8 - shift))) | (count >> (8 - shift))
+        return True
+
+    def _sparse_set(self, index: int, count: int, sparse_max_bytes: int) -> bool:
+        """Set a register in the sparse encoding, splitting the opcode holding it like redis does."""
+        if count > self.SPARSE_VAL_MAX_VALUE:
+            self._to_dense()
+            return self._dense_set(index, count)
+        first, previous = 0, -1
+        for position, length, value, run in self._opcodes():
+            if index < first + run:
+                break
+            previous = position
+            first += run
+        else:
+            raise SimpleError(msgs.CORRUPTED_HYPERLOGLOG_MSG)
+
+        if value >= count:
+            return False
+        if value and run == 1:
+            self.data[position] = self._val(count, 1)
+            self._merge_values(previous)
+            return True
+
+        before, after = index - first, first + run - 1 - index
+        sequence = bytearray()
+        if before:
+            sequence += bytes([self._val(value, before)]) if value else self._zeros(before)
+        sequence.append(self._val(count, 1))
+        if after:
+            sequence += bytes([self._val(value, after)]) if value else self._zeros(after)
+        if len(sequence) > length and len(self.data) + len(sequence) - length > sparse_max_bytes:
+            self._to_dense()
+            return self._dense_set(index, count)
+        self.data[position : position + length] = sequence
+        self._merge_values(previous)
+        return True
+
+    def _merge_values(self, position: int) -> None:
+        """Merge adjacent VAL opcodes with the same value, scanning up to 5 opcodes from `position`."""
+        data = self.data
+        p = position if position != -1 else self.HEADER_SIZE
+        scan = 5
+        while p < len(data) and scan:
+            scan -= 1
+            if not data[p] & 0x80:
+                p += 2 if data[p] & 0x40 else 1
+                continue
+            if p + 1 < len(data) and data[p + 1] & 0x80 and (data[p] ^ data[p + 1]) & 0x7C == 0:
+                run = (data[p] & 0x3) + (data[p + 1] & 0x3) + 2
+                if run <= self.SPARSE_VAL_MAX_LEN:
+                    data[p : p + 2] = bytes([self._val(((data[p] >> 2) & 0x1F) + 1, run)])
+                    continue
+            p += 1
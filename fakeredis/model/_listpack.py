@@ -0,0 +1,216 @@
+"""Compact encodings of small collections, like the listpack and intset encodings of redis.
+
+A small collection is stored in a single flat container. Lookups scan it, which is fast enough for the few elements it
+holds, and it uses much less memory than the hash tables and sorted lists of the full encodings. The collections
+convert themselves to their full encoding once they grow past the limits configured for them, e.g.
+`zset-max-listpack-entries`.
+"""
+
+import bisect
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+ConfigDict = Optional[Dict[bytes, bytes]]
+
+
+def config_limit(config: ConfigDict, name: bytes, default: int) -> int:
+    """Read an encoding limit from the server configuration, accepting the ziplist names used before redis 7."""
+    if not config:
+        return default
+    value = config.get(name, config.get(name.replace(b"listpack", b"ziplist")))
+    return int(value) if value is not None else default
+
+
+class SortedListPack(list):  # type: ignore
+    """A sorted list, with the subset of the API of `sortedcontainers.SortedList` used by `ZSet`."""
+
+    __slots__ = ()
+
+    def add(self, value: Any) -> None:
+        bisect.insort(self, value)
+
+    def remove(self, value: Any) -> None:
+        del self[bisect.bisect_left(self, value)]
+
+    def bisect_left(self, value: Any) -> int:
+        return bisect.bisect_left(self, value)
+
+    def bisect_right(self, value: Any) -> int:
+        return bisect.bisect_right(self, value)
+
+    def islice(self, start: Optional[int] = None, stop: Optional[int] = None, reverse: bool = False) -> Iterator[Any]:
+        items = self[start:stop]
+        return reversed(items) if reverse else iter(items)
+
+    def irange(
+        self,
+        minimum: Any = None,
+        maximum: Any = None,
+        inclusive: Tuple[bool, bool] = (True, True),
+        reverse: bool = False,
+    ) -> Iterator[Any]:
+        start, stop = 0, len(self)
+        if minimum is not None:
+            start = bisect.bisect_left(self, minimum) if inclusive[0] else bisect.bisect_right(self, minimum)
+        if maximum is not None:
+            stop = bisect.bisect_right(self, maximum) if inclusive[1] else bisect.bisect_left(self, maximum)
+        return self.islice(start, stop, reverse)
+
+
+class ListPackDict:
+    """A mapping stored as a flat list of alternating keys and values, with the subset of the dict API used by
+    `Hash`."""
+
+    __slots__ = ["_items"]
+
+    def __init__(self, values: Iterable[Tuple[Any, Any]] = ()) -> None:
+        self._items: List[Any] = []
+        for key, value in values:
+            self[key] = value
+
+    def _index(self, key: Any) -> int:
+        """Position of `key` in the flat list, or -1."""
+        items = self._items
+        try:
+            index = items.index(key)
+            # Skip the values equal to the key
+            while index & 1:
+                index = items.index(key, index + 1)
+            return index
+        except ValueError:
+            return -1
+
+    def __len__(self) -> int:
+        return len(self._items) >> 1
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items[0::2])
+
+    def __contains__(self, key: Any) -> bool:
+        return self._index(key) >= 0
+
+    def __getitem__(self, key: Any) -> Any:
+        index = self._index(key)
+        if index < 0:
+            raise KeyError(key)
+        return self._items[index + 1]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        index = self._index(key)
+        if index < 0:
+            self._items.append(key)
+            self._items.append(value)
+        else:
+            self._items[index + 1] = value
+
+    def __delitem__(self, key: Any) -> None:
+        index = self._index(key)
+        if index < 0:
+            raise KeyError(key)
+        del self._items[index : index + 2]
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        index = self._index(key)
+        return self._items[index + 1] if index >= 0 else default
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        index = self._index(key)
+        if index < 0:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self._items[index + 1]
+        del self._items[index : index + 2]
+        return value
+
+    def keys(self) -> List[Any]:
+        return self._items[0::2]
+
+    def values(self) -> List[Any]:
+        return self._items[1::2]
+
+    def items(self) -> List[Tuple[Any, Any]]:
+        return list(zip(self._items[0::2], self._items[1::2]))
+
+    def update(self, values: Dict[Any, Any]) -> None:
+        for key, value in values.items():
+            self[key] = value
+
+    def copy(self) -> Dict[Any, Any]:
+        return dict(self.items())
+
+
+def as_int64(value: bytes) -> Optional[int]:
+    """Get the integer represented by `value`, if it is the canonical representation of a 64-bit signed integer."""
+    if not 0 < len(value) <= 20:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        return None
+    if not -(2**63) <= number < 2**63 or str(number).encode() != value:
+        return None
+    return number
+
+
+class IntSet:
+    """A set of members which are all integers, stored as a sorted array of 64-bit integers.
+
+    It has the subset of the dict API used by `ExpiringMembersSet`, all the members having no expiration time.
+    """
+
+    __slots__ = ["_ints"]
+
+    def __init__(self, ints: Iterable[int] = ()) -> None:
+        self._ints = array("q", sorted(set(ints)))
+
+    def _index(self, key: bytes) -> int:
+        """Position of the integer `key` in the array, or -1."""
+        number = as_int64(key)
+        if number is None:
+            return -1
+        index = bisect.bisect_left(self._ints, number)
+        return index if index < len(self._ints) and self._ints[index] == number else -1
+
+    def add(self, number: int) -> None:
+        index = bisect.bisect_left(self._ints, number)
+        if index == len(self._ints) or self._ints[index] != number:
+            self._ints.insert(index, number)
+
+    def __len__(self) -> int:
+        return len(self._ints)
+
+    def __iter__(self) -> Iterator[bytes]:
+        return (str(number).encode() for number in self._ints)
+
+    def __contains__(self, key: bytes) -> bool:
+        return self._index(key) >= 0
+
+    def __delitem__(self, key: bytes) -> None:
+        index = self._index(key)
+        if index < 0:
+            raise KeyError(key)
+        del self._ints[index]
+
+    def get(self, key: bytes, default: Any = None) -> Any:
+        return None if self._index(key) >= 0 else default
+
+    def pop(self, key: bytes, *default: Any) -> Any:
+        index = self._index(key)
+        if index < 0:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        del self._ints[index]
+        return None
+
+    def keys(self) -> List[bytes]:
+        return list(self)
+
+    def items(self) -> List[Tuple[bytes, None]]:
+        return [(member, None) for member in self]
+
+    def copy(self) -> "IntSet":
+        result = IntSet()
+        result._ints = array("q", self._ints)
+        return result
@@ -0,0 +1,308 @@
+import itertools
+from collections.abc import MutableSequence
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+class QuickList(MutableSequence):  # type: ignore
+    """A list stored as a sequence of chunks, like the quicklist of redis.
+
+    Pushing or popping at either end of the list only changes the first or last chunk. Elements are located by
+    position using a Fenwick tree of the chunk lengths, so indexing is O(log n). The tree is built on first use and
+    kept up to date while chunks change at either end, it is only dropped when a chunk is added or removed in the
+    middle of the list.
+
+    The chunks in use are `_chunks[_head:]`, the slots before `_head` are empty chunks kept so that a chunk can be
+    added at the head without moving the others. They count as empty chunks in the tree.
+    """
+
+    __slots__ = ["_chunks", "_head", "_len", "_tree"]
+
+    CHUNK_SIZE = 128
+
+    def __init__(self, values: Iterable[Any] = ()) -> None:
+        self._chunks: List[List[Any]] = []
+        self._head = 0
+        self._len = 0
+        self._tree: Optional[List[int]] = None
+        self.extend(values)
+
+    @property
+    def encoding(self) -> bytes:
+        """The encoding of redis 7.2 and later, which stores lists fitting in a single chunk as a listpack."""
+        return b"listpack" if len(self._chunks) - self._head <= 1 else b"quicklist"
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Any]:
+        return itertools.chain.from_iterable(self._chunks)
+
+    def __reversed__(self) -> Iterator[Any]:
+        for chunk in reversed(self._chunks):
+            yield from reversed(chunk)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (QuickList, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"QuickList({list(self)!r})"
+
+    def _build_tree(self) -> List[int]:
+        tree = [0] * (len(self._chunks) + 1)
+        for i, chunk in enumerate(self._chunks, 1):
+            tree[i] += len(chunk)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+        return tree
+
+    def _resized(self, chunk_index: int, delta: int) -> None:
+        """Update the index after the length of a chunk changed by `delta`."""
+        tree = self._tree
+        if tree is not None:
+            i = chunk_index + 1
+            while i < len(tree):
+                tree[i] += delta
+                i += i & -i
+
+    def _append_chunk(self, chunk: List[Any]) -> None:
+        """Add a chunk at the tail, extending the tree with a node covering it."""
+        self._chunks.append(chunk)
+        tree = self._tree
+        if tree is not None:
+            i = len(tree)
+            node = len(chunk)
+            child = i - 1
+            while child > i - (i & -i):
+                node += tree[child]
+                child -= child & -child
+            tree.append(node)
+
+    def _prepend_chunk(self, chunk: List[Any]) -> None:
+        """Add a chunk at the head, in a spare slot when there is one."""
+        if not self._head:
+            self._respace()
+        self._head -= 1
+        self._chunks[self._head] = chunk
+        self._resized(self._head, len(chunk))
+
+    def _respace(self) -> None:
+        """Move the chunks in use behind as many spare slots as there are chunks, the tree is built again later."""
+        chunks = self._chunks[self._head :]
+        self._head = max(len(chunks), 1)
+        self._chunks = [[] for _ in range(self._head)] + chunks
+        self._tree = None
+
+    def _drop_chunk(self, chunk_index: int) -> int:
+        """Remove a chunk which became empty, returns the index of the chunk which followed it."""
+        if len(self._chunks) - self._head == 1:
+            self.clear()
+        elif chunk_index == self._head:
+            self._head += 1
+            if self._head > 2 * (len(self._chunks) - self._head) + 8:
+                self._respace()
+                return self._head
+        elif chunk_index == len(self._chunks) - 1:
+            self._chunks.pop()
+            if self._tree is not None:
+                self._tree.pop()
+        else:
+            del self._chunks[chunk_index]
+            self._tree = None
+            return chunk_index
+        return chunk_index + 1
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """Find the chunk holding the element at `index`, returns its index and the offset of the element in it."""
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("list index out of range")
+        first = len(self._chunks[self._head])
+        if index < first:
+            return self._head, index
+        last = len(self._chunks[-1])
+        if index >= self._len - last:
+            return len(self._chunks) - 1, index - (self._len - last)
+        tree = self._tree if self._tree is not None else self._build_tree()
+        position = 0
+        bit = 1 << (len(tree).bit_length() - 1)
+        while bit:
+            child = position + bit
+            if child < len(tree) and tree[child] <= index:
+                position = child
+                index -= tree[child]
+            bit >>= 1
+        return position, index
+
+    def _slice_bounds(self, index: slice) -> Optional[Tuple[int, int, bool]]:
+        """Get the bounds of a slice as a range `[lo, hi)` and whether it is reversed, or None if it has gaps."""
+        start, stop, step = index.indices(self._len)
+        if step == 1:
+            return start, max(start, stop), False
+        if step == -1:
+            return stop + 1, max(stop + 1, start + 1), True
+        return None
+
+    def _range(self, lo: int, hi: int) -> List[Any]:
+        result: List[Any] = []
+        if lo >= hi:
+            return result
+        chunk_index, offset = self._locate(lo)
+        remaining = hi - lo
+        while remaining > 0:
+            part = self._chunks[chunk_index][offset : offset + remaining]
+            result.extend(part)
+            remaining -= len(part)
+            chunk_index += 1
+            offset = 0
+        return result
+
+    def _delete_range(self, lo: int, hi: int) -> None:
+        if lo >= hi:
+            return
+        chunk_index, offset = self._locate(lo)
+        remaining = hi - lo
+        self._len -= remaining
+        while remaining > 0:
+            chunk = self._chunks[chunk_index]
+            count = min(remaining, len(chunk) - offset)
+            del chunk[offset : offset + count]
+            remaining -= count
+            offset = 0
+            self._resized(chunk_index, -count)
+            chunk_index = chunk_index + 1 if chunk else self._drop_chunk(chunk_index)
+
+    def _reset(self, values: Iterable[Any]) -> None:
+        self.clear()
+        self.extend(values)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            bounds = self._slice_bounds(index)
+            if bounds is None:
+                return list(self)[index]
+            lo, hi, reverse = bounds
+            result = self._range(lo, hi)
+            if reverse:
+                result.reverse()
+            return result
+        chunk_index, offset = self._locate(index)
+        return self._chunks[chunk_index][offset]
+
+    def __setitem__(self, index: Union[int, slice], value: Any) -> None:
+        if isinstance(index, slice):
+            values = list(self)
+            values[index] = value
+            self._reset(values)
+            return
+        chunk_index, offset = self._locate(index)
+        self._chunks[chunk_index][offset] = value
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        if isinstance(index, slice):
+            bounds = self._slice_bounds(index)
+            if bounds is None:
+                values = list(self)
+                del values[index]
+                self._reset(values)
+            else:
+                self._delete_range(bounds[0], bounds[1])
+            return
+        self.pop(index)
+
+    def insert(self, index: int, value: Any) -> None:
+        if index < 0:
+            index = max(index + self._len, 0)
+        if index == 0:
+            self.appendleft(value)
+            return
+        if index >= self._len:
+            self.append(value)
+            return
+        chunk_index, offset = self._locate(index)
+        chunk = self._chunks[chunk_index]
+        chunk.insert(offset, value)
+        self._len += 1
+        if len(chunk) > self.CHUNK_SIZE:
+            half = len(chunk) // 2
+            self._chunks.insert(chunk_index + 1, chunk[half:])
+            del chunk[half:]
+            self._tree = None
+        else:
+            self._resized(chunk_index, 1)
+
+    def append(self, value: Any) -> None:
+        if self._len and len(self._chunks[-1]) < self.CHUNK_SIZE:
+            self._chunks[-1].append(value)
+            self._resized(len(self._chunks) - 1, 1)
+        else:
+            self._append_chunk([value])
+        self._len += 1
+
+    def appendleft(self, value: Any) -> None:
+        if self._len and len(self._chunks[self._head]) < self.CHUNK_SIZE:
+            self._chunks[self._head].insert(0, value)
+            self._resized(self._head, 1)
+        else:
+            self._prepend_chunk([value])
+        self._len += 1
+
+    def extend(self, values: Iterable[Any]) -> None:
+        values = list(values)
+        start = 0
+        if self._len:
+            last = self._chunks[-1]
+            start = max(self.CHUNK_SIZE - len(last), 0)
+            last.extend(values[:start])
+            self._resized(len(self._chunks) - 1, len(values[:start]))
+        for i in range(start, len(values), self.CHUNK_SIZE):
+            self._append_chunk(values[i : i + self.CHUNK_SIZE])
+        self._len += len(values)
+
+    def extendleft(self, values: Iterable[Any]) -> None:
+        """Add values at the head of the list one by one, so they end up in reverse order."""
+        for value in values:
+            self.appendleft(value)
+
+    def pop(self, index: int = -1) -> Any:
+        if not self._len:
+            raise IndexError("pop from empty list")
+        if index == 0 or index == -self._len:
+            return self.popleft()
+        chunk_index, offset = self._locate(index)
+        chunk = self._chunks[chunk_index]
+        value = chunk.pop(offset)
+        self._len -= 1
+        self._resized(chunk_index, -1)
+        if not chunk:
+            self._drop_chunk(chunk_index)
+        return value
+
+    def popleft(self) -> Any:
+        if not self._len:
+            raise IndexError("pop from empty list")
+        chunk = self._chunks[self._head]
+        value = chunk.pop(0)
+        self._len -= 1
+        self._resized(self._head, -1)
+        if not chunk:
+            self._drop_chunk(self._head)
+        return value
+
+    def index(self, value: Any, start: int = 0, stop: Optional[int] = None) -> int:
+        for i, element in enumerate(itertools.islice(self, start, stop), start):
+            if element == value:
+                return i
+        raise ValueError(f"{value!r} is not in list")
+
+    def clear(self) -> None:
+        self._chunks = []
+        self._head = 0
+        self._len = 0
+        self._tree = None
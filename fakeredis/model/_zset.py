@@ -1,24 +1,65 @@
-from typing import Any, Tuple, Optional, Generator, Dict, ItemsView
+from typing import Any, Tuple, Optional, Generator, Dict, Iterable, List
 
 import sortedcontainers
 
+from fakeredis._helpers import ScanIndex
+from ._listpack import ConfigDict, SortedListPack, config_limit
+
 
 class ZSet:
-    def __init__(self) -> None:
-        self._bylex: Dict[bytes, float] = {}  # Maps value to score
-        self._byscore = sortedcontainers.SortedList()
+    """A sorted set.
+
+    Small sorted sets are stored as a `SortedListPack` of `(score, member)` pairs, like the listpack encoding of redis.
+    They are converted to a dict mapping members to scores and a `SortedList` of `(score, member)` pairs once they have
+    more than `zset-max-listpack-entries` members, or a member longer than `zset-max-listpack-value`.
+    """
+
+    __slots__ = ["_bylex", "_byscore", "_scan_index", "_max_listpack_entries", "_max_listpack_value", "__weakref__"]
+
+    ENCODING_LIMITS = (b"zset-max-listpack-entries", b"zset-max-listpack-value")
+    MAX_LISTPACK_ENTRIES = 128
+    MAX_LISTPACK_VALUE = 64
+
+    def __init__(self, config: ConfigDict = None) -> None:
+        self._bylex: Optional[Dict[bytes, float]] = None  # Maps value to score, None for the listpack encoding
+        self._byscore: Any = SortedListPack()
+        # Members in buckets for ZSCAN, built by the first scan of the skiplist encoding and then maintained
+        self._scan_index: Optional[ScanIndex] = None
+        self._max_listpack_entries = config_limit(config, b"zset-max-listpack-entries", self.MAX_LISTPACK_ENTRIES)
+        self._max_listpack_value = config_limit(config, b"zset-max-listpack-value", self.MAX_LISTPACK_VALUE)
+
+    @property
+    def encoding(self) -> bytes:
+        return b"listpack" if self._bylex is None else b"skiplist"
+
+    def _convert(self) -> None:
+        self._bylex = {value: score for score, value in self._byscore}
+        self._byscore = sortedcontainers.SortedList(self._byscore)
+
+    def _listpack_score(self, value: bytes) -> Optional[float]:
+        for score, item in self._byscore:
+            if item == value:
+                return score  # type: ignore
+        return None
 
     def __contains__(self, value: bytes) -> bool:
-        return value in self._bylex
+        return self.get(value) is not None
 
     def add(self, value: bytes, score: float) -> bool:
         """Update the item and return whether it modified the zset"""
-        old_score = self._bylex.get(value, None)
+        old_score = self.get(value)
         if old_score is not None:
             if score == old_score:
                 return False
             self._byscore.remove((old_score, value))
-        self._bylex[value] = score
+        elif self._bylex is None and (
+            len(self._byscore) >= self._max_listpack_entries or len(value) > self._max_listpack_value
+        ):
+            self._convert()
+        if self._bylex is not None:
+            self._bylex[value] = score
+            if self._scan_index is not None:
+                self._scan_index.add(value)
         self._byscore.add((score, value))
         return True
 
@@ -26,13 +67,19 @@ class ZSet:
         self.add(value, score)
 
     def __getitem__(self, key: bytes) -> float:
-        return self._bylex[key]
+        score = self.get(key)
+        if score is None:
+            raise KeyError(key)
+        return score
 
     def get(self, key: bytes, default: Optional[float] = None) -> Optional[float]:
+        if self._bylex is None:
+            score = self._listpack_score(key)
+            return score if score is not None else default
         return self._bylex.get(key, default)
 
     def __len__(self) -> int:
-        return len(self._bylex)
+        return len(self._byscore)
 
     def __iter__(self) -> Generator[Any, Any, None]:
         def gen() -> Generator[Any, Any, None]:
@@ -42,12 +89,25 @@ class ZSet:
         return gen()
 
     def discard(self, key: bytes) -> None:
-        try:
-            score = self._bylex.pop(key)
-        except KeyError:
+        score = self.get(key)
+        if score is None:
             return
-        else:
-            self._byscore.remove((score, key))
+        if self._bylex is not None:
+            del self._bylex[key]
+            if self._scan_index is not None:
+                self._scan_index.discard(key)
+        self._byscore.remove((score, key))
+
+    def scan(self, cursor: int, count: int) -> Tuple[int, List[bytes]]:
+        """Get about `count` members from `cursor` on, and the next cursor, see `ScanIndex`.
+
+        Like redis, all the members are returned at once with the listpack encoding.
+        """
+        if self._bylex is None:
+            return 0, list(self)
+        if self._scan_index is None:
+            self._scan_index = ScanIndex(self._bylex)
+        return self._scan_index.scan(cursor, count)
 
     def zcount(self, _min: float, _max: float) -> int:
         pos1: int = self._byscore.bisect_left(_min)
@@ -79,8 +139,8 @@ class ZSet:
         if not self._byscore:
             return iter([])
         default_score = self._byscore[0][0]
-        start_score = self._bylex.get(start, default_score)
-        stop_score = self._bylex.get(stop, default_score)
+        start_score = self.get(start, default_score)
+        stop_score = self.get(stop, default_score)
         it = self._byscore.irange(
             (start_score, start),
             (stop_score, stop),
@@ -89,12 +149,20 @@ class ZSet:
         )
         return (item[1] for item in it)
 
-    def irange_score(self, start: Tuple[Any, bytes], stop: Tuple[Any, bytes], reverse: bool = False) -> Any:
-        return self._byscore.irange(start, stop, reverse=reverse)
+    def irange_score(
+        self,
+        start: Optional[Tuple[Any, bytes]],
+        stop: Optional[Tuple[Any, bytes]],
+        reverse: bool = False,
+        inclusive: Tuple[bool, bool] = (True, True),
+    ) -> Any:
+        return self._byscore.irange(start, stop, inclusive=inclusive, reverse=reverse)
 
     def rank(self, member: bytes) -> Tuple[int, float]:
-        ind: int = self._byscore.index((self._bylex[member], member))
+        ind: int = self._byscore.index((self[member], member))
         return ind, self._byscore[ind][0]
 
-    def items(self) -> ItemsView[bytes, Any]:
+    def items(self) -> Iterable[Tuple[bytes, Any]]:
+        if self._bylex is None:
+            return [(value, score) for score, value in self._byscore]
         return self._bylex.items()
@@ -45,7 +45,7 @@ def _fake_server(request, real_server_details: ServerDetails) -> fakeredis.FakeS
     server_type, _ = real_server_details
     min_server_marker = request.node.get_closest_marker("min_server")
     server_version = min_server_marker.args[0] if min_server_marker else "6.2"
-    server = fakeredis.FakeServer(server_type=server_type, version=server_version)
+    server = fakeredis.FakeServer(server_type=server_type, version=server_version, validate_responses=True)
     server.connected = request.node.get_closest_marker("disconnected") is None
     return server
 
@@ -231,3 +231,15 @@ async def test_cause_fakeredis_bug(async_redis):
 
     # await async_redis.get("foo")  # uncomment to make test pass
     assert await async_redis.get("foo") == b"bar"
+
+
+@pytest.mark.fake
+async def test_can_read_wakes_up_on_response():
+    r = aioredis.FakeRedis(server=FakeServer())
+    p = r.pubsub()
+    await p.subscribe("channel")
+    assert (await p.get_message(timeout=1))["type"] == "subscribe"
+    assert await p.get_message(timeout=0.05) is None
+    asyncio.get_running_loop().call_later(0.05, asyncio.ensure_future, r.publish("channel", "hello"))
+    message = await p.get_message(timeout=10)
+    assert message["data"] == b"hello"
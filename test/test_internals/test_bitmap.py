@@ -0,0 +1,33 @@
+import operator
+import random
+
+import pytest
+
+from fakeredis._bitmap import bitop, bitop_not, count_bits, find_bit
+
+
+def _bits(value: bytes) -> str:
+    return "".join(format(byte, "08b") for byte in value)
+
+
+@pytest.mark.fake
+def test_count_and_find_bits_match_bit_string():
+    rng = random.Random(0)
+    for _ in range(300):
+        value = bytes(rng.choice([0, 0xFF, rng.randrange(256)]) for _ in range(rng.randrange(1, 20)))
+        bits = _bits(value)
+        start = rng.randrange(len(bits) + 1)
+        end = rng.randrange(start, len(bits) + 1)
+        assert count_bits(value, start, end) == bits.count("1", start, end)
+        assert count_bits(bytearray(value), start, end) == bits.count("1", start, end)
+        for bit in (0, 1):
+            assert find_bit(value, bit, start, end) == bits.find(str(bit), start, end)
+
+
+@pytest.mark.fake
+def test_bitop_pads_shorter_values():
+    assert bitop(operator.or_, [b"\x01\x02", b"\x10"]) == b"\x11\x02"
+    assert bitop(operator.and_, [b"\xff\xff", b"\x0f"]) == b"\x0f\x00"
+    assert bitop(operator.xor, [b"\xff", b"", bytearray(b"\x0f\xf0")]) == b"\xf0\xf0"
+    assert bitop_not(b"\x00\x0f") == b"\xff\xf0"
+    assert bitop_not(b"") == b""
@@ -0,0 +1,211 @@
+import pytest
+
+import fakeredis
+from fakeredis._commands import Item
+from fakeredis._helpers import Database, ScanIndex, glob_prefix, estimate_memory_usage
+
+
+def _volatile_db(n_keys: int) -> Database:
+    db = Database(None)
+    for i in range(n_keys):
+        item = Item(b"value")
+        db[b"key%d" % i] = item
+        db.set_expireat(b"key%d" % i, item, 100 + i)
+    db[b"persistent"] = Item(b"value")
+    return db
+
+
+@pytest.mark.fake
+def test_expired_keys_are_not_counted():
+    db = _volatile_db(100)
+    db.time = 50
+    assert len(db) == 101
+    db.time = 150
+    assert len(db) == 51
+    assert sorted(db) == sorted([b"key%d" % i for i in range(50, 100)] + [b"persistent"])
+
+
+@pytest.mark.fake
+def test_changed_expiry_is_honored():
+    db = _volatile_db(2)
+    db.set_expireat(b"key0", db[b"key0"], None)  # PERSIST
+    db.set_expireat(b"key1", db[b"key1"], 1000)
+    db.time = 500
+    assert len(db) == 3
+    db.time = 2000
+    assert list(db) == [b"key0", b"persistent"]
+
+
+@pytest.mark.fake
+def test_expire_keys_with_limit():
+    db = _volatile_db(100)
+    db.time = 1000
+    db.expire_keys(db.ACTIVE_EXPIRE_CYCLE_KEYS)
+    assert len(db._dict) == 101 - db.ACTIVE_EXPIRE_CYCLE_KEYS
+    assert len(db) == 1
+
+
+@pytest.mark.fake
+def test_expiry_index_is_compacted():
+    db = _volatile_db(10)
+    for expireat in range(1000):
+        db.set_expireat(b"key0", db[b"key0"], 200 + expireat)
+    assert len(db._expires) <= 2 * len(db._dict) + 64
+    db.time = 1150
+    assert len(db) == 2
+
+
+@pytest.mark.fake
+def test_swap_keeps_expiry_index():
+    db1, db2 = _volatile_db(10), Database(None)
+    db1.swap(db2)
+    db2.time = 105
+    assert len(db1) == 0
+    assert len(db2) == 6
+
+
+@pytest.mark.fake
+def test_keys_with_prefix():
+    db = _volatile_db(3)
+    db[b"user:1"] = Item(b"value")
+    db[b"user:2"] = Item(b"value")
+    db[b"users"] = Item(b"value")
+    assert db.keys_with_prefix(b"user:") == [b"user:1", b"user:2"]
+    # The index is maintained after it is built
+    db[b"user:0"] = Item(b"value")
+    del db[b"user:2"]
+    db.time = 101
+    assert db.keys_with_prefix(b"user") == [b"user:0", b"user:1", b"users"]
+    assert db.keys_with_prefix(b"key") == [b"key1", b"key2"]
+    with db.lock:
+        db.clear()
+    assert db.keys_with_prefix(b"") == []
+
+
+@pytest.mark.fake
+@pytest.mark.parametrize("added,removed", [(0, 0), (1000, 0), (0, 990), (1000, 1000)])
+def test_scan_index_cursor_survives_resizes(added, removed):
+    keys = [b"key%d" % i for i in range(1000)]
+    index = ScanIndex(keys)
+    cursor, seen = index.scan(0, 100)
+    seen = list(seen)
+    for i in range(added):
+        index.add(b"new%d" % i)
+    # Keys not returned yet are kept
+    removable = [key for key in keys if key not in seen]
+    for key in removable[:removed]:
+        index.discard(key)
+    while cursor != 0:
+        cursor, page = index.scan(cursor, 100)
+        seen.extend(page)
+    remaining = set(keys) - set(removable[:removed])
+    assert remaining <= set(seen)
+    assert not set(removable[:removed]) & set(seen)
+
+
+@pytest.mark.fake
+def test_scan_index_is_maintained():
+    db = _volatile_db(3)
+    cursor, keys = db.scan(0, 100)
+    assert cursor == 0
+    assert sorted(keys) == [b"key0", b"key1", b"key2", b"persistent"]
+    db[b"new"] = Item(b"value")
+    del db[b"key0"]
+    assert sorted(db.scan(0, 100)[1]) == [b"key1", b"key2", b"new", b"persistent"]
+    with db.lock:
+        db.clear()
+    assert db.scan(0, 100) == (0, [])
+
+
+@pytest.mark.fake
+@pytest.mark.parametrize(
+    "pattern,prefix",
+    [
+        (b"user:123:*", b"user:123:"),
+        (b"*", b""),
+        (b"user?", b"user"),
+        (b"a[bc]*", b"a"),
+        (b"a\\*b*", b"a*b"),
+        (b"plain", b"plain"),
+        (b"trailing\\", b"trailing\\"),
+    ],
+)
+def test_glob_prefix(pattern, prefix):
+    assert glob_prefix(pattern) == prefix
+
+
+@pytest.mark.fake
+def test_used_memory_follows_changes():
+    db = Database(None, config={b"maxmemory": b"1mb"})
+    db[b"foo"] = Item(b"bar")
+    size = estimate_memory_usage(b"foo", b"bar")
+    assert db.used_memory == size
+    db[b"foo"] = Item(b"bar" * 10)
+    db[b"list"] = Item([b"a", b"b"])
+    assert db.used_memory == estimate_memory_usage(b"foo", b"bar" * 10) + estimate_memory_usage(b"list", [b"a", b"b"])
+    other = Database(None)
+    db.swap(other)
+    assert db.used_memory == 0
+    del other[b"foo"]
+    del other[b"list"]
+    assert other.used_memory == 0
+
+
+@pytest.mark.fake
+def test_used_memory_estimated_when_needed_without_maxmemory(mocker):
+    config = {}
+    db = Database(None, config=config)
+    estimate = mocker.spy(fakeredis._helpers, "estimate_memory_usage")
+    for i in range(10):
+        db[b"key%d" % i] = Item(b"value")
+    assert estimate.call_count == 0
+    assert db.memory_stale
+    db.refresh_memory_usage()
+    assert db.used_memory == 10 * estimate_memory_usage(b"key0", b"value")
+    assert not db.memory_stale
+    config[b"maxmemory"] = b"1mb"
+    db[b"key10"] = Item(b"value")
+    assert db.used_memory == 10 * estimate_memory_usage(b"key0", b"value") + estimate_memory_usage(b"key10", b"value")
+    assert not db.memory_stale
+
+
+@pytest.mark.fake
+def test_estimate_memory_usage_samples_collections():
+    small = estimate_memory_usage(b"key", [b"x"] * 10)
+    assert estimate_memory_usage(b"key", [b"x"] * 1000) > 50 * small
+    assert estimate_memory_usage(b"key", [b"x" * 100] + [b"x"] * 1000, samples=0) < estimate_memory_usage(
+        b"key", [b"x" * 100] + [b"x"] * 1000, samples=1
+    )
+
+
+@pytest.mark.fake
+def test_sample_keys():
+    db = Database(None)
+    for i in range(10):
+        db[b"key%d" % i] = Item(b"value")
+    db.set_expireat(b"key0", db[b"key0"], 100.0)
+    assert {key for key, _ in db.sample_keys(100)} <= {b"key%d" % i for i in range(10)}
+    assert {key for key, _ in db.sample_keys(10, volatile=True)} == {b"key0"}
+    del db[b"key3"]
+    db[b"new"] = Item(b"value")
+    assert b"key3" not in {key for key, _ in db.sample_keys(200)}
+    assert b"new" in {key for key, _ in db.sample_keys(200)}
+    del db[b"key0"]
+    assert db.sample_keys(10, volatile=True) == []
+
+
+@pytest.mark.fake
+def test_strings_are_modified_in_place():
+    server = fakeredis.FakeServer()
+    r = fakeredis.FakeStrictRedis(server=server)
+    r.set("foo", "bar")
+    r.append("foo", "baz")
+    db = server.dbs[0]
+    buffer = db[b"foo"].value
+    assert type(buffer) is bytearray
+    value = r.get("foo")
+    r.setbit("foo", 0, 1)
+    r.setrange("foo", 1, "x")
+    assert db[b"foo"].value is buffer
+    assert value == b"barbaz"
+    assert r.get("foo") == b"\xe2xrbaz"
@@ -0,0 +1,86 @@
+import pytest
+import redis
+
+import fakeredis
+
+
+@pytest.fixture
+def r():
+    return fakeredis.FakeStrictRedis(server=fakeredis.FakeServer(), direct_dispatch=True)
+
+
+@pytest.mark.fake
+def test_direct_dispatch_does_not_use_parser(r, mocker):
+    pack = mocker.patch("redis.connection.PythonRespSerializer.pack")
+    assert r.set("foo", "bar") is True
+    assert r.get("foo") == b"bar"
+    assert r.incrby("counter", 5) == 5
+    assert r.incrbyfloat("float", 1.5) == 1.5
+    pack.assert_not_called()
+
+
+@pytest.mark.fake
+def test_direct_dispatch_shares_state_with_regular_connection():
+    server = fakeredis.FakeServer()
+    r = fakeredis.FakeStrictRedis(server=server, direct_dispatch=True)
+    other = fakeredis.FakeStrictRedis(server=server)
+    r.set("foo", b"\r\nbar\r\n")
+    assert other.get("foo") == b"\r\nbar\r\n"
+    other.rpush("list", 1, 2, 3)
+    assert r.lrange("list", 0, -1) == [b"1", b"2", b"3"]
+
+
+@pytest.mark.fake
+def test_direct_dispatch_subcommands(r):
+    assert r.client_setname("worker") is True
+    assert r.client_getname() == "worker"
+    assert r.execute_command("CLIENT GETNAME") == "worker"
+
+
+@pytest.mark.fake
+def test_direct_dispatch_errors(r):
+    r.set("foo", "bar")
+    with pytest.raises(redis.ResponseError, match="WRONGTYPE"):
+        r.lpush("foo", 1)
+    with pytest.raises(redis.ResponseError, match="unknown command"):
+        r.execute_command("NOTACOMMAND")
+    with pytest.raises(redis.DataError):
+        r.set("foo", True)
+
+
+@pytest.mark.fake
+@pytest.mark.parametrize("transaction", [False, True])
+def test_direct_dispatch_pipeline(r, transaction):
+    with r.pipeline(transaction=transaction) as p:
+        for i in range(100):
+            p.set(f"key{i}", i)
+        p.dbsize()
+        result = p.execute()
+    assert result == [True] * 100 + [100]
+
+
+@pytest.mark.fake
+def test_direct_dispatch_decode_responses():
+    r = fakeredis.FakeStrictRedis(server=fakeredis.FakeServer(), direct_dispatch=True, decode_responses=True)
+    r.hset("hash", mapping={"a": "1", "b": "2"})
+    assert r.hgetall("hash") == {"a": "1", "b": "2"}
+
+
+@pytest.mark.fake
+def test_direct_dispatch_pubsub(r):
+    p = r.pubsub()
+    p.subscribe("channel")
+    assert p.get_message(timeout=1)["type"] == "subscribe"
+    r.publish("channel", "hello")
+    assert p.get_message(timeout=1)["data"] == b"hello"
+
+
+@pytest.mark.fake
+def test_direct_dispatch_disconnected():
+    server = fakeredis.FakeServer()
+    r = fakeredis.FakeStrictRedis(server=server, direct_dispatch=True)
+    server.connected = False
+    with pytest.raises(redis.ConnectionError):
+        r.set("foo", "bar")
+    server.connected = True
+    assert r.set("foo", "bar") is True
@@ -0,0 +1,53 @@
+import pytest
+
+from fakeredis.model import ExpiringMembersSet
+
+
+@pytest.fixture
+def now(mocker):
+    clock = mocker.patch("fakeredis.model._expiring_members_set.current_time")
+    clock.return_value = 1000
+    return clock
+
+
+@pytest.mark.fake
+def test_members_expire_in_deadline_order(now):
+    s = ExpiringMembersSet()
+    s.update([b"permanent"])
+    for i in range(10):
+        assert s.set_member_expireat(b"m%d" % i, 2000 + i) == 1
+    assert len(s) == 11
+    now.return_value = 2005
+    assert b"m4" not in s
+    assert b"m5" in s
+    assert len(s) == 6
+    assert set(s) == {b"permanent"} | {b"m%d" % i for i in range(5, 10)}
+    assert s.get_key_expireat(b"m9") == 2009
+    assert s.get_key_expireat(b"permanent") is None
+
+
+@pytest.mark.fake
+def test_members_re_added_without_expiration(now):
+    s = ExpiringMembersSet()
+    s.set_member_expireat(b"a", 2000)
+    s.set_member_expireat(b"b", 2000)
+    s.discard(b"a")
+    s.add(b"a")
+    s.set_member_expireat(b"b", 3000)
+    now.return_value = 2500
+    assert set(s) == {b"a", b"b"}
+    now.return_value = 3500
+    assert set(s) == {b"a"}
+
+
+@pytest.mark.fake
+def test_set_operations_keep_expirations(now):
+    s1, s2 = ExpiringMembersSet(), ExpiringMembersSet()
+    s1.set_member_expireat(b"a", 2000)
+    s1.add(b"b")
+    s2.set_member_expireat(b"c", 2000)
+    union = s1 | s2
+    intersection = s1 & ExpiringMembersSet({b"a": None})
+    now.return_value = 2500
+    assert set(union) == {b"b"}
+    assert len(intersection) == 0
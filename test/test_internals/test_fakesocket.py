@@ -0,0 +1,335 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+import fakeredis
+from fakeredis import _helpers
+from fakeredis._commands import Signature
+from fakeredis._fakesocket import FakeSocket
+from fakeredis._helpers import SimpleString, SimpleError
+
+
+def _pack(*args: bytes) -> bytes:
+    return b"*%d\r\n" % len(args) + b"".join(b"$%d\r\n%s\r\n" % (len(arg), arg) for arg in args)
+
+
+def _drain(sock: FakeSocket):
+    result = []
+    while not sock.responses.empty():
+        result.append(sock.responses.get_nowait())
+    return result
+
+
+@pytest.mark.fake
+def test_parse_pipeline_in_single_sendall():
+    sock = FakeSocket(fakeredis.FakeServer(), db=0)
+    data = b"".join(_pack(b"SET", b"key%d" % i, b"value%d" % i) for i in range(100)) + _pack(b"DBSIZE")
+    sock.sendall(data)
+    assert _drain(sock) == [b"OK"] * 100 + [100]
+
+
+@pytest.mark.fake
+def test_pipeline_responses_delivered_as_batch(mocker):
+    sock = FakeSocket(fakeredis.FakeServer(), db=0)
+    put = mocker.spy(sock.responses, "put")
+    data = b"".join(_pack(b"INCR", b"counter") for _ in range(100))
+    sock.sendall(data + _pack(b"SELECT", b"1") + _pack(b"INCR", b"counter"))
+    assert _drain(sock) == list(range(1, 101)) + [b"OK", 1]
+    put.assert_not_called()
+
+
+@pytest.mark.fake
+def test_pipeline_keeps_order_of_pubsub_responses():
+    sock = FakeSocket(fakeredis.FakeServer(), db=0)
+    sock.sendall(_pack(b"ECHO", b"a") + _pack(b"SUBSCRIBE", b"channel") + _pack(b"PING"))
+    assert _drain(sock) == [b"a", [b"subscribe", b"channel", 1], [b"pong", b""]]
+
+
+@pytest.mark.fake
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1024])
+def test_parse_commands_split_across_sendall(chunk_size):
+    sock = FakeSocket(fakeredis.FakeServer(), db=0)
+    value = bytes(range(256)) * 40  # Contains CR and LF bytes
+    data = _pack(b"SET", b"foo", value) + _pack(b"GET", b"foo") + _pack(b"STRLEN", b"foo")
+    for i in range(0, len(data), chunk_size):
+        sock.sendall(data[i : i + chunk_size])
+    assert _drain(sock) == [b"OK", value, len(value)]
+
+
+@pytest.mark.fake
+def test_parse_commands_while_paused():
+    sock = FakeSocket(fakeredis.FakeServer(), db=0)
+    sock.pause()
+    data = _pack(b"SET", b"foo", b"bar") + _pack(b"GET", b"foo")
+    sock.sendall(data[:-3])
+    assert _drain(sock) == []
+    sock.resume()
+    assert _drain(sock) == [b"OK"]
+    sock.sendall(data[-3:])
+    assert _drain(sock) == [b"bar"]
+
+
+@pytest.mark.fake
+@pytest.mark.parametrize("name", [b"SET", b"set", b"SeT"])
+def test_command_name_case(name):
+    sock = FakeSocket(fakeredis.FakeServer(), db=0)
+    sock.sendall(_pack(name, b"foo", b"bar") + _pack(b"get", b"foo"))
+    assert _drain(sock) == [b"OK", b"bar"]
+
+
+@pytest.mark.fake
+@pytest.mark.parametrize(
+    "fields", [(b"CLIENT", b"SETNAME", b"x"), (b"client", b"setname", b"x"), (b"Client", b"SetName", b"x")]
+)
+def test_sub_command_name_case(fields):
+    sock = FakeSocket(fakeredis.FakeServer(), db=0)
+    sock.sendall(_pack(*fields) + _pack(b"CLIENT", b"GETNAME"))
+    assert _drain(sock) == [b"OK", b"x"]
+
+
+@pytest.mark.fake
+def test_unknown_commands():
+    sock = FakeSocket(fakeredis.FakeServer(), db=0)
+    sock.sendall(_pack(b"NOSUCHCOMMAND", b"x") + _pack(b"CLIENT", b"NOSUCH") + _pack(b"CLIENT"))
+    errors = [str(error) for error in _drain(sock)]
+    assert len(errors) == 3
+    assert "unknown command `nosuchcommand`" in errors[0]
+    assert "unknown command `client nosuch`" in errors[1]
+    assert "unknown command `client`" in errors[2]
+
+
+@pytest.mark.fake
+def test_server_type_specific_commands():
+    sock = FakeSocket(fakeredis.FakeServer(server_type="redis"), db=0)
+    sock.sendall(_pack(b"SADDEX", b"key", b"10", b"member"))
+    assert "unknown command" in str(_drain(sock)[0])
+    sock = FakeSocket(fakeredis.FakeServer(server_type="dragonfly"), db=0)
+    sock.sendall(_pack(b"SADDEX", b"key", b"10", b"member"))
+    assert _drain(sock) == [1]
+
+
+@pytest.mark.fake
+def test_databases_share_server_clock():
+    server = fakeredis.FakeServer()
+    sock = FakeSocket(server, db=0)
+    sock.sendall(_pack(b"SET", b"foo", b"bar", b"PX", b"100000") + _pack(b"SELECT", b"1") + _pack(b"PING"))
+    assert _drain(sock) == [b"OK", b"OK", b"PONG"]
+    assert server.dbs[0].time == server.dbs[1].time == server.dbs[5].time == server.clock.time > 0
+    server.clock.time += 200
+    assert b"foo" not in server.dbs[0]
+
+
+@pytest.mark.fake
+def test_commands_lock_only_their_database():
+    server = fakeredis.FakeServer()
+    sock0, sock1 = FakeSocket(server, db=0), FakeSocket(server, db=1)
+    with server.dbs[0].lock:
+        sock1.sendall(_pack(b"SET", b"foo", b"bar"))
+        assert _drain(sock1) == [b"OK"]
+        # Server-wide commands wait for every database
+        thread = threading.Thread(target=sock1.sendall, args=(_pack(b"MOVE", b"foo", b"0"),))
+        thread.start()
+        thread.join(0.1)
+        assert thread.is_alive()
+    thread.join()
+    assert _drain(sock1) == [1]
+    sock0.sendall(_pack(b"GET", b"foo"))
+    assert _drain(sock0) == [b"bar"]
+
+
+@pytest.mark.fake
+def test_transactions_scripts_and_publish_lock_only_their_database():
+    server = fakeredis.FakeServer()
+    sock1 = FakeSocket(server, db=1)
+    with server.dbs[0].lock:
+        sock1.sendall(
+            _pack(b"WATCH", b"foo")
+            + _pack(b"MULTI")
+            + _pack(b"SET", b"foo", b"bar")
+            + _pack(b"EXEC")
+            + _pack(b"EVAL", b"return redis.call('GET', KEYS[1])", b"1", b"foo")
+            + _pack(b"PUBLISH", b"channel", b"message")
+        )
+        assert _drain(sock1) == [b"OK", b"OK", b"QUEUED", [b"OK"], b"bar", 0]
+        # Switching databases needs them all
+        for data in (
+            _pack(b"MULTI") + _pack(b"SELECT", b"0") + _pack(b"GET", b"foo") + _pack(b"EXEC"),
+            _pack(b"EVAL", b"redis.call('SELECT', 0) return redis.call('GET', KEYS[1])", b"1", b"foo"),
+        ):
+            thread = threading.Thread(target=sock1.sendall, args=(data,))
+            thread.start()
+            thread.join(0.1)
+            assert thread.is_alive()
+            server.dbs[0].lock.release()
+            thread.join()
+            server.dbs[0].lock.acquire()
+    assert _drain(sock1) == [b"OK", b"QUEUED", b"QUEUED", [b"OK", None], None]
+
+
+@pytest.mark.fake
+def test_exec_locks_databases_of_watched_keys():
+    server = fakeredis.FakeServer()
+    sock1 = FakeSocket(server, db=1)
+    sock1.sendall(_pack(b"SELECT", b"0") + _pack(b"WATCH", b"foo") + _pack(b"SELECT", b"1") + _pack(b"MULTI"))
+    assert _drain(sock1) == [b"OK", b"OK", b"OK", b"OK"]
+    with server.dbs[0].lock:
+        thread = threading.Thread(target=sock1.sendall, args=(_pack(b"EXEC"),))
+        thread.start()
+        thread.join(0.1)
+        assert thread.is_alive()
+    thread.join()
+    assert _drain(sock1) == [[]]
+
+
+@pytest.mark.fake
+def test_blocking_command_sees_keys_expired_while_waiting(mocker):
+    server = fakeredis.FakeServer()
+    blocked, sock = FakeSocket(server, db=0), FakeSocket(server, db=0)
+    # Leave expired keys in place, so that only the clock of the blocked command decides whether they exist
+    mocker.patch.object(fakeredis._helpers.Database, "expire_keys")
+    sock.sendall(_pack(b"SET", b"dst", b"value", b"PX", b"100"))
+    assert _drain(sock) == [b"OK"]
+    thread = threading.Thread(target=blocked.sendall, args=(_pack(b"BRPOPLPUSH", b"src", b"dst", b"10"),))
+    thread.start()
+    thread.join(0.3)
+    assert thread.is_alive()
+    sock.sendall(_pack(b"LPUSH", b"src", b"1"))
+    thread.join()
+    sock.sendall(_pack(b"LRANGE", b"dst", b"0", b"-1"))
+    assert _drain(sock) == [1, [b"1"]]
+    assert _drain(blocked) == [b"1"]
+
+
+@pytest.mark.fake
+def test_concurrent_commands_on_several_databases():
+    server = fakeredis.FakeServer()
+
+    def incr(db: int) -> None:
+        sock = FakeSocket(server, db=db)
+        for _ in range(500):
+            sock.sendall(_pack(b"INCR", b"counter"))
+
+    def swapdb() -> None:
+        sock = FakeSocket(server, db=0)
+        for _ in range(500):
+            sock.sendall(_pack(b"SWAPDB", b"8", b"9"))
+
+    threads = [threading.Thread(target=incr, args=(db,)) for db in range(4) for _ in range(2)]
+    threads.append(threading.Thread(target=swapdb))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sock = FakeSocket(server, db=0)
+    for db in range(4):
+        sock.sendall(_pack(b"SELECT", b"%d" % db) + _pack(b"GET", b"counter"))
+    assert _drain(sock) == [b"OK", b"1000"] * 4
+
+
+@pytest.mark.fake
+def test_blocking_command_after_closing_socket():
+    server = fakeredis.FakeServer()
+    blocked, sock0, sock1 = FakeSocket(server, db=0), FakeSocket(server, db=0), FakeSocket(server, db=1)
+    FakeSocket(server, db=0).close()
+    thread = threading.Thread(target=blocked.sendall, args=(_pack(b"BLPOP", b"q", b"10"),))
+    thread.start()
+    thread.join(0.1)
+    assert thread.is_alive()
+    # Waiting for the list must not keep the other databases, or the server, locked
+    FakeSocket(server, db=0).close()
+    start = time.monotonic()
+    sock1.sendall(_pack(b"SET", b"foo", b"bar"))
+    sock0.sendall(_pack(b"EVAL", b"return redis.call('LPUSH', 'q', '1')", b"0"))
+    thread.join(5)
+    assert not thread.is_alive()
+    assert time.monotonic() - start < 5
+    assert _drain(sock1) == [b"OK"]
+    assert _drain(sock0) == [1]
+    assert _drain(blocked) == [[b"q", b"1"]]
+
+
+@pytest.mark.fake
+def test_blocking_command_after_evicting_keys():
+    server = fakeredis.FakeServer()
+    blocked, sock0, sock1 = FakeSocket(server, db=0), FakeSocket(server, db=0), FakeSocket(server, db=1)
+    sock1.sendall(_pack(b"SET", b"foo", b"bar"))
+    assert _drain(sock1) == [b"OK"]
+    server.config.update({b"maxmemory": b"1", b"maxmemory-policy": b"allkeys-lru"})
+    thread = threading.Thread(target=blocked.sendall, args=(_pack(b"BRPOPLPUSH", b"src", b"dst", b"10"),))
+    thread.start()
+    thread.join(0.1)
+    assert thread.is_alive()
+    assert server.evicted_keys == 1
+    start = time.monotonic()
+    sock1.sendall(_pack(b"GET", b"foo"))
+    sock0.sendall(_pack(b"LPUSH", b"src", b"1"))
+    thread.join(5)
+    assert not thread.is_alive()
+    assert time.monotonic() - start < 5
+    assert _drain(sock1) == [None]
+    assert _drain(sock0) == [1]
+    assert _drain(blocked) == [b"1"]
+
+
+@pytest.mark.fake
+def test_selector_wakes_up_on_response():
+    r = fakeredis.FakeStrictRedis(server=fakeredis.FakeServer())
+    p = r.pubsub()
+    p.subscribe("channel")
+    assert p.get_message(timeout=1)["type"] == "subscribe"
+    timer = threading.Timer(0.05, r.publish, args=("channel", "hello"))
+    timer.start()
+    start = time.monotonic()
+    assert p.get_message(timeout=10)["data"] == b"hello"
+    assert time.monotonic() - start < 5
+    timer.join()
+    start = time.monotonic()
+    assert p.get_message(timeout=0.05) is None
+    assert time.monotonic() - start >= 0.05
+
+
+@pytest.mark.fake
+def test_decode_result_copies_only_lists_to_convert():
+    sock = FakeSocket(fakeredis.FakeServer(), db=0)
+    plain = [b"a", 1, 1.5, None, [b"b", [2]]]
+    assert sock._decode_result(plain) is plain
+    mixed = [b"a", [1, SimpleString(b"OK")], SimpleError("ERR error")]
+    decoded = sock._decode_result(mixed)
+    assert decoded[:2] == [b"a", [1, b"OK"]]
+    assert str(decoded[2]) == "error"
+    assert isinstance(mixed[1][1], SimpleString)
+
+
+@pytest.mark.fake
+@pytest.mark.parametrize("validate_responses", [False, True])
+def test_validate_responses(validate_responses):
+    sock = FakeSocket(fakeredis.FakeServer(validate_responses=validate_responses), db=0)
+    sig = Signature("test", "test", (bytes,))
+    if validate_responses:
+        with pytest.raises(AssertionError):
+            sock._run_command(lambda arg: {arg}, sig, [b"x"], False)
+    else:
+        assert sock._run_command(lambda arg: {arg}, sig, [b"x"], False) == {b"x"}
+
+
+@pytest.mark.fake
+def test_scan_cursor_needs_no_socket_state(mocker):
+    server = fakeredis.FakeServer()
+    socks = [FakeSocket(server, db=0) for _ in range(2)]
+    socks[0].sendall(_pack(b"MSET", *[b"key%d" % (i // 2) if i % 2 == 0 else b"v" for i in range(2000)]))
+    _drain(socks[0])
+    scan_index = mocker.spy(_helpers, "ScanIndex")
+    cursor, keys = b"0", []
+    for calls in itertools.count():
+        # Iterations can be continued by any connection
+        sock = socks[calls % 2]
+        sock.sendall(_pack(b"SCAN", cursor, b"COUNT", b"10"))
+        cursor, page = _drain(sock)[0]
+        assert len(page) <= 20
+        keys.extend(page)
+        if cursor == b"0":
+            break
+    assert sorted(keys) == sorted(b"key%d" % i for i in range(1000))
+    assert scan_index.call_count == 1
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from fakeredis.geo import distance, geo_decode, geo_encode, hash_ranges_by_box, hash_ranges_by_radius
+
+
+def _in_ranges(geohash, ranges):
+    return any(start <= geohash and (end is None or geohash < end) for start, end in ranges)
+
+
+@pytest.fixture(scope="module")
+def points():
+    rnd = random.Random(0)
+    hashes = [geo_encode(rnd.uniform(-90, 90), rnd.uniform(-180, 180), 10) for _ in range(3000)]
+    # Points close to the poles and the antimeridian
+    for lat in (-89.99, -60, 0, 60, 89.99):
+        for lon in (-179.99, -179.5, 179.5, 179.99):
+            hashes.append(geo_encode(lat + rnd.uniform(-0.01, 0.01), lon, 10))
+    return [(geohash, geo_decode(geohash)[:2]) for geohash in hashes]
+
+
+def _centers():
+    rnd = random.Random(1)
+    yield 41.43, 2.19
+    yield 0, 179.999
+    yield -60, -179.9
+    yield 89.99, 0
+    yield -89.9, 120
+    for _ in range(40):
+        yield rnd.uniform(-90, 90), rnd.uniform(-180, 180)
+
+
+@pytest.mark.parametrize("radius", [100, 50_000, 1_000_000, 5_000_000, 30_000_000])
+def test_hash_ranges_by_radius(points, radius):
+    for lat, long in _centers():
+        ranges = hash_ranges_by_radius(lat, long, radius)
+        assert len(ranges) <= 9
+        for geohash, point in points:
+            if distance(point, (lat, long)) < radius:
+                assert _in_ranges(geohash, ranges)
+
+
+@pytest.mark.parametrize("width,height", [(100, 100), (200_000, 10_000), (10_000, 2_000_000), (8_000_000, 8_000_000)])
+def test_hash_ranges_by_box(points, width, height):
+    for lat, long in _centers():
+        ranges = hash_ranges_by_box(lat, long, width, height)
+        assert len(ranges) <= 9
+        for geohash, (p_lat, p_long) in points:
+            if distance((p_lat, long), (lat, long)) > height / 2:
+                continue
+            if distance((p_lat, p_long), (p_lat, long)) <= width / 2:
+                assert _in_ranges(geohash, ranges)
+
+
+def test_hash_ranges_are_small(points):
+    ranges = hash_ranges_by_radius(41.43, 2.19, 100_000)
+    assert 0 < sum(_in_ranges(geohash, ranges) for geohash, _ in points) < 30
+    assert hash_ranges_by_radius(0, 0, 30_000_000) == [("0000000000", None)]
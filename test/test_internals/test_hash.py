@@ -0,0 +1,69 @@
+import pytest
+
+from fakeredis.model import Hash
+
+
+@pytest.fixture
+def now(mocker):
+    clock = mocker.patch("fakeredis.model._hash.current_time")
+    clock.return_value = 1000
+    return clock
+
+
+@pytest.mark.fake
+def test_hash_fields_expire_in_deadline_order(now):
+    h = Hash()
+    for i in range(10):
+        h[b"field%d" % i] = b"value"
+        assert h.set_key_expireat(b"field%d" % i, 2000 + i) == 1
+    h[b"persistent"] = b"value"
+    now.return_value = 2005
+    assert h[b"field4"] is None
+    assert h[b"field5"] == b"value"
+    assert sorted(h.keys()) == sorted([b"field%d" % i for i in range(5, 10)] + [b"persistent"])
+    assert h.get_key_expireat(b"field5") == 2005
+    assert len(h._deadlines) == 5
+
+
+@pytest.mark.fake
+def test_hash_changed_expiration_is_honored(now):
+    h = Hash()
+    h.update({b"a": b"1", b"b": b"2", b"c": b"3"})
+    h.set_key_expireat(b"a", 2000)
+    h.set_key_expireat(b"b", 2000)
+    h.set_key_expireat(b"c", 2000)
+    assert h.clear_key_expireat(b"a")
+    h[b"b"] = b"new"  # Setting a field clears its expiration
+    h.set_key_expireat(b"c", 5000)
+    now.return_value = 3000
+    assert h.getall() == {b"a": b"1", b"b": b"new", b"c": b"3"}
+    now.return_value = 6000
+    assert b"c" not in h
+
+
+@pytest.mark.fake
+def test_hash_deadlines_are_compacted(now):
+    h = Hash()
+    h[b"field"] = b"value"
+    for i in range(1000):
+        h.set_key_expireat(b"field", 2000 + i)
+    assert len(h._deadlines) <= 2 * len(h._expirations) + 64
+    now.return_value = 2998
+    assert h[b"field"] == b"value"
+    now.return_value = 3000
+    assert h[b"field"] is None
+
+
+@pytest.mark.fake
+def test_hash_expirations_allocated_on_first_expiration(now):
+    h = Hash()
+    h[b"field"] = b"value"
+    del h[b"field"]
+    assert not h.clear_key_expireat(b"field")
+    assert h.get_key_expireat(b"field") is None
+    assert h._expirations is None and h._deadlines is None
+    h[b"field"] = b"value"
+    h.set_key_expireat(b"field", 2000)
+    assert h._expirations == {b"field": 2000}
+    assert h._deadlines == [(2000, b"field")]
+    assert Hash()._expirations is None
@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from fakeredis._helpers import SimpleError
+from fakeredis.model import HyperLogLog
+
+
+def _elements(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [rng.getrandbits(64).to_bytes(8, "little") for _ in range(count)]
+
+
+@pytest.mark.fake
+def test_sparse_and_dense_encodings_agree():
+    sparse, dense = HyperLogLog.create(), HyperLogLog.create()
+    for element in _elements(1000):
+        sparse.add([element])
+        dense.add([element], sparse_max_bytes=0)
+        assert not sparse.is_dense
+        assert dense.is_dense
+    assert len(dense.data) == HyperLogLog.DENSE_SIZE
+    assert sparse.registers() == dense.registers()
+    assert sparse.count() == dense.count()
+
+
+@pytest.mark.fake
+def test_sparse_is_promoted_when_too_large():
+    hll = HyperLogLog.create()
+    hll.add(_elements(10000))
+    assert hll.is_dense
+    expected = bytearray(HyperLogLog.REGISTERS)
+    for element in _elements(10000):
+        index, count = HyperLogLog.pattern(element)
+        expected[index] = max(expected[index], count)
+    assert hll.registers() == expected
+
+
+@pytest.mark.fake
+def test_set_registers_round_trip():
+    rng = random.Random(0)
+    registers = bytes(rng.choice([0, 0, 1, 2, 40]) for _ in range(HyperLogLog.REGISTERS))
+    hll = HyperLogLog.create()
+    hll.set_registers(registers, dense=False, sparse_max_bytes=100000)
+    assert hll.is_dense  # 40 cannot be represented in the sparse encoding
+    assert hll.registers() == registers
+    small = bytes(min(register, 3) for register in registers)
+    hll.set_registers(small, dense=False, sparse_max_bytes=100000)
+    assert not hll.is_dense
+    assert hll.registers() == small
+
+
+@pytest.mark.fake
+def test_union_takes_maximum_registers():
+    first, second = HyperLogLog.create(), HyperLogLog.create()
+    first.add(_elements(3000, seed=1))
+    second.add(_elements(50, seed=2))
+    union = HyperLogLog.union([first, second])
+    assert union == bytes(max(a, b) for a, b in zip(first.registers(), second.registers()))
+
+
+@pytest.mark.fake
+def test_cached_count_is_invalidated():
+    hll = HyperLogLog.create()
+    assert hll.cached_count() == 0
+    hll.add([b"a", b"b"])
+    assert hll.cached_count() is None
+    assert hll.count() == 2
+    assert hll.cached_count() == 2
+    assert not hll.add([b"a"])
+    assert hll.cached_count() == 2
+
+
+@pytest.mark.fake
+def test_invalid_values():
+    with pytest.raises(SimpleError):
+        HyperLogLog.from_value(b"HYLL")
+    with pytest.raises(SimpleError):
+        HyperLogLog.from_value(b"HYLL\x00" + bytes(11) + b"\x00")
+    corrupted = HyperLogLog.from_value(b"HYLL\x01" + bytes(10) + b"\x80\x00")
+    with pytest.raises(SimpleError):
+        corrupted.count()
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from fakeredis._lcs import find_lcs, lcs_length
+
+
+def _redis_lcs(a: bytes, b: bytes):
+    """The algorithm of redis, with the full table."""
+    table = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            if a[i - 1] == b[j - 1]:
+                table[i][j] = table[i - 1][j - 1] + 1
+            else:
+                table[i][j] = max(table[i - 1][j], table[i][j - 1])
+    i, j = len(a), len(b)
+    result, matches, current = b"", [], None
+    while i > 0 and j > 0:
+        emit = False
+        if a[i - 1] == b[j - 1]:
+            result = a[i - 1 : i] + result
+            if current is None:
+                current = [i - 1, i - 1, j - 1, j - 1]
+            elif current[0] == i and current[2] == j:
+                current[0] -= 1
+                current[2] -= 1
+            else:
+                emit = True
+            if current[0] == 0 or current[2] == 0:
+                emit = True
+            i, j = i - 1, j - 1
+        else:
+            if table[i - 1][j] > table[i][j - 1]:
+                i -= 1
+            else:
+                j -= 1
+            emit = current is not None
+        if emit:
+            matches.append([[current[0], current[1]], [current[2], current[3]], current[1] - current[0] + 1])
+            current = None
+    return table[len(a)][len(b)], result, matches
+
+
+@pytest.mark.fake
+def test_lcs_matches_redis_algorithm():
+    rng = random.Random(0)
+    for _ in range(500):
+        alphabet = b"abcd"[: rng.randint(1, 4)]
+        a = bytes(rng.choice(alphabet) for _ in range(rng.randrange(40)))
+        b = bytes(rng.choice(alphabet) for _ in range(rng.randrange(40)))
+        expected = _redis_lcs(a, b)
+        assert find_lcs(a, b) == expected
+        assert lcs_length(a, b) == expected[0]
+
+
+@pytest.mark.fake
+def test_lcs_of_large_strings():
+    rng = random.Random(0)
+    a = bytes(rng.randrange(256) for _ in range(20000))
+    b = a[:5000] + b"inserted" + a[5000:15000] + a[16000:]
+    length, value, matches = find_lcs(a, b)
+    assert length == lcs_length(a, b) == 19000
+    assert value == a[:15000] + a[16000:]
+    assert matches[-1] == [[0, 4999], [0, 4999], 5000]
@@ -0,0 +1,129 @@
+import random
+
+import pytest
+from sortedcontainers import SortedList
+
+from fakeredis.model import ExpiringMembersSet, Hash, ZSet
+from fakeredis.model._listpack import IntSet, ListPackDict, SortedListPack, as_int64
+
+
+@pytest.mark.fake
+def test_sorted_listpack_matches_sorted_list():
+    rnd = random.Random(0)
+    values = [(rnd.randint(0, 20), bytes([rnd.randint(97, 100)])) for _ in range(50)]
+    compact, full = SortedListPack(), SortedList()
+    for value in values:
+        compact.add(value)
+        full.add(value)
+    compact.remove(values[0])
+    full.remove(values[0])
+    assert list(compact) == list(full)
+    for _ in range(100):
+        low, high = sorted((rnd.randint(-1, 21), rnd.randint(-1, 21)))
+        inclusive = (rnd.random() < 0.5, rnd.random() < 0.5)
+        reverse = rnd.random() < 0.5
+        bounds = ((low, b"b"), (high, b"c"))
+        assert list(compact.irange(*bounds, inclusive, reverse)) == list(full.irange(*bounds, inclusive, reverse))
+        assert list(compact.irange(bounds[0], None)) == list(full.irange(bounds[0], None))
+        assert compact.bisect_left(bounds[0]) == full.bisect_left(bounds[0])
+        assert compact.bisect_right(bounds[1]) == full.bisect_right(bounds[1])
+        assert list(compact.islice(low, high, reverse)) == list(full.islice(low, high, reverse))
+
+
+@pytest.mark.fake
+def test_listpack_dict():
+    d = ListPackDict()
+    d[b"a"] = b"b"
+    d[b"b"] = b"a"
+    d[b"b"] = b"c"
+    assert len(d) == 2
+    assert b"c" not in d
+    assert d.get(b"b") == b"c"
+    assert d.items() == [(b"a", b"b"), (b"b", b"c")]
+    assert d.pop(b"a") == b"b"
+    assert d.pop(b"a", None) is None
+    with pytest.raises(KeyError):
+        del d[b"a"]
+    assert d.copy() == {b"b": b"c"}
+
+
+@pytest.mark.fake
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        (b"12", 12),
+        (b"-9223372036854775808", -(2**63)),
+        (b"9223372036854775808", None),
+        (b"012", None),
+        (b"-0", None),
+        (b" 1", None),
+        (b"1_0", None),
+        (b"", None),
+        (b"a", None),
+    ],
+)
+def test_as_int64(value, expected):
+    assert as_int64(value) == expected
+
+
+@pytest.mark.fake
+def test_intset():
+    s = IntSet([3, 1, 2])
+    assert list(s) == [b"1", b"2", b"3"]
+    assert b"2" in s
+    assert b"02" not in s
+    s.add(-5)
+    s.pop(b"2")
+    assert s.keys() == [b"-5", b"1", b"3"]
+    assert s.get(b"3", 0) is None
+    assert s.get(b"4", 0) == 0
+
+
+@pytest.mark.fake
+def test_zset_converts_past_limits():
+    config = {b"zset-max-listpack-entries": b"3", b"zset-max-listpack-value": b"4"}
+    zset = ZSet(config=config)
+    for i in range(3):
+        zset.add(b"m%d" % i, i)
+    zset.add(b"m0", 5)
+    assert zset.encoding == b"listpack"
+    zset.add(b"m3", 3)
+    assert zset.encoding == b"skiplist"
+    assert list(zset) == [b"m1", b"m2", b"m3", b"m0"]
+    assert zset.rank(b"m3") == (2, 3)
+
+    zset = ZSet(config=config)
+    zset.add(b"long member", 1)
+    assert zset.encoding == b"skiplist"
+    assert zset[b"long member"] == 1
+
+
+@pytest.mark.fake
+def test_hash_converts_past_limits():
+    config = {b"hash-max-listpack-entries": b"2", b"hash-max-listpack-value": b"4"}
+    h = Hash(config=config)
+    h.update({b"a": b"1", b"b": b"2"})
+    assert h.encoding == b"listpack"
+    h.update({b"b": b"3", b"c": b"4"})
+    assert h.encoding == b"hashtable"
+    assert h.getall() == {b"a": b"1", b"b": b"3", b"c": b"4"}
+
+    h = Hash(config=config)
+    h[b"a"] = b"long value"
+    assert h.encoding == b"hashtable"
+
+
+@pytest.mark.fake
+def test_set_converts_past_limits():
+    s = ExpiringMembersSet(config={b"set-max-intset-entries": b"3"})
+    s.update([b"3", b"1", b"2"])
+    assert s.encoding == b"intset"
+    s.add(b"4")
+    assert s.encoding == b"hashtable"
+    assert set(s) == {b"1", b"2", b"3", b"4"}
+
+    s = ExpiringMembersSet()
+    s.update([b"1", b"a"])
+    assert s.encoding == b"hashtable"
+    assert set(s) == {b"1", b"a"}
+    assert (s - ExpiringMembersSet({b"a": None})).encoding == b"intset"
@@ -0,0 +1,143 @@
+import pickle
+import random
+
+import pytest
+
+from fakeredis.model import QuickList
+
+
+@pytest.fixture
+def small_chunks(mocker):
+    mocker.patch.object(QuickList, "CHUNK_SIZE", 4)
+
+
+def _check_tree(ql):
+    if ql._tree is not None:
+        tree = list(ql._tree)
+        assert tree == ql._build_tree()
+
+
+@pytest.mark.fake
+def test_quicklist_matches_list(small_chunks):
+    rng = random.Random(0)
+    for _ in range(200):
+        expected, ql = [], QuickList()
+        for _ in range(50):
+            n = len(expected)
+            value = rng.randrange(100)
+            op = rng.randrange(9)
+            if op == 0:
+                expected.append(value)
+                ql.append(value)
+            elif op == 1:
+                expected.insert(0, value)
+                ql.appendleft(value)
+            elif op == 2:
+                index = rng.randint(-n - 1, n + 1)
+                expected.insert(index, value)
+                ql.insert(index, value)
+            elif op == 3 and n:
+                index = rng.randint(-n, n - 1)
+                assert ql.pop(index) == expected.pop(index)
+            elif op == 4 and n:
+                index = rng.randint(-n, n - 1)
+                assert ql[index] == expected[index]
+                expected[index] = ql[index] = value
+            elif op == 5:
+                start, stop = rng.randint(-n - 1, n + 1), rng.randint(-n - 1, n + 1)
+                step = rng.choice([None, 1, -1, 2])
+                assert ql[start:stop:step] == expected[start:stop:step]
+                del expected[start:stop:step]
+                del ql[start:stop:step]
+            elif op == 6:
+                values = [rng.randrange(5) for _ in range(rng.randrange(10))]
+                expected.extend(values)
+                ql.extend(values)
+            elif op == 7 and n:
+                value = rng.choice(expected)
+                assert ql.index(value) == expected.index(value)
+            elif op == 8 and n:
+                assert ql.popleft() == expected.pop(0)
+            _check_tree(ql)
+            assert len(ql) == len(expected)
+            assert list(ql) == expected
+            assert list(reversed(ql)) == expected[::-1]
+
+
+@pytest.mark.fake
+def test_quicklist_head_operations_keep_index(small_chunks):
+    ql = QuickList(range(100))
+    assert ql[50] == 50
+    assert ql._tree is not None
+    ql.popleft()
+    ql.appendleft(-1)
+    ql.pop()
+    ql.append(100)
+    assert ql._tree is not None
+    assert [ql[i] for i in range(0, 100, 10)] == [-1] + list(range(10, 100, 10))
+    assert ql[-1] == 100
+
+
+@pytest.mark.fake
+def test_quicklist_keeps_index_when_chunks_change_at_either_end(small_chunks):
+    ql = QuickList(range(100))
+    ql.appendleft(-1)
+    ql.popleft()
+    assert ql[50] == 50
+    tree = ql._tree
+    for i in range(1, 10):
+        ql.appendleft(-i)
+        ql.append(99 + i)
+    for _ in range(5):
+        ql.popleft()
+        ql.pop()
+    assert ql._tree is tree
+    _check_tree(ql)
+    expected = list(range(-4, 104))
+    assert [ql[i] for i in range(len(expected))] == expected
+
+
+@pytest.mark.fake
+def test_quicklist_reuses_head_slots(small_chunks):
+    ql = QuickList(range(8))
+    for i in range(1, 1000):
+        ql.appendleft(-i)
+        ql.pop()
+        assert len(ql._chunks) <= 3 * len(ql) // QuickList.CHUNK_SIZE + 12
+    assert list(ql) == list(range(-999, -991))
+    for i in range(1, 1000):
+        ql.append(i)
+        ql.popleft()
+        assert len(ql._chunks) <= 3 * len(ql) // QuickList.CHUNK_SIZE + 12
+    assert list(ql) == list(range(992, 1000))
+
+
+@pytest.mark.fake
+def test_quicklist_extendleft_reverses():
+    ql = QuickList([b"c"])
+    ql.extendleft([b"b", b"a"])
+    assert ql == [b"a", b"b", b"c"]
+
+
+@pytest.mark.fake
+def test_quicklist_errors():
+    ql = QuickList()
+    with pytest.raises(IndexError):
+        ql.pop()
+    with pytest.raises(IndexError):
+        ql.popleft()
+    with pytest.raises(IndexError):
+        ql[0]
+    ql.append(b"a")
+    with pytest.raises(IndexError):
+        ql[1] = b"b"
+    with pytest.raises(ValueError):
+        ql.index(b"b")
+
+
+@pytest.mark.fake
+def test_quicklist_pickle():
+    ql = QuickList(range(1000))
+    restored = pickle.loads(pickle.dumps(ql))
+    assert type(restored) is QuickList
+    assert restored == ql
@@ -0,0 +1,52 @@
+import pytest
+
+from fakeredis._commands import Signature, Key, Int, Item
+from fakeredis._helpers import Database, SimpleError
+
+
+@pytest.mark.fake
+def test_signature_apply_converts_args():
+    db = Database(None)
+    db[b"list"] = Item([b"a"])
+    sig = Signature("test", "test", (Key(list), Int), (bytes, Int))
+    for n_repeats in range(3):
+        args = [b"list", b"1"] + [b"x", b"2"] * n_repeats
+        (key, *rest), command_items = sig.apply(args, db, (7,))
+        assert key.value == [b"a"]
+        assert command_items == [key]
+        assert rest == [1] + [b"x", 2] * n_repeats
+
+
+@pytest.mark.fake
+def test_signature_apply_checks_arity():
+    db = Database(None)
+    sig = Signature("test", "test", (Key(), Int), (bytes, Int))
+    with pytest.raises(SimpleError, match="(?i)wrong number of arg"):
+        sig.apply([b"key"], db, (7,))
+    with pytest.raises(SimpleError, match="(?i)wrong number of arg"):
+        sig.apply([b"key", b"1", b"x"], db, (7,))
+    # A plan compiled for a valid arity must not make other arities valid
+    sig.apply([b"key", b"1", b"x", b"2"], db, (7,))
+    with pytest.raises(SimpleError, match="(?i)wrong number of arg"):
+        sig.apply([b"key", b"1", b"x", b"2", b"y"], db, (7,))
+
+
+@pytest.mark.fake
+def test_signature_apply_missing_return_short_circuits_before_decoding():
+    db = Database(None)
+    sig = Signature("test", "test", (Key(missing_return=None), Int))
+    assert sig.apply([b"missing", b"not-an-int"], db, (7,)) == (None,)
+    db[b"present"] = Item(b"value")
+    with pytest.raises(SimpleError):
+        sig.apply([b"present", b"not-an-int"], db, (7,))
+
+
+@pytest.mark.fake
+def test_signature_apply_wrong_type_and_default():
+    db = Database(None)
+    db[b"string"] = Item(b"value")
+    sig = Signature("test", "test", (Key(list),))
+    with pytest.raises(SimpleError, match="WRONGTYPE"):
+        sig.apply([b"string"], db, (7,))
+    (key,), _ = sig.apply([b"missing"], db, (7,))
+    assert key.value == []
@@ -95,6 +95,19 @@ def test_setbits_and_getkeys(r: redis.Redis):
     assert r.get("foo") == b"p@\x00\x00\x00\x00\x02"
 
 
+def test_setbit_after_set(r: redis.Redis):
+    r.set("foo", b"\x00")
+    values = [r.get("foo")]
+    for offset in range(0, 24, 3):
+        r.setbit("foo", offset, 1)
+        values.append(r.get("foo"))
+    assert values[1] == b"\x80"
+    assert values[-1] == b"\x92\x49\x24"
+    assert r.setbit("foo", 0, 1) == 1
+    assert r.bitcount("foo") == 8
+    assert r.get("foo") == b"\x92\x49\x24"
+
+
 def test_setbit_wrong_type(r: redis.Redis):
     r.rpush("foo", b"x")
     with pytest.raises(redis.ResponseError):
@@ -172,6 +185,54 @@ def test_bitop(r: redis.Redis):
     assert r.get("dest-xor") == b"\x07\r\x0c\x06\x04\x14"
 
 
+def test_bitop_different_lengths(r: redis.Redis):
+    r.set("key1", b"\xff\xff\xff")
+    r.set("key2", b"\x0f")
+    assert r.bitop("and", "dest", "key1", "key2") == 3
+    assert r.get("dest") == b"\x0f\x00\x00"
+    assert r.bitop("or", "dest", "key2", "key1") == 3
+    assert r.get("dest") == b"\xff\xff\xff"
+    assert r.bitop("xor", "dest", "key1", "missing") == 3
+    assert r.get("dest") == b"\xff\xff\xff"
+    assert r.bitop("and", "dest", "key1", "missing") == 3
+    assert r.get("dest") == b"\x00\x00\x00"
+
+
+def test_bitop_missing_keys_delete_destination(r: redis.Redis):
+    r.set("dest", "value")
+    assert r.bitop("or", "dest", "missing1", "missing2") == 0
+    assert r.exists("dest") == 0
+    r.set("dest", "value")
+    assert r.bitop("not", "dest", "missing1") == 0
+    assert r.exists("dest") == 0
+
+
+def test_bitops_on_large_bitmap(r: redis.Redis):
+    size = 1 << 20
+    r.setbit("bm", size - 1, 1)
+    r.setbit("bm", 12345, 1)
+    assert r.bitcount("bm") == 2
+    assert r.bitcount("bm", 1, -2) == 1
+    assert r.bitpos("bm", 1) == 12345
+    assert r.bitpos("bm", 1, 1544) == size - 1
+    assert r.bitpos("bm", 0) == 0
+    r.bitop("not", "inverted", "bm")
+    assert r.bitpos("inverted", 0) == 12345
+    assert r.bitpos("inverted", 1, -1) == size - 8
+    assert r.bitcount("inverted") == size - 2
+
+
+@pytest.mark.min_server("7")
+def test_bitops_on_large_bitmap_bit_mode(r: redis.Redis):
+    size = 1 << 20
+    r.setbit("bm", size - 1, 1)
+    r.setbit("bm", 12345, 1)
+    assert r.bitcount("bm", 12345, 12345, "bit") == 1
+    assert r.bitcount("bm", 12346, -2, "bit") == 0
+    assert r.bitpos("bm", 1, 12346, -1, "bit") == size - 1
+    assert r.bitpos("bm", 0, 12345, 12345, "bit") == -1
+
+
 def test_bitop_errors(r: redis.Redis):
     r.set("key1", "foobar")
     r.set("key2", "abcdef")
@@ -389,6 +450,16 @@ def test_bitfield_incr_fail(r: redis.Redis):
     assert r.get(key) == b"\xee\xe0\x00"
 
 
+def test_bitfield_syntax_error_changes_nothing(r: redis.Redis):
+    r.set("foo", b"\x00")
+    with pytest.raises(redis.ResponseError):
+        raw_command(r, "bitfield", "foo", "set", "u8", "0", "255", "foo")
+    with pytest.raises(redis.ResponseError):
+        raw_command(r, "bitfield", "bar", "set", "u8", "0", "255", "foo")
+    assert r.get("foo") == b"\x00"
+    assert r.exists("bar") == 0
+
+
 def test_bitfield_get_wrong_arguments(r: redis.Redis):
     key = "key:bitfield_get:wrong:args"
     r.set(key, b"\xff\xf0\x00")
@@ -695,3 +695,46 @@ def test_from_hypothesis_redis7(r: redis.Redis):
     r.set(b"", b"")
     assert r.setbit(b"", 0, 0) == 0
     assert r.get(b"") == b"\x00"
+
+
+@pytest.mark.min_server("7")
+def test_object_encoding(r: redis.Redis):
+    def encoding(key):
+        value = r.object("encoding", key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    assert encoding("missing") is None
+    r.set("int", 123)
+    r.set("embstr", "a" * 44)
+    r.set("raw", "a" * 45)
+    assert (encoding("int"), encoding("embstr"), encoding("raw")) == ("int", "embstr", "raw")
+    # Strings modified in place are raw, even when short or holding an integer
+    r.append("embstr", "b")
+    r.append("int", "4")
+    r.set("short", "abc")
+    r.setrange("short", 1, "x")
+    assert (encoding("embstr"), encoding("int"), encoding("short")) == ("raw", "raw", "raw")
+    assert r.get("int") == b"1234"
+    r.setbit("bits", 7, 1)
+    r.set("bits2", "1")
+    r.setbit("bits2", 1, 1)
+    assert (encoding("bits"), encoding("bits2")) == ("raw", "raw")
+    assert (r.get("bits"), r.get("bits2")) == (b"\x01", b"q")
+
+    r.zadd("zset", {"a": 1, "b": 2})
+    assert encoding("zset") == "listpack"
+    r.zadd("zset", {"a" * 65: 3})
+    assert encoding("zset") == "skiplist"
+    assert r.zrange("zset", 0, -1) == [b"a", b"b", b"a" * 65]
+
+    r.hset("hash", mapping={"a": 1, "b": 2})
+    assert encoding("hash") == "listpack"
+    r.hset("hash", mapping={str(i): i for i in range(128)})
+    assert encoding("hash") == "hashtable"
+    assert r.hlen("hash") == 130
+
+    r.sadd("set", *range(512))
+    assert encoding("set") == "intset"
+    r.sadd("set", 512)
+    assert encoding("set") == "hashtable"
+    assert r.scard("set") == 513
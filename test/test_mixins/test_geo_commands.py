@@ -342,3 +342,43 @@ def test_geosearch(r: redis.Redis):
         b"place3",
         b"place2",
     ]
+
+
+def test_geosearch_bybox(r: redis.Redis):
+    r.geoadd("Sicily", (13.361389, 38.115556, "Palermo", 15.087269, 37.502669, "Catania"))
+    r.geoadd("Sicily", (12.758489, 38.788135, "edge1", 17.241510, 38.788135, "edge2"))
+    assert r.geosearch("Sicily", longitude=15, latitude=37, width=200, height=200, unit="km") == [b"Catania"]
+    res = r.geosearch("Sicily", longitude=15, latitude=37, width=400, height=400, unit="km", sort="ASC", withdist=True)
+    assert res[:2] == [[b"Catania", pytest.approx(56.4413, 1e-4)], [b"Palermo", pytest.approx(190.4424, 1e-4)]]
+    # edge1 and edge2 are at the same distance
+    assert dict(res[2:]) == {b"edge1": pytest.approx(279.74, 1e-4), b"edge2": pytest.approx(279.74, 1e-4)}
+    assert r.geosearch("Sicily", member="Palermo", width=100, height=50, unit="km", sort="ASC") == [b"Palermo"]
+    assert r.geosearchstore("result", "Sicily", longitude=15, latitude=37, width=200, height=200, unit="km") == 1
+    assert r.zrange("result", 0, -1) == [b"Catania"]
+
+
+def test_geosearch_across_antimeridian(r: redis.Redis):
+    r.geoadd("pacific", (179.99, 0.5, "east", -179.99, 0.5, "west", 170, 0.5, "far"))
+    assert r.geosearch("pacific", longitude=179.999, latitude=0.5, radius=50, unit="km", sort="ASC") == [
+        b"east",
+        b"west",
+    ]
+    assert r.geosearch("pacific", longitude=-179.999, latitude=0.5, width=50, height=50, unit="km", sort="ASC") == [
+        b"west",
+        b"east",
+    ]
+
+
+def test_geosearch_many_members(r: redis.Redis):
+    values = []
+    for i in range(100):
+        for j in range(100):
+            values.extend((-0.5 + i / 100, 51 + j / 100, f"{i}:{j}"))
+    r.geoadd("grid", values)
+    res = r.geosearch("grid", longitude=0, latitude=51.5, radius=5, unit="km", withdist=True)
+    assert len(res) > 0
+    assert all(dist < 5 for _, dist in res)
+    assert len(r.geosearch("grid", longitude=0, latitude=51.5, radius=5, unit="km", count=3, any=True)) == 3
+    res = r.geosearch("grid", longitude=0, latitude=51.5, width=10, height=10, unit="km")
+    assert {b"0:0", b"99:99"}.isdisjoint(res)
+    assert b"50:50" in res
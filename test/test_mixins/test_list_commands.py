@@ -678,3 +678,19 @@ def test_lmpop(r: redis.Redis):
         r.lmpop("2", "bar", "foo", direction="up", count=2)
     r.rpush("bar", "a", "b", "c", "d")
     assert r.lmpop("2", "bar", "foo", direction="LEFT") == [b"bar", [b"a"]]
+
+
+def test_large_list_operations(r: redis.Redis):
+    r.rpush("foo", *range(1000))
+    r.lpush("foo", *range(-1, -501, -1))
+    assert r.llen("foo") == 1500
+    assert r.lindex("foo", 700) == b"200"
+    assert r.lrange("foo", 498, 501) == [b"-2", b"-1", b"0", b"1"]
+    assert r.lpos("foo", "990", rank=-1, maxlen=20) == 1490
+    assert r.lpos("foo", "0", rank=-1, maxlen=20) is None
+    assert r.ltrim("foo", 300, -300)
+    assert r.llen("foo") == 901
+    assert r.lpop("foo", 2) == [b"-200", b"-199"]
+    assert r.rpop("foo", 2) == [b"700", b"699"]
+    assert r.linsert("foo", "before", "500", "x") == 898
+    assert r.lindex("foo", r.lpos("foo", "500") - 1) == b"x"
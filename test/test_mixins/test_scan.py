@@ -1,3 +1,4 @@
+import itertools
 from time import sleep
 
 import pytest
@@ -200,3 +201,91 @@ def test_scan_stream(r: redis.Redis):
     assert r.type("mystream") == b"stream"  # noqa: E721
     for s in r.scan_iter(_type="STRING"):
         print(s)
+
+
+def test_scan_guarantees_while_keys_change(r: redis.Redis):
+    r.mset({f"key:{i}": i for i in range(500)})
+    removed, added, seen = set(), set(), set()
+    cursor, keys = r.scan(count=20)
+    seen.update(keys)
+    i = 0
+    while cursor != 0:
+        for key in (f"key:{i}".encode(), f"key:{499 - i}".encode()):
+            if key not in seen and r.delete(key):
+                removed.add(key)
+        r.set(f"new:{i}", i)
+        added.add(f"new:{i}".encode())
+        i += 1
+        cursor, keys = r.scan(cursor=cursor, count=20)
+        seen.update(keys)
+    present = {f"key:{i}".encode() for i in range(500)} - removed
+    assert present <= seen
+    assert not (removed & seen)
+    assert seen <= present | added
+
+
+def test_zscan_interleaved_iterations(r: redis.Redis):
+    r.zadd("zset", {f"member:{i}": i for i in range(100)})
+    r.sadd("set", *[f"member:{i}" for i in range(100)])
+    zset_cursor, zset_result = r.zscan("zset", count=10)
+    set_cursor, set_result = r.sscan("set", count=10)
+    while zset_cursor != 0 or set_cursor != 0:
+        if zset_cursor != 0:
+            zset_cursor, items = r.zscan("zset", zset_cursor, count=10)
+            zset_result.extend(items)
+        if set_cursor != 0:
+            set_cursor, items = r.sscan("set", set_cursor, count=10)
+            set_result.extend(items)
+    assert dict(zset_result) == {f"member:{i}".encode(): i for i in range(100)}
+    assert set(set_result) == {f"member:{i}".encode() for i in range(100)}
+
+
+def test_keys_and_scan_match_with_prefix(r: redis.Redis):
+    r.mset({f"user:{i}:name": i for i in range(50)})
+    r.mset({f"item:{i}": i for i in range(50)})
+    r.set("user:[x]", 1)
+    expected = {f"user:1{i}:name".encode() for i in range(10)} | {b"user:1:name"}
+    assert set(r.keys("user:1*:name")) == expected
+    assert set(r.scan_iter(match="user:1*:name", count=5)) == expected
+    assert r.keys("user:\\[x\\]") == [b"user:[x]"]
+    assert set(r.keys("item:4?")) == {f"item:4{i}".encode() for i in range(10)}
+
+
+@pytest.mark.parametrize("scan_type", ["hscan", "sscan", "zscan"])
+def test_scan_members_while_members_change(r: redis.Redis, scan_type: str):
+    members = [f"member:{i}".encode() for i in range(500)]
+    if scan_type == "hscan":
+        r.hset("key", mapping={member: 1 for member in members})
+    elif scan_type == "sscan":
+        r.sadd("key", *members)
+    else:
+        r.zadd("key", {member: 1 for member in members})
+    scan = getattr(r, scan_type)
+    removed, seen = set(), set()
+    cursor = 0
+    for i in itertools.count():
+        cursor, page = scan("key", cursor, count=20)
+        if scan_type == "zscan":
+            page = [member for member, _ in page]
+        seen.update(page)
+        if cursor == 0:
+            break
+        member = members[499 - i]
+        if member not in seen:
+            removed.add(member)
+            if scan_type == "hscan":
+                r.hdel("key", member)
+            elif scan_type == "sscan":
+                r.srem("key", member)
+            else:
+                r.zrem("key", member)
+        for j in range(5):
+            new_member = f"new:{i}:{j}"
+            if scan_type == "hscan":
+                r.hset("key", new_member, 1)
+            elif scan_type == "sscan":
+                r.sadd("key", new_member)
+            else:
+                r.zadd("key", {new_member: 1})
+    assert set(members) - removed <= seen
+    assert not removed & seen
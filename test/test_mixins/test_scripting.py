@@ -77,6 +77,18 @@ def test_script_flush(r: redis.Redis):
     assert r.script_exists(*sha1_values) == [0] * len(sha1_values)
 
 
+def test_script_cache_is_shared_by_connections(r, create_redis):
+    other = create_redis(db=2)
+    sha1 = r.script_load("return 'a'")
+    assert other.script_exists(sha1) == [1]
+    assert other.evalsha(sha1, 0) == b"a"
+
+    assert other.script_flush() is True
+    assert r.script_exists(sha1) == [0]
+    with pytest.raises(redis.exceptions.NoScriptError):
+        r.evalsha(sha1, 0)
+
+
 def test_script_no_subcommands(r: redis.Redis):
     with pytest.raises(redis.ResponseError):
         raw_command(r, "SCRIPT")
@@ -316,6 +328,56 @@ def test_eval_global_and_return_ok(r: redis.Redis):
         )
 
 
+def test_eval_global_variable_is_not_kept(r: redis.Redis):
+    with pytest.raises(ResponseError):
+        r.eval("a=10", 0)
+    assert r.eval("return a", 0) is None
+    assert r.eval("return KEYS[1]", 1, "foo") == b"foo"
+    assert r.eval("return KEYS[1]", 0) is None
+
+
+def test_eval_call_after_setting_global_variable(r: redis.Redis):
+    with pytest.raises(ResponseError, match="global"):
+        r.eval("a = 10; redis.call('SET', 'foo', 'bar')", 0)
+    assert r.get("foo") is None
+    with pytest.raises(ResponseError):
+        r.eval("rawset(_G, 'b', 10); return 1", 0)
+    assert r.eval("return b", 0) is None
+
+
+def test_eval_call_many_commands(r: redis.Redis):
+    script = """
+    for i = 1, 100 do
+        redis.call('set', KEYS[1] .. i, i)
+    end
+    local values = redis.call('MGET', KEYS[1] .. 1, 'missing', KEYS[1] .. 100)
+    local error = redis.pcall('NOPE')
+    return {values[1], values[2], values[3], redis.call('GET', KEYS[1] .. 50), error, redis.pcall('NOPE')}
+    """
+    result = r.eval(script, 1, "key")
+    assert result[:4] == [b"1", None, b"100", b"50"]
+    assert isinstance(result[4], ResponseError) and isinstance(result[5], ResponseError)
+
+
+@pytest.mark.fake
+def test_eval_redis_library_is_restored(r: redis.Redis):
+    assert r.eval("redis.call = nil; KEYS = nil; return 1", 0) == 1
+    assert r.eval("return redis.call('ECHO', KEYS[1])", 1, "abc") == b"abc"
+
+
+@pytest.mark.fake
+def test_evalsha_reuses_lua_runtime():
+    server = fakeredis.FakeServer()
+    r1, r2 = fakeredis.FakeRedis(server=server), fakeredis.FakeRedis(server=server)
+    sha1 = r1.script_load("return ARGV[1]")
+    assert r1.evalsha(sha1, 0, "a") == b"a"
+    assert r2.eval("return ARGV[1]", 0, "b") == b"b"
+    (runtime,) = server.lua_runtimes[frozenset()]
+    assert list(runtime.functions) == [sha1.encode()]
+    r1.script_flush()
+    assert not server.lua_runtimes
+
+
 def test_eval_convert_number(r: redis.Redis):
     # Redis forces all Lua numbers to integer
     val = r.eval("return 3.2", 0)
@@ -618,7 +680,6 @@ def test_hscan_cursors_are_bytes(r: redis.Redis):
     assert isinstance(result, bytes)
 
 
-@pytest.mark.xfail  # TODO
 def test_deleting_while_scan(r: redis.Redis):
     for i in range(100):
         r.set(f"key-{i}", i)
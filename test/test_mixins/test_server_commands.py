@@ -96,3 +96,79 @@ def test_flushdb_redispy4(r: redis.Redis):
     assert r.keys() == [b"foo"]
     assert r.flushdb() is True
     assert r.keys() == []
+
+
+def test_memory_usage(r: redis.Redis):
+    r.set("foo", "bar")
+    r.rpush("list", *range(100))
+    assert r.memory_usage("foo") > 0
+    assert r.memory_usage("list") > r.memory_usage("foo")
+    assert r.memory_usage("list", samples=0) > 0
+    assert r.memory_usage("missing") is None
+
+
+def test_info_memory(r: redis.Redis):
+    r.set("foo", "bar" * 100)
+    info = r.info("memory")
+    assert info["used_memory"] > 0
+    assert info["maxmemory_policy"] in ("noeviction", "allkeys-lru")
+
+
+@fake_only
+@pytest.mark.parametrize("policy", ["allkeys-lru", "allkeys-lfu"])
+def test_maxmemory_evicts_cold_keys(r: redis.Redis, policy: str):
+    r.config_set("maxmemory-policy", policy)
+    r.config_set("maxmemory", "20kb")
+    hot = [f"hot{i}" for i in range(10)]
+    r.mset({key: "x" * 20 for key in hot})
+    for i in range(2000):
+        r.set(f"key{i}", "x" * 20)
+        for key in hot:
+            r.get(key)
+    assert r.info("memory")["used_memory"] <= 20 * 1024 + 100
+    assert r.dbsize() < 1000
+    assert r.info("stats")["evicted_keys"] > 1000
+    assert r.mget(hot) == [b"x" * 20] * 10
+
+
+@fake_only
+def test_maxmemory_volatile_ttl(r: redis.Redis):
+    r.config_set("maxmemory-policy", "volatile-ttl")
+    for i in range(50):
+        r.set(f"key{i}", "x" * 100, ex=1000 + i)
+    r.set("persistent", "x" * 100)
+    r.config_set("maxmemory", r.info("memory")["used_memory"] // 2)
+    r.set("new", "x" * 100)
+    assert r.exists("persistent")
+    # Keys with the nearest expiry are evicted first
+    assert r.exists(*[f"key{i}" for i in range(10)]) < r.exists(*[f"key{i}" for i in range(40, 50)])
+    r.config_set("maxmemory", "1")
+    with pytest.raises(ResponseError, match="maxmemory"):
+        r.set("new", "x")
+    assert r.exists("persistent")
+    assert r.get("persistent") == b"x" * 100
+
+
+@fake_only
+def test_maxmemory_noeviction(r: redis.Redis):
+    r.set("foo", "x" * 100)
+    r.config_set("maxmemory", "1")
+    with pytest.raises(ResponseError, match="maxmemory"):
+        r.set("bar", "x")
+    with pytest.raises(ResponseError, match="maxmemory"):
+        r.lpush("list", "x")
+    assert r.get("foo") == b"x" * 100
+    assert r.delete("foo") == 1
+    assert r.set("bar", "x")
+
+
+@fake_only
+def test_config_set_maxmemory_invalid(r: redis.Redis):
+    with pytest.raises(ResponseError, match="maxmemory"):
+        r.config_set("maxmemory", "lots")
+    with pytest.raises(ResponseError, match="maxmemory-policy"):
+        r.config_set("maxmemory-policy", "most-hated")
+    with pytest.raises(ResponseError, match="maxmemory-samples"):
+        r.config_set("maxmemory-samples", "0")
+    assert r.config_set("maxmemory", "1gb")
+    assert r.info("memory")["maxmemory"] == 1024**3
@@ -467,6 +467,60 @@ def test_pfmerge(r: redis.Redis):
     assert r.pfcount(key3) == 6
 
 
+def test_pfmerge_includes_destination(r: redis.Redis):
+    r.pfadd("dest", "a", "b")
+    r.pfadd("src", "c")
+    assert r.pfmerge("dest", "src")
+    assert r.pfcount("dest") == 3
+    assert r.pfmerge("empty", "missing")
+    assert r.pfcount("empty") == 0
+
+
+def test_hyperloglog_is_a_string(r: redis.Redis):
+    assert r.pfadd("hll") == 1
+    assert r.pfadd("hll") == 0
+    assert r.type("hll") == b"string"
+    r.pfadd("hll", *range(1000))
+    value = r.get("hll")
+    assert value.startswith(b"HYLL")
+    r.set("copy", value)
+    assert r.pfcount("copy") == r.pfcount("hll")
+    assert r.pfadd("copy", *range(1000)) == 0
+    r.restore("restored", 0, r.dump("hll"))
+    assert r.pfcount("restored") == r.pfcount("hll")
+
+
+def test_hyperloglog_invalid_value(r: redis.Redis):
+    r.set("foo", "bar")
+    with pytest.raises(redis.ResponseError, match="not a valid HyperLogLog"):
+        r.pfadd("foo", "a")
+    with pytest.raises(redis.ResponseError, match="not a valid HyperLogLog"):
+        r.pfcount("foo")
+    with pytest.raises(redis.ResponseError, match="not a valid HyperLogLog"):
+        r.pfmerge("dest", "foo")
+    r.sadd("set", "a")
+    with pytest.raises(redis.ResponseError):
+        r.pfcount("set")
+
+
+def test_hyperloglog_large_cardinality(r: redis.Redis):
+    for start in range(0, 100000, 10000):
+        r.pfadd("hll1", *range(start, start + 10000))
+    r.pfadd("hll2", *range(50000, 150000))
+    assert abs(r.pfcount("hll1") - 100000) < 2000
+    assert len(r.get("hll1")) == 12304
+    assert abs(r.pfcount("hll1", "hll2") - 150000) < 3000
+    r.pfmerge("hll3", "hll1", "hll2")
+    assert r.pfcount("hll3") == r.pfcount("hll1", "hll2")
+
+
+def test_pfadd_keeps_expiry(r: redis.Redis):
+    r.pfadd("hll", "a")
+    r.expire("hll", 100)
+    r.pfadd("hll", "b")
+    assert r.ttl("hll") > 0
+
+
 @pytest.mark.slow
 def test_set_ex_should_expire_value(r: redis.Redis):
     r.set("foo", "bar")
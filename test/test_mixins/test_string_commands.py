@@ -30,6 +30,25 @@ def test_append_wrong_type(r: redis.Redis):
         r.append("foo", b"x")
 
 
+def test_append_keeps_string_semantics(r: redis.Redis):
+    r.set("foo", "1", ex=100)
+    for digit in "2345":
+        r.append("foo", digit)
+    assert r.get("foo") == b"12345"
+    assert r.getrange("foo", 1, 2) == b"23"
+    assert r.strlen("foo") == 5
+    assert r.type("foo") == b"string"
+    assert r.ttl("foo") > 0
+    assert r.incr("foo") == 12346
+    r.append("foo", "x")
+    assert r.setrange("foo", 0, "ab") == 6
+    assert r.get("foo") == b"ab346x"
+    with pytest.raises(redis.ResponseError):
+        r.lpush("foo", "x")
+    assert r.append("empty", "") == 0
+    assert r.exists("empty") == 1
+
+
 def test_decr(r: redis.Redis):
     r.set("foo", 10)
     assert r.decr("foo") == 9